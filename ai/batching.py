@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from ai.inference import predict_batch
+
+_STOP = object()
+
+
+class _Call:
+    """A non-batchable model call queued behind the pending batches."""
+
+    def __init__(self, func, args, future):
+        self.func = func
+        self.args = args
+        self.future = future
+
+    def run(self, inferencer):
+        try:
+            self.future.set_result(self.func(*self.args, inferencer))
+        except Exception as e:
+            self.future.set_exception(e)
+
+
+class MicroBatcher:
+    """Dynamic micro-batching scheduler in front of `predict_batch`.
+
+    Callers submit single images from any thread. A background thread collects
+    them until `max_batch_size` requests are waiting or the oldest one has waited
+    `max_wait` seconds, then runs them through the model as one batch.
+    """
+
+    def __init__(self, inferencer, max_batch_size: int = 8, max_wait: float = 0.005):
+        self.inferencer = inferencer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_images = 0
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image) -> Future:
+        """Queue one image; the future resolves to (prediction, inference_time)."""
+        future = Future()
+        self._requests.put((image, future))
+        return future
+
+    def predict(self, image):
+        """Blocking single-image call with the same return shape as `run_inference_core`."""
+        return self.submit(image).result()
+
+    def call(self, func, *args) -> Future:
+        """Run `func(*args, inferencer)` on the batching thread, serialized with the batches.
+
+        For model calls that don't fit a batch (e.g. tiled inference): the
+        inferencer is never used from two threads at once.
+        """
+        future = Future()
+        self._requests.put(_Call(func, args, future))
+        return future
+
+    def close(self):
+        self._requests.put(_STOP)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            first = self._requests.get()
+            if first is _STOP:
+                return
+            if isinstance(first, _Call):
+                first.run(self.inferencer)
+                continue
+
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            call = None
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stop = True
+                    break
+                if isinstance(request, _Call):
+                    call = request
+                    break
+                batch.append(request)
+
+            self._run(batch)
+            if call is not None:
+                call.run(self.inferencer)
+            if stop:
+                return
+
+    def _run(self, batch):
+        images = [image for image, _ in batch]
+        futures = [future for _, future in batch]
+        self.batches += 1
+        self.batched_images += len(batch)
+        try:
+            predictions, elapsed = predict_batch(images, self.inferencer)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        # Report the amortized per-image cost of the batch
+        per_image_time = elapsed / len(batch)
+        for future, prediction in zip(futures, predictions):
+            future.set_result((prediction, per_image_time))
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from ai.inference import Prediction, model_files
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("INFERENCE_GUI_CACHE_DIR", Path.home() / ".cache" / "inference_gui")
+) / "predictions"
+
+_CHUNK_SIZE = 1 << 20
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash of an in-memory buffer (e.g. the encoded image file)."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Content hash of a file, read in chunks so large weights don't need to fit in RAM."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_model(weight_path: Path) -> str:
+    """Hash a model, including the .bin weights that sit next to an OpenVINO .xml."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in model_files(weight_path):
+        digest.update(hash_file(path).encode())
+    return digest.hexdigest()
+
+
+def _to_numpy(value):
+    if value is None:
+        return None
+    if hasattr(value, "cpu"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+class PredictionCache:
+    """Content-addressed prediction cache with an in-memory LRU tier over an on-disk tier.
+
+    Entries are keyed by the hash of the image bytes plus the hash of the model file.
+    On disk each entry is a directory of plain .npy files, so lookups memory-map the
+    arrays instead of reading them in full.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, memory_limit: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_hash: str, model_hash: str, variant: str = "") -> str:
+        """`variant` separates predictions made differently from the same inputs (e.g. tiled)."""
+        if variant:
+            return f"{model_hash[:16]}-{variant}-{image_hash}"
+        return f"{model_hash[:16]}-{image_hash}"
+
+    def get(self, key: str) -> Prediction | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        prediction = self._load(key)
+        with self._lock:
+            if prediction is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, prediction)
+        return prediction
+
+    def put(self, key: str, predictions) -> Prediction:
+        """Store predictions (any object with anomaly_map/pred_mask/pred_score) and return the cached copy."""
+        anomaly_map = _to_numpy(predictions.anomaly_map)
+        pred_mask = _to_numpy(predictions.pred_mask)
+        pred_score = _to_numpy(predictions.pred_score)
+
+        # Compact storage: half-precision map, boolean mask
+        prediction = Prediction(
+            anomaly_map=None if anomaly_map is None else anomaly_map.astype(np.float16),
+            pred_mask=None if pred_mask is None else pred_mask.astype(bool),
+            pred_score=None if pred_score is None else pred_score.astype(np.float64).reshape(-1)[0],
+        )
+        self._save(key, prediction)
+        with self._lock:
+            self._remember(key, prediction)
+        return prediction
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self.memory_used = 0
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key[-2:] / key
+
+    def _remember(self, key, prediction):
+        # Caller holds the lock
+        size = sum(np.asarray(v).nbytes for v in prediction if v is not None)
+        if size > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.memory_used -= old[1]
+        self._memory[key] = (prediction, size)
+        self.memory_used += size
+        while self.memory_used > self.memory_limit:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self.memory_used -= evicted_size
+
+    def _load(self, key: str) -> Prediction | None:
+        entry_dir = self._entry_dir(key)
+        if not entry_dir.is_dir():
+            return None
+        try:
+            fields = {}
+            for name in Prediction._fields:
+                path = entry_dir / f"{name}.npy"
+                fields[name] = np.load(path, mmap_mode="r") if path.exists() else None
+            if fields["pred_score"] is not None:
+                fields["pred_score"] = float(fields["pred_score"])
+            return Prediction(**fields)
+        except (OSError, ValueError):
+            # Half-written or corrupted entry; treat as a miss and drop it
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def _save(self, key: str, prediction: Prediction):
+        entry_dir = self._entry_dir(key)
+        if entry_dir.is_dir():
+            return
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write into a private temp dir and rename it into place so readers never see partial entries
+        tmp_dir = entry_dir.with_name(f"{key}.tmp-{os.getpid()}-{threading.get_ident()}")
+        tmp_dir.mkdir(exist_ok=True)
+        try:
+            for name, value in zip(Prediction._fields, prediction):
+                if value is not None:
+                    np.save(tmp_dir / f"{name}.npy", np.asarray(value))
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another writer got there first, or the disk is full; the cache is best-effort
+            shutil.rmtree(tmp_dir, ignore_errors=True)
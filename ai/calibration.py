@@ -0,0 +1,139 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Parent-folder names that give a result without explicit ground truth its label
+NORMAL_DIR_NAMES = {"good", "ok", "normal", "pass"}
+ANOMALOUS_DIR_NAMES = {"bad", "ng", "defect", "defective", "anomaly", "anomalous", "abnormal", "fail"}
+
+
+def _parse_ground_truth(record) -> bool | None:
+    """True for anomalous, False for normal, None if unknown."""
+    value = record.get("gt")
+    if value not in (None, ""):
+        if isinstance(value, str):
+            return value.strip().lower() not in {"0", "normal", "good", "ok", "false"}
+        return bool(value)
+    path = record.get("path")
+    if path:
+        parent = Path(path).parent
+        folder = parent.name.lower()
+        if folder in NORMAL_DIR_NAMES:
+            return False
+        # MVTec-style test/<defect type>/ folders are anomalous; anything else is unknown
+        if folder in ANOMALOUS_DIR_NAMES or parent.parent.name.lower() == "test":
+            return True
+    return None
+
+
+def load_batch_results(path: Path):
+    """Load scores and ground-truth labels from a batch_inference.py JSONL/CSV file.
+
+    Ground truth comes from a `gt` column if present, otherwise from the image's
+    parent folder (`good/` vs. `ng/` or MVTec-style `test/<defect>/` folders). Rows
+    without a score (e.g. decode errors) or a known label are skipped. Returns (paths, scores, labels).
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    paths, scores, labels = [], [], []
+    for record in records:
+        score = record.get("score")
+        ground_truth = _parse_ground_truth(record)
+        if score in (None, "") or ground_truth is None:
+            continue
+        paths.append(record.get("path"))
+        scores.append(float(score))
+        labels.append(ground_truth)
+    return paths, np.asarray(scores, dtype=np.float64), np.asarray(labels, dtype=bool)
+
+
+class ThresholdSweep:
+    """Vectorized re-classification of a whole scored dataset against a threshold.
+
+    Scores are sorted once; confusion counts for any threshold then come from a
+    single binary search into cumulative label counts, so moving the threshold
+    costs O(log n) and never touches the model.
+    """
+
+    def __init__(self, scores, labels):
+        scores = np.asarray(scores, dtype=np.float64)
+        labels = np.asarray(labels, dtype=bool)
+        if scores.shape != labels.shape:
+            raise ValueError("scores and labels must have the same length")
+
+        order = np.argsort(scores, kind="stable")
+        self.scores = scores
+        self.labels = labels
+        self.sorted_scores = scores[order]
+        # positives_below[i] = anomalous samples among the i lowest scores
+        self.positives_below = np.concatenate(([0], np.cumsum(labels[order])))
+        self.positives = int(labels.sum())
+        self.negatives = int(labels.size - self.positives)
+
+    def __len__(self):
+        return self.scores.size
+
+    def classify(self, threshold: float) -> np.ndarray:
+        """Predicted labels (True = anomaly) for every sample."""
+        return self.scores >= threshold
+
+    def confusion(self, threshold):
+        """(tp, fp, tn, fn) for a scalar threshold or an array of thresholds."""
+        below = np.searchsorted(self.sorted_scores, threshold, side="left")
+        fn = self.positives_below[below]
+        tn = below - fn
+        tp = self.positives - fn
+        fp = self.negatives - tn
+        return tp, fp, tn, fn
+
+    def metrics(self, threshold: float) -> dict:
+        tp, fp, tn, fn = (int(v) for v in self.confusion(threshold))
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "threshold": float(threshold),
+            "tp": tp, "fp": fp, "tn": tn, "fn": fn,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "fpr": fp / self.negatives if self.negatives else 0.0,
+            "accuracy": (tp + tn) / len(self) if len(self) else 0.0,
+        }
+
+    def candidate_thresholds(self) -> np.ndarray:
+        """Every distinct operating point: each unique score, plus one above the max."""
+        unique = np.unique(self.sorted_scores)
+        return np.append(unique, np.nextafter(unique[-1], np.inf) if unique.size else 1.0)
+
+    def roc(self):
+        """ROC curve over all candidate thresholds: (fpr, tpr, thresholds, auc)."""
+        thresholds = self.candidate_thresholds()[::-1]
+        tp, fp, _, _ = self.confusion(thresholds)
+        tpr = tp / self.positives if self.positives else np.zeros_like(tp, dtype=float)
+        fpr = fp / self.negatives if self.negatives else np.zeros_like(fp, dtype=float)
+        # Trapezoidal area under the curve (fpr is non-decreasing here)
+        auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)) if tpr.size > 1 else 0.0
+        return fpr, tpr, thresholds, auc
+
+    def best_f1_threshold(self):
+        """Threshold maximizing F1, evaluated for all candidates at once."""
+        thresholds = self.candidate_thresholds()
+        tp, fp, _, fn = (v.astype(np.float64) for v in self.confusion(thresholds))
+        denominator = 2 * tp + fp + fn
+        f1 = np.divide(2 * tp, denominator, out=np.zeros_like(tp), where=denominator > 0)
+        best = int(np.argmax(f1))
+        return float(thresholds[best]), float(f1[best])
+
+    def best_youden_threshold(self):
+        """Threshold maximizing TPR - FPR (Youden's J)."""
+        fpr, tpr, thresholds, _ = self.roc()
+        best = int(np.argmax(tpr - fpr))
+        return float(thresholds[best]), float(tpr[best] - fpr[best])
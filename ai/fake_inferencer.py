@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+
+from ai.inference import Prediction
+
+
+class FakeInferencer:
+    """Deterministic stand-in for an anomalib inferencer, for benchmarks and load tests.
+
+    Accepts the same inputs as `OpenVINOInferencer.predict` ((H, W, 3) or (N, H, W, 3)
+    float arrays, as produced by `to_model_input`) and returns a batch with
+    synthetic `anomaly_map`, `pred_mask` and `pred_score`. The output depends only
+    on the image content and `seed`, so runs are repeatable on any CPU box
+    without model weights.
+    """
+
+    def __init__(self, map_size: tuple[int, int] = (256, 256), seed: int = 0, latency: float = 0.0):
+        self.map_size = map_size
+        self.seed = seed
+        # Optional sleep per call to emulate the cost of a real model
+        self.latency = latency
+        height, width = map_size
+        self._ys = np.arange(height, dtype=np.float32)[:, None]
+        self._xs = np.arange(width, dtype=np.float32)[None, :]
+
+    def predict(self, image):
+        batch = np.asarray(image)
+        if batch.ndim == 3:
+            batch = batch[None]
+        if self.latency:
+            time.sleep(self.latency)
+
+        maps = np.stack([self._anomaly_map(img) for img in batch])
+        return Prediction(
+            anomaly_map=maps,
+            pred_mask=maps >= 0.5,
+            pred_score=maps.reshape(len(maps), -1).max(axis=1),
+        )
+
+    def _anomaly_map(self, image) -> np.ndarray:
+        # Derive a per-image random state from a cheap strided sample of the pixels
+        sample = np.asarray(image[::97, ::89], dtype=np.float64)
+        rng = np.random.default_rng([self.seed, int(sample.sum() * 1000) % (2 ** 32)])
+
+        height, width = self.map_size
+        cy, cx = rng.uniform(0.2, 0.8) * height, rng.uniform(0.2, 0.8) * width
+        sigma = rng.uniform(0.05, 0.15) * min(height, width)
+        peak = rng.uniform(0.2, 1.0)
+        blob = np.exp(-((self._ys - cy) ** 2) / (2 * sigma ** 2)) * np.exp(-((self._xs - cx) ** 2) / (2 * sigma ** 2))
+        return (peak * blob).astype(np.float32)
@@ -0,0 +1,280 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from ai.inference import Prediction, extract_score
+
+MAP_FORMATS = ("uint8", "float16")
+DEFAULT_HISTORY_SIZE = int(os.environ.get("INFERENCE_GUI_HISTORY_SIZE", 5000))
+DEFAULT_HISTORY_BUDGET = int(os.environ.get("INFERENCE_GUI_HISTORY_BUDGET_MB", 64)) * 1024 * 1024
+DEFAULT_MAP_FORMAT = os.environ.get("INFERENCE_GUI_HISTORY_MAP", "uint8")
+# Longest side a stored uint8 anomaly map is downsampled to
+DEFAULT_MAP_SIDE = 256
+
+
+def _to_numpy(value):
+    if value is None:
+        return None
+    if hasattr(value, "cpu"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+def _squeeze_2d(array: np.ndarray) -> np.ndarray:
+    # (1, H, W) batch layout -> (H, W)
+    while array.ndim > 2 and array.shape[0] == 1:
+        array = array[0]
+    return array
+
+
+def encode_mask(mask: np.ndarray) -> tuple[str, np.ndarray, tuple]:
+    """Bit-pack or run-length encode a boolean mask, whichever is smaller.
+
+    Runs alternate False/True starting with False, so an all-False mask is a
+    single run. Defect masks are mostly empty and usually come out as a few runs.
+    """
+    mask = _squeeze_2d(np.asarray(mask)).astype(bool)
+    flat = mask.ravel()
+    if flat.size == 0:
+        return "rle", np.zeros(0, np.uint32), mask.shape
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], changes, [flat.size]))).astype(np.uint32)
+    if flat[0]:
+        runs = np.concatenate((np.zeros(1, np.uint32), runs))
+    packed_size = (flat.size + 7) // 8
+    if runs.nbytes < packed_size:
+        return "rle", runs, mask.shape
+    return "bits", np.packbits(flat), mask.shape
+
+
+def decode_mask(encoding: str, data: np.ndarray, shape: tuple) -> np.ndarray:
+    size = int(np.prod(shape))
+    if encoding == "rle":
+        values = np.arange(len(data)) % 2 == 1
+        return np.repeat(values, data.astype(np.int64)).reshape(shape)
+    return np.unpackbits(data, count=size).astype(bool).reshape(shape)
+
+
+def encode_map(anomaly_map: np.ndarray, fmt: str = DEFAULT_MAP_FORMAT, max_side: int = DEFAULT_MAP_SIDE):
+    """Anomaly map as float16, or downsampled and quantized to uint8 with its value range."""
+    anomaly_map = _squeeze_2d(np.asarray(anomaly_map, dtype=np.float32))
+    if fmt == "float16":
+        return anomaly_map.astype(np.float16), None
+
+    import cv2
+
+    height, width = anomaly_map.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        anomaly_map = cv2.resize(anomaly_map, size, interpolation=cv2.INTER_AREA)
+    low, high = float(anomaly_map.min()), float(anomaly_map.max())
+    span = high - low if high > low else 1.0
+    quantized = np.round((anomaly_map - low) * (255.0 / span)).astype(np.uint8)
+    return quantized, (low, high)
+
+
+def decode_map(data: np.ndarray, value_range) -> np.ndarray:
+    if value_range is None:
+        return data.astype(np.float32)
+    low, high = value_range
+    span = high - low if high > low else 1.0
+    return data.astype(np.float32) * (span / 255.0) + low
+
+
+class ResultRecord:
+    """One inference result, small enough to keep thousands of.
+
+    The score and source image path are plain scalars. The anomaly map is float16 or
+    a downsampled uint8, and the mask is bit-packed or run-length encoded. The
+    arrays can be spilled to disk (see ResultHistory); `prediction()` reloads them.
+    """
+
+    __slots__ = ("id", "image_path", "content_hash", "model", "score", "inference_time", "created_at",
+                 "_arrays_in_memory", "_map_range", "_mask_encoding", "_mask_shape", "_spill_path")
+
+    def __init__(self, record_id: int, image_path: str, content_hash: str, model: str, predictions,
+                 inference_time: float, map_format: str = DEFAULT_MAP_FORMAT):
+        self.id = record_id
+        self.image_path = str(image_path)
+        self.content_hash = content_hash
+        self.model = model
+        self.score = extract_score(predictions)
+        self.inference_time = inference_time
+        self.created_at = time.time()
+        self._spill_path = None
+
+        anomaly_map = _to_numpy(predictions.anomaly_map)
+        stored_map, self._map_range = (None, None) if anomaly_map is None else encode_map(anomaly_map, map_format)
+        pred_mask = _to_numpy(predictions.pred_mask)
+        if pred_mask is None:
+            stored_mask, self._mask_encoding, self._mask_shape = None, None, None
+        else:
+            self._mask_encoding, stored_mask, self._mask_shape = encode_mask(pred_mask)
+        # (map, mask) while resident; None once spilled. Swapped as a whole so readers
+        # on other threads see either the arrays or the spill file
+        self._arrays_in_memory = (stored_map, stored_mask)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of array data held in memory (0 once spilled)."""
+        arrays = self._arrays_in_memory
+        return 0 if arrays is None else sum(a.nbytes for a in arrays if a is not None)
+
+    @property
+    def spilled(self) -> bool:
+        return self._arrays_in_memory is None
+
+    def spill(self, directory: Path):
+        """Move the arrays to an .npz file in `directory`, keeping only scalars in memory."""
+        arrays = self._arrays_in_memory
+        if arrays is None:
+            return
+        stored_map, stored_mask = arrays
+        path = Path(directory) / f"{self.id}.npz"
+        saved = {}
+        if stored_map is not None:
+            saved["map"] = stored_map
+        if stored_mask is not None:
+            saved["mask"] = stored_mask
+        np.savez(path, **saved)
+        self._spill_path = path
+        self._arrays_in_memory = None
+
+    def _arrays(self):
+        arrays = self._arrays_in_memory
+        if arrays is not None:
+            return arrays
+        with np.load(self._spill_path) as data:
+            return (data["map"] if "map" in data else None), (data["mask"] if "mask" in data else None)
+
+    def prediction(self) -> Prediction:
+        """The stored result as a Prediction (float32 map, bool mask) for rendering."""
+        stored_map, stored_mask = self._arrays()
+        return Prediction(
+            anomaly_map=None if stored_map is None else decode_map(stored_map, self._map_range),
+            pred_mask=None if stored_mask is None else decode_mask(self._mask_encoding, stored_mask, self._mask_shape),
+            pred_score=self.score,
+        )
+
+    def discard(self):
+        if self._spill_path is not None:
+            try:
+                self._spill_path.unlink()
+            except OSError:
+                pass
+
+
+class ResultHistory:
+    """The last `capacity` results, with at most `memory_budget` bytes of arrays in RAM.
+
+    When the budget is exceeded, the oldest records still in memory spill their arrays
+    to a private temp directory. Only their scalars (a few hundred bytes each)
+    stay resident. Records beyond `capacity` are dropped altogether. Thread-safe:
+    the worker appends while the GUI reads.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE, memory_budget: int = DEFAULT_HISTORY_BUDGET,
+                 map_format: str = DEFAULT_MAP_FORMAT, spill_dir: Path | None = None):
+        if map_format not in MAP_FORMATS:
+            raise ValueError(f"Unknown map format {map_format!r}; expected one of {MAP_FORMATS}")
+        self.capacity = capacity
+        self.memory_budget = memory_budget
+        self.map_format = map_format
+        self.memory_used = 0
+        self._spill_dir = Path(spill_dir) if spill_dir else None
+        self._own_spill_dir = spill_dir is None
+        self._records = OrderedDict()
+        # Ids of records whose arrays are still in memory, oldest first
+        self._resident = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+    def add(self, image_path, content_hash: str, model: str, predictions, inference_time: float) -> ResultRecord:
+        # Compaction happens outside the lock; it's the expensive part
+        with self._lock:
+            record_id = self._next_id
+            self._next_id += 1
+        record = ResultRecord(record_id, image_path, content_hash, model, predictions, inference_time,
+                              self.map_format)
+        with self._lock:
+            self._records[record_id] = record
+            self._resident[record_id] = record.nbytes
+            self.memory_used += record.nbytes
+            while len(self._records) > self.capacity:
+                _, oldest = self._records.popitem(last=False)
+                self.memory_used -= self._resident.pop(oldest.id, 0)
+                oldest.discard()
+            self._enforce_budget()
+        return record
+
+    def records(self) -> list[ResultRecord]:
+        """All records, oldest first."""
+        with self._lock:
+            return list(self._records.values())
+
+    def get(self, record_id: int) -> ResultRecord | None:
+        with self._lock:
+            return self._records.get(record_id)
+
+    def at(self, index: int) -> ResultRecord | None:
+        """Record by position (0 = oldest); negative indices count from the newest."""
+        with self._lock:
+            if not -len(self._records) <= index < len(self._records):
+                return None
+            # OrderedDict has no positional access; ids are consecutive, so compute the key
+            first = next(iter(self._records))
+            return self._records.get(first + index % len(self._records))
+
+    def relocate(self, old_path, new_path):
+        """Point records at an image that has been moved (e.g. filed by the hot folder)."""
+        old_path, new_path = str(old_path), str(new_path)
+        with self._lock:
+            for record in reversed(self._records.values()):
+                if record.image_path == old_path:
+                    record.image_path = new_path
+
+    def close(self):
+        with self._lock:
+            self._records.clear()
+            self._resident.clear()
+            self.memory_used = 0
+            if self._own_spill_dir and self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def _enforce_budget(self):
+        # Caller holds the lock; the newest record always stays resident
+        while self.memory_used > self.memory_budget and len(self._resident) > 1:
+            record_id, size = self._resident.popitem(last=False)
+            record = self._records.get(record_id)
+            if record is not None:
+                record.spill(self._ensure_spill_dir())
+            self.memory_used -= size
+
+    def _ensure_spill_dir(self) -> Path:
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="inference_gui_history_"))
+        self._spill_dir.mkdir(parents=True, exist_ok=True)
+        return self._spill_dir
+
+
+def make_thumbnail(image_path, size: int = 96):
+    """A small RGB PIL thumbnail of an image file, decoded at reduced resolution where possible."""
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+        return image
@@ -0,0 +1,227 @@
+import io
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+from ai.cache import hash_bytes
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+
+class AllocationMeter:
+    """Running total of bytes allocated for image buffers on the display path."""
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int):
+        with self._lock:
+            self.total += nbytes
+
+
+ALLOCATIONS = AllocationMeter()
+
+
+def allocate(shape, dtype=np.uint8) -> np.ndarray:
+    """np.empty that is counted by ALLOCATIONS."""
+    array = np.empty(shape, dtype=dtype)
+    ALLOCATIONS.add(array.nbytes)
+    return array
+
+
+class FrameBuffer:
+    """An RGB888 QImage view over a numpy (H, W, 3) uint8 buffer, without copying.
+
+    The QImage points straight into the array's memory, so the FrameBuffer must
+    stay alive until the image has been consumed (e.g. by QPixmap.fromImage).
+    Pass FrameBuffers, not their QImages, across threads and signals; that keeps
+    the backing memory referenced for exactly as long as it's needed.
+    """
+
+    def __init__(self, array: np.ndarray, allocated_bytes: int = 0):
+        if array.ndim != 3 or array.shape[2] != 3 or array.dtype != np.uint8:
+            raise ValueError(f"Expected an (H, W, 3) uint8 array, got {array.shape} {array.dtype}")
+        if not array.flags.c_contiguous:
+            array = np.ascontiguousarray(array)
+            ALLOCATIONS.add(array.nbytes)
+        self.array = array
+        # Bytes allocated to produce this frame, for the diagnostics readout
+        self.allocated_bytes = allocated_bytes
+        height, width = array.shape[:2]
+        self.qimage = QImage(array.data, width, height, array.strides[0], QImage.Format_RGB888)
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+
+class BufferPool:
+    """Recycle same-sized image buffers once the FrameBuffer using them is released.
+
+    Buffers go back to the pool when their FrameBuffer is garbage collected, so in
+    steady state (e.g. dragging a slider) rendering allocates nothing.
+    """
+
+    def __init__(self, max_buffers: int = 4):
+        self.max_buffers = max_buffers
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape) -> np.ndarray:
+        shape = tuple(shape)
+        with self._lock:
+            for i, array in enumerate(self._free):
+                if array.shape == shape:
+                    return self._free.pop(i)
+        return allocate(shape)
+
+    def wrap(self, array: np.ndarray, allocated_bytes: int = 0) -> FrameBuffer:
+        """Wrap a buffer from `acquire` so it returns to the pool with its FrameBuffer."""
+        frame = FrameBuffer(array, allocated_bytes)
+        weakref.finalize(frame, self._release, array)
+        return frame
+
+    def _release(self, array):
+        with self._lock:
+            if len(self._free) < self.max_buffers:
+                self._free.append(array)
+
+
+class DecodedImage:
+    """A decoded RGB image plus the content hash of its encoded bytes."""
+
+    def __init__(self, array: np.ndarray, content_hash: str):
+        self.array = array
+        self.content_hash = content_hash
+
+
+def decode_rgb(data: bytes) -> np.ndarray:
+    """Decode encoded image bytes into a single (H, W, 3) uint8 RGB buffer."""
+    import cv2
+
+    # Match PIL's Image.open().convert("RGB"): no EXIF rotation, alpha dropped
+    array = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if array is None:
+        raise ValueError("Could not decode image data.")
+    # BGR -> RGB in place, so decoding costs exactly one image-sized allocation
+    cv2.cvtColor(array, cv2.COLOR_BGR2RGB, dst=array)
+    ALLOCATIONS.add(array.nbytes)
+    return array
+
+
+def fit_to_model(array: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """Resize an RGB array to the model's (height, width) in one pass."""
+    import cv2
+
+    height, width = size
+    if array.shape[:2] == (height, width):
+        return array
+    # INTER_AREA averages the source pixels instead of skipping them when shrinking
+    resized = cv2.resize(array, (width, height), interpolation=cv2.INTER_AREA)
+    ALLOCATIONS.add(resized.nbytes)
+    return resized
+
+
+def decode_reduced(data: bytes, size: tuple[int, int]) -> np.ndarray:
+    """Decode encoded image bytes straight to the model's (height, width).
+
+    JPEGs are decoded at the smallest DCT scale (1/2, 1/4 or 1/8) that is still at
+    least `size`, so a 24 MP frame never exists at full resolution; other formats
+    are decoded in full. Either way the result is resized once to `size`.
+    """
+    from PIL import Image
+
+    height, width = size
+    image = Image.open(io.BytesIO(data))
+    # Only JPEG supports draft mode; for other formats this is a no-op
+    image.draft("RGB", (width, height))
+    return fit_to_model(np.asarray(image.convert("RGB")), size)
+
+
+class EncodedImage:
+    """An image file that is decoded at model resolution, and in full only when asked.
+
+    `model_input()` is what the model sees; `full` (decoded on first access) is
+    only needed to draw visuals over the original pixels. Without a `model_size`
+    the model gets the full-resolution image, e.g. for tiled inference.
+    """
+
+    def __init__(self, data: bytes, model_size: tuple[int, int] | None = None):
+        self.data = data
+        self.model_size = model_size
+        self._content_hash = None
+        self._full = None
+        self._lock = threading.Lock()
+
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = hash_bytes(self.data)
+        return self._content_hash
+
+    @property
+    def full(self) -> np.ndarray:
+        with self._lock:
+            if self._full is None:
+                self._full = decode_rgb(self.data)
+            return self._full
+
+    def model_input(self) -> np.ndarray:
+        if self.model_size is None:
+            return self.full
+        # Always the draft-mode decode, even if the full image is decoded already: the
+        # prediction cache files these results under one variant, so the pixels must match
+        return decode_reduced(self.data, self.model_size)
+
+
+class DecodedImageCache:
+    """Share one decode per image file between the GUI thread and the worker.
+
+    Keyed by path, size and mtime, so an overwritten file is decoded again.
+    """
+
+    def __init__(self, max_entries: int = 2):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path) -> DecodedImage:
+        path = Path(path)
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        data = path.read_bytes()
+        entry = DecodedImage(decode_rgb(data), hash_bytes(data))
+        # Decoded pixels are shared between threads; make accidental writes fail loudly
+        entry.array.flags.writeable = False
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+DECODED_IMAGES = DecodedImageCache()
+
+
+def pil_to_frame(pil_image) -> FrameBuffer:
+    """Convert a PIL image to a FrameBuffer with a single copy."""
+    if pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+    array = np.asarray(pil_image)
+    ALLOCATIONS.add(array.nbytes)
+    return FrameBuffer(array)
@@ -1,88 +1,174 @@
+from __future__ import annotations
+
+import sys
 import time
-from importlib import import_module
+import weakref
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-import cv2
 import numpy as np
-from anomalib.deploy import OpenVINOInferencer, TorchInferencer
-from anomalib.visualization.image.functional import (
-    overlay_image,
-    visualize_anomaly_map,
-)
 from PIL import Image
 
+from ai.metrics import METRICS, span
 
-def get_inferencer(weight_path: Path) -> OpenVINOInferencer | TorchInferencer:
-    """Parse args and open inferencer."""
-    extension = weight_path.suffix
-    inferencer: OpenVINOInferencer | TorchInferencer
-    module = import_module("anomalib.deploy")
-    
-    if extension in {".pt", ".pth", ".ckpt"}:
-        torch_inferencer = module.TorchInferencer
-        # Using device='auto' as in inference.py, or standard initialization
-        inferencer = torch_inferencer(path=weight_path)
+# anomalib, torch, openvino and cv2 are imported lazily (see ai/preload.py) so the
+# GUI can show its window before these heavy modules finish loading.
+if TYPE_CHECKING:
+    from anomalib.deploy import OpenVINOInferencer, TorchInferencer
+
+# Torch inferencers whose model rejected a multi-image batch (e.g. a traced batch size)
+_SINGLE_BATCH_ONLY = weakref.WeakSet()
+
+
+class Prediction(NamedTuple):
+    """Predictions for a single image, as split out of a batched predict call."""
+    anomaly_map: Any
+    pred_mask: Any
+    pred_score: Any
+
+
+def get_inferencer(weight_path: Path, openvino_profile=None, torch_profile=None,
+                   runtime: str | None = None) -> OpenVINOInferencer | TorchInferencer:
+    """Parse args and open inferencer.
+
+    `runtime` picks the inference runtime (see ai/runtimes.py; default: by file extension,
+    or INFERENCE_GUI_RUNTIME). OpenVINO models are compiled with `openvino_profile`
+    (an ai.openvino_async.OpenVINOProfile, default: from the INFERENCE_GUI_OV_* environment
+    variables). Torch models run with `torch_profile` (an ai.torch_profile.TorchProfile,
+    default: the auto-tuned profile saved for this model, else the INFERENCE_GUI_TORCH_*
+    environment variables).
+    """
+    from ai.runtimes import load_model
+
+    return load_model(Path(weight_path), runtime, openvino_profile, torch_profile)[1]
+
+def is_torch_inferencer(inferencer) -> bool:
+    # A TorchInferencer can only exist once anomalib.deploy is imported, so never import it here
+    deploy = sys.modules.get("anomalib.deploy")
+    if deploy is not None and isinstance(inferencer, deploy.TorchInferencer):
+        return True
+    tuned = sys.modules.get("ai.torch_profile")
+    return tuned is not None and isinstance(inferencer, tuned.TunedTorchInferencer)
 
-    elif extension in {".onnx", ".bin", ".xml"}:
-        openvino_inferencer = module.OpenVINOInferencer
-        inferencer = openvino_inferencer(path=weight_path)
+def model_files(weight_path: Path) -> list[Path]:
+    """Files that make up a model on disk (an OpenVINO .xml comes with a .bin)."""
+    weight_path = Path(weight_path)
+    files = [weight_path]
+    if weight_path.suffix == ".xml" and weight_path.with_suffix(".bin").exists():
+        files.append(weight_path.with_suffix(".bin"))
+    return files
 
-    else:
-        raise ValueError(f"Model extension {extension} is not supported.")
+def to_model_input(image, inferencer: OpenVINOInferencer | TorchInferencer):
+    """Convert a PIL image or HWC uint8 array to the input type `inferencer.predict` expects."""
+    array = np.asarray(image, dtype=np.float32) / 255.0
+    if is_torch_inferencer(inferencer):
+        import torch
+        return torch.from_numpy(array).permute(2, 0, 1)
+    return array
 
-    return inferencer
+def stack_model_inputs(images, inferencer: OpenVINOInferencer | TorchInferencer):
+    """Stack equally sized images into one (N, ...) model input."""
+    inputs = [to_model_input(image, inferencer) for image in images]
+    if is_torch_inferencer(inferencer):
+        import torch
+        return torch.stack(inputs)
+    return np.stack(inputs)
+
+def split_predictions(predictions, count: int) -> list[Prediction]:
+    """Split a batched predictions object into one Prediction per image."""
+    def _item(value, index):
+        if value is None or getattr(value, "ndim", 1) == 0:
+            return value
+        return value[index]
+
+    return [
+        Prediction(
+            anomaly_map=_item(predictions.anomaly_map, i),
+            pred_mask=_item(predictions.pred_mask, i),
+            pred_score=_item(predictions.pred_score, i),
+        )
+        for i in range(count)
+    ]
+
+def static_batch_size(inferencer) -> int | None:
+    """Batch size an exported model's input is fixed to; None if dynamic or unknown."""
+    # OpenVINOInferencer: (N, C, H, W) input of the compiled model
+    input_blob = getattr(inferencer, "input_blob", None)
+    if input_blob is not None:
+        try:
+            batch = input_blob.get_partial_shape()[0]
+            return batch.get_length() if batch.is_static else None
+        except (AttributeError, IndexError, RuntimeError, TypeError):
+            return None
+
+    # OnnxRuntimeInferencer: static dims are ints, dynamic ones names or None
+    input_shape = getattr(inferencer, "input_shape", None)
+    if input_shape and isinstance(input_shape[0], int):
+        return input_shape[0]
+    return None
 
 def run_inference_core(image: Image.Image, inferencer: OpenVINOInferencer | TorchInferencer):
     """Run pure inference without visualization."""
-    start_time = time.time()
-    predictions = inferencer.predict(image=image)
-    inference_time = time.time() - start_time
+    start_time = time.perf_counter()
+    predictions = inferencer.predict(image=to_model_input(image, inferencer))
+    inference_time = time.perf_counter() - start_time
+    METRICS.observe("run_inference_core", inference_time)
     return predictions, inference_time
 
-def generate_visuals(image: Image.Image, predictions, inference_time: float, thickness: int = 3):
-    """Generate visualizations from existing predictions."""
-    heat_map = image
-    if predictions.anomaly_map is not None:
-        anomaly_map = visualize_anomaly_map(predictions.anomaly_map)
-        heat_map = overlay_image(base=image, overlay=anomaly_map)
-
-    segmentation = image
-    if predictions.pred_mask is not None:
-        # Custom contour visualization for variable thickness
-        pred_mask = predictions.pred_mask
-        if hasattr(pred_mask, "cpu"):
-            pred_mask = pred_mask.cpu().numpy()
-        
-        # Ensure contiguous array
-        pred_mask = np.ascontiguousarray(pred_mask)
-        
-        # Scale to uint8 0-255
-        if pred_mask.dtype != np.uint8:
-             # Assuming mask is 0-1 or boolean, scale to 255
-            pred_mask = (pred_mask * 255).astype(np.uint8)
-
-        # Handle dimensions (H, W) or (1, H, W)
-        if pred_mask.ndim == 3:
-             pred_mask = pred_mask.squeeze()
-        
-        # Resize mask if it doesn't match image size (common in some configs)
-        if pred_mask.shape[:2] != (image.height, image.width)[::-1]:
-             pred_mask = cv2.resize(pred_mask, (image.width, image.height), interpolation=cv2.INTER_NEAREST)
-
-        # Create overlay
-        image_np = np.array(image)
-        # Find contours
-        contours, _ = cv2.findContours(pred_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Draw ontours: Red color (255, 0, 0)
-        # Verify image is RGB
-        if image_np.ndim == 2: # Grayscale
-             image_np = cv2.cvtColor(image_np, cv2.COLOR_GRAY2RGB)
-             
-        cv2.drawContours(image_np, contours, -1, (255, 0, 0), int(thickness))
-        
-        segmentation = Image.fromarray(image_np)
+def predict_batch(images, inferencer: OpenVINOInferencer | TorchInferencer):
+    """Run batched inference on a list of images.
+
+    Images of the same size are stacked into a single predict call and the results
+    are split back out per image. Returns the per-image predictions (in input order)
+    and the total inference time.
+    """
+    start_time = time.perf_counter()
+    if hasattr(inferencer, "predict_many"):
+        # Async infer-request pool: every image in flight at once, results in input order
+        predictions = inferencer.predict_many([to_model_input(image, inferencer) for image in images])
+        results = [split_predictions(prediction, 1)[0] for prediction in predictions]
+        elapsed = time.perf_counter() - start_time
+        METRICS.observe("predict_batch", elapsed)
+        return results, elapsed
+
+    groups: dict[tuple, list[int]] = {}
+    for index, image in enumerate(images):
+        size = image.size if isinstance(image, Image.Image) else np.shape(image)[1::-1]
+        groups.setdefault(tuple(size), []).append(index)
+
+    results: list[Prediction | None] = [None] * len(images)
+    for indices in groups.values():
+        group = [images[i] for i in indices]
+        per_image = None
+        # Exports with a fixed batch size only take exactly that many images per call
+        static_batch = static_batch_size(inferencer)
+        if len(group) > 1 and static_batch in (None, len(group)) and inferencer not in _SINGLE_BATCH_ONLY:
+            try:
+                predictions = inferencer.predict(image=stack_model_inputs(group, inferencer))
+                per_image = split_predictions(predictions, len(group))
+            except (RuntimeError, ValueError):
+                # A Torch model declares no input shape, so only its error says it can't
+                # batch; fall back to one call per image from then on. Other runtimes'
+                # batch sizes were checked above, so their errors are real
+                if not is_torch_inferencer(inferencer):
+                    raise
+                _SINGLE_BATCH_ONLY.add(inferencer)
+
+        if per_image is None:
+            per_image = [
+                split_predictions(inferencer.predict(image=to_model_input(image, inferencer)), 1)[0]
+                for image in group
+            ]
 
+        for i, prediction in zip(indices, per_image):
+            results[i] = prediction
+
+    elapsed = time.perf_counter() - start_time
+    METRICS.observe("predict_batch", elapsed)
+    return results, elapsed
+
+def extract_score(predictions) -> float:
+    """Return the image-level anomaly score as a plain float."""
     pred_score = 0.0
     if predictions.pred_score is not None:
         score = predictions.pred_score
@@ -90,8 +176,82 @@ def generate_visuals(image: Image.Image, predictions, inference_time: float, thi
             pred_score = score.item()
         else:
             pred_score = float(score)
+    return pred_score
+
+def score_to_label(pred_score: float, threshold: float = 0.5) -> str:
+    """Map an anomaly score to the "Normal"/"Anomaly" label."""
+    return "Normal" if pred_score < threshold else "Anomaly"
+
+def render_heat_map(image: Image.Image, anomaly_map) -> Image.Image:
+    """Overlay the colorized anomaly map on the image."""
+    from anomalib.visualization.image.functional import overlay_image, visualize_anomaly_map
+
+    # Cached maps are stored as (memory-mapped) float16
+    if isinstance(anomaly_map, np.ndarray) and anomaly_map.dtype == np.float16:
+        anomaly_map = anomaly_map.astype(np.float32)
+    anomaly_map = visualize_anomaly_map(anomaly_map)
+    return overlay_image(base=image, overlay=anomaly_map)
+
+def prepare_mask(pred_mask, width: int, height: int) -> np.ndarray:
+    """Convert a predicted mask to a contiguous uint8 (H, W) array at the image size."""
+    import cv2
+
+    if hasattr(pred_mask, "cpu"):
+        pred_mask = pred_mask.cpu().numpy()
+    
+    # Ensure contiguous array
+    pred_mask = np.ascontiguousarray(pred_mask)
+    
+    # Scale to uint8 0-255
+    if pred_mask.dtype != np.uint8:
+         # Assuming mask is 0-1 or boolean, scale to 255
+        pred_mask = (pred_mask * 255).astype(np.uint8)
+
+    # Handle dimensions (H, W) or (1, H, W)
+    if pred_mask.ndim == 3:
+         pred_mask = pred_mask.squeeze()
+    
+    # Resize mask if it doesn't match image size (common in some configs)
+    if pred_mask.shape[:2] != (height, width):
+         pred_mask = cv2.resize(pred_mask, (width, height), interpolation=cv2.INTER_NEAREST)
+    return pred_mask
+
+def find_mask_contours(mask: np.ndarray):
+    """Outer contours of a uint8 mask."""
+    import cv2
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+def draw_contours(image_np: np.ndarray, contours, thickness: int) -> np.ndarray:
+    """Draw contours in red onto an RGB array (in place when it is already RGB)."""
+    import cv2
+
+    # Verify image is RGB
+    if image_np.ndim == 2: # Grayscale
+         image_np = cv2.cvtColor(image_np, cv2.COLOR_GRAY2RGB)
+
+    # Draw contours: Red color (255, 0, 0)
+    cv2.drawContours(image_np, contours, -1, (255, 0, 0), int(thickness))
+    return image_np
+
+def generate_visuals(image: Image.Image, predictions, inference_time: float, thickness: int = 3):
+    """Generate visualizations from existing predictions."""
+    with span("generate_visuals"):
+        heat_map = image
+        if predictions.anomaly_map is not None:
+            heat_map = render_heat_map(image, predictions.anomaly_map)
+
+        segmentation = image
+        if predictions.pred_mask is not None:
+            # Custom contour visualization for variable thickness
+            pred_mask = prepare_mask(predictions.pred_mask, image.width, image.height)
+            contours = find_mask_contours(pred_mask)
+            image_np = draw_contours(np.array(image), contours, thickness)
+            segmentation = Image.fromarray(image_np)
 
-    pred_label = "Normal" if pred_score < 0.5 else "Anomaly"
+    pred_score = extract_score(predictions)
+    pred_label = score_to_label(pred_score)
 
     return heat_map, segmentation, inference_time, pred_score, pred_label
 
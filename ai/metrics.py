@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Prometheus histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageHistogram:
+    """Latency samples for one stage: a rolling window plus cumulative bucket counts."""
+
+    def __init__(self, window: int = 1024):
+        self.samples = deque(maxlen=window)
+        self.timestamps = deque(maxlen=window)
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.timestamps.append(time.monotonic())
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def summary(self) -> dict:
+        samples = np.fromiter(self.samples, dtype=np.float64)
+        summary = {"count": self.count, "total_s": self.total}
+        if samples.size:
+            for q in QUANTILES:
+                summary[f"p{int(q * 100)}_ms"] = float(np.quantile(samples, q) * 1000)
+            summary["mean_ms"] = float(samples.mean() * 1000)
+        # Throughput over the rolling window
+        if len(self.timestamps) > 1:
+            span = self.timestamps[-1] - self.timestamps[0]
+            summary["rate_per_s"] = (len(self.timestamps) - 1) / span if span > 0 else 0.0
+        return summary
+
+
+class MetricsRegistry:
+    """Thread-safe per-stage latency histograms for hot-path instrumentation."""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block with the monotonic high-resolution clock."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter_ns() - start) / 1e9)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in self._stages.items()}
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP inference_gui_stage_seconds Latency of each inference/display stage.",
+            "# TYPE inference_gui_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = {stage: (list(h.bucket_counts), h.count, h.total, h.summary())
+                      for stage, h in self._stages.items()}
+        for stage, (bucket_counts, count, total, _) in sorted(stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'inference_gui_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'inference_gui_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'inference_gui_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'inference_gui_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        lines.append("# HELP inference_gui_stage_rolling_seconds Rolling-window latency quantiles.")
+        lines.append("# TYPE inference_gui_stage_rolling_seconds gauge")
+        for stage, (_, _, _, summary) in sorted(stages.items()):
+            for q in QUANTILES:
+                key = f"p{int(q * 100)}_ms"
+                if key in summary:
+                    lines.append(
+                        f'inference_gui_stage_rolling_seconds{{stage="{stage}",quantile="{q}"}} '
+                        f"{summary[key] / 1000}")
+        return "\n".join(lines) + "\n"
+
+    def to_jsonl(self) -> str:
+        return json.dumps({"timestamp": time.time(), "stages": self.snapshot()}) + "\n"
+
+    def format_table(self) -> str:
+        """Fixed-width text table for the diagnostics panel."""
+        rows = [f"{'stage':<26}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}  ms"]
+        for stage, summary in sorted(self.snapshot().items()):
+            if "p50_ms" not in summary:
+                continue
+            rows.append(
+                f"{stage:<26}{summary['count']:>7}{summary['p50_ms']:>9.2f}"
+                f"{summary['p95_ms']:>9.2f}{summary['p99_ms']:>9.2f}")
+        return "\n".join(rows)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+def span(stage: str):
+    """Shorthand for METRICS.span(stage)."""
+    return METRICS.span(stage)
+
+
+class MetricsExporter:
+    """Periodically write METRICS to a file for line monitoring to scrape.
+
+    A `.prom` file is rewritten atomically in Prometheus text format (suitable for
+    node_exporter's textfile collector); any other extension gets one JSONL
+    snapshot appended per interval.
+    """
+
+    def __init__(self, path: Path, interval: float = 10.0, registry: MetricsRegistry = METRICS):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def write(self):
+        if self.path.suffix == ".prom":
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(self.registry.to_prometheus())
+            os.replace(tmp_path, self.path)
+        else:
+            with open(self.path, "a") as f:
+                f.write(self.registry.to_jsonl())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                # Monitoring must never take the application down
+                pass
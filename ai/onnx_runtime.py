@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from ai.inference import Prediction
+
+
+class OnnxRuntimeInferencer:
+    """Run an anomalib ONNX export on ONNX Runtime's CPU execution provider.
+
+    Takes the same (H, W, 3) / (N, H, W, 3) float arrays as `OpenVINOInferencer.predict`
+    (see `to_model_input`). Returns a Prediction built from the outputs named after
+    its fields, which is how anomalib names the outputs of exported models.
+    `threads` defaults to INFERENCE_GUI_ORT_THREADS, else ONNX Runtime's choice.
+    """
+
+    def __init__(self, path, threads: int | None = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads or int(os.environ.get("INFERENCE_GUI_ORT_THREADS", 0))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # (N, C, H, W); static dims are ints, dynamic ones names or None
+        self.input_shape = list(model_input.shape)
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+    def predict(self, image) -> Prediction:
+        batch = np.asarray(image, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[None]
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        outputs = dict(zip(self.output_names, self.session.run(None, {self.input_name: batch})))
+        return Prediction(
+            anomaly_map=outputs.get("anomaly_map"),
+            pred_mask=outputs.get("pred_mask"),
+            pred_score=outputs.get("pred_score"),
+        )
@@ -0,0 +1,136 @@
+import os
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from ai.inference import Prediction
+
+PERFORMANCE_HINTS = ("LATENCY", "THROUGHPUT")
+
+
+class OpenVINOProfile:
+    """How an OpenVINO model is compiled and dispatched.
+
+    `hint` is OpenVINO's PERFORMANCE_HINT: LATENCY minimizes the time of a single
+    request, THROUGHPUT splits the CPU into several streams so many requests run
+    at once. `streams`/`threads` override what the hint picks. `async_jobs`
+    infer requests are kept in flight (0 = as many as the compiled model
+    suggests); with 1 the model is called synchronously as before.
+    """
+
+    def __init__(self, hint: str | None = None, streams: int | None = None, threads: int | None = None,
+                 device: str = "AUTO", async_jobs: int | None = None):
+        if hint is not None and hint.upper() not in PERFORMANCE_HINTS:
+            raise ValueError(f"Unknown performance hint {hint!r}; expected one of {PERFORMANCE_HINTS}")
+        self.hint = hint.upper() if hint else None
+        self.streams = streams
+        self.threads = threads
+        self.device = device
+        # Throughput mode only pays off with several requests in flight
+        self.async_jobs = async_jobs if async_jobs is not None else (0 if self.hint == "THROUGHPUT" else 1)
+
+    @classmethod
+    def from_env(cls):
+        """Profile from INFERENCE_GUI_OV_{HINT,STREAMS,THREADS,DEVICE,JOBS}."""
+        def _int(name):
+            value = os.environ.get(name)
+            return int(value) if value else None
+
+        return cls(
+            hint=os.environ.get("INFERENCE_GUI_OV_HINT") or None,
+            streams=_int("INFERENCE_GUI_OV_STREAMS"),
+            threads=_int("INFERENCE_GUI_OV_THREADS"),
+            device=os.environ.get("INFERENCE_GUI_OV_DEVICE", "AUTO"),
+            async_jobs=_int("INFERENCE_GUI_OV_JOBS"),
+        )
+
+    def compile_config(self) -> dict:
+        config = {}
+        if self.hint:
+            config["PERFORMANCE_HINT"] = self.hint
+        if self.streams:
+            config["NUM_STREAMS"] = str(self.streams)
+        if self.threads:
+            config["INFERENCE_NUM_THREADS"] = str(self.threads)
+        return config
+
+
+def add_profile_arguments(parser):
+    """Command-line options for an OpenVINOProfile (see `profile_from_args`)."""
+    group = parser.add_argument_group("OpenVINO execution")
+    group.add_argument("--ov-hint", choices=PERFORMANCE_HINTS, type=str.upper, default=None,
+                       help="Compile with this performance hint. THROUGHPUT keeps several images in "
+                            "flight across all cores.")
+    group.add_argument("--ov-streams", type=int, default=None, help="Override the number of CPU streams.")
+    group.add_argument("--ov-threads", type=int, default=None, help="Override the number of inference threads.")
+    group.add_argument("--ov-device", default=None, help="OpenVINO device (default AUTO).")
+    group.add_argument("--ov-jobs", type=int, default=None,
+                       help="Infer requests kept in flight (0 = pick from the compiled model).")
+
+
+def profile_from_args(args) -> OpenVINOProfile:
+    """Profile from `add_profile_arguments` options, falling back to the environment."""
+    profile = OpenVINOProfile.from_env()
+    hint = args.ov_hint or profile.hint
+    return OpenVINOProfile(
+        hint=hint,
+        streams=args.ov_streams or profile.streams,
+        threads=args.ov_threads or profile.threads,
+        device=args.ov_device or profile.device,
+        async_jobs=args.ov_jobs if args.ov_jobs is not None else (None if args.ov_hint else profile.async_jobs),
+    )
+
+
+class AsyncOpenVINOInferencer:
+    """Dispatch an OpenVINOInferencer's compiled model through an AsyncInferQueue.
+
+    `predict_many` starts every image as its own infer request, so with a
+    THROUGHPUT profile several images are in flight across all CPU streams, and
+    returns the results in input order. `predict` keeps the synchronous
+    interface of the wrapped inferencer for callers that score one image at a time.
+    Pre- and post-processing are the wrapped inferencer's own.
+    """
+
+    def __init__(self, inferencer, jobs: int = 0):
+        from openvino import AsyncInferQueue
+
+        self.inferencer = inferencer
+        self.queue = AsyncInferQueue(inferencer.model, jobs)
+        self.queue.set_callback(self._on_done)
+        self.jobs = len(self.queue)
+        # start_async may be called from several threads (e.g. batcher and GUI)
+        self._lock = threading.Lock()
+
+    @property
+    def input_blob(self):
+        return self.inferencer.input_blob
+
+    def submit(self, image) -> Future:
+        """Start one inference; the future resolves to a Prediction."""
+        future = Future()
+        inputs = self.inferencer.pre_process(np.asarray(image))
+        with self._lock:
+            # Blocks while every infer request is busy, which bounds the work in flight
+            self.queue.start_async({0: inputs}, future)
+        return future
+
+    def predict_many(self, images) -> list[Prediction]:
+        futures = [self.submit(image) for image in images]
+        return [future.result() for future in futures]
+
+    def predict(self, image) -> Prediction:
+        return self.submit(image).result()
+
+    def _on_done(self, request, future):
+        try:
+            outputs = self.inferencer.post_process(request.results)
+            # The request's output tensors are reused by the next job; copy them out
+            outputs = {name: np.array(value, copy=True) for name, value in outputs.items()}
+            future.set_result(Prediction(
+                anomaly_map=outputs.get("anomaly_map"),
+                pred_mask=outputs.get("pred_mask"),
+                pred_score=outputs.get("pred_score"),
+            ))
+        except Exception as e:
+            future.set_exception(e)
@@ -0,0 +1,176 @@
+"""FP16 / INT8 OpenVINO variants of a model, and the measurements to choose between them."""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+VARIANTS = ("fp16", "int8")
+DEFAULT_INPUT_SIZE = (256, 256)
+
+
+def variant_path(model_path: Path, variant: str, output_dir: Path | None = None) -> Path:
+    """Where the `variant` IR of a model lives: `<stem>.<variant>.xml` next to it by default."""
+    model_path = Path(model_path)
+    return Path(output_dir or model_path.parent) / f"{model_path.stem}.{variant}.xml"
+
+
+def optimized_variants(model_path: Path) -> list[Path]:
+    """Existing optimized IRs for a model (or its siblings, if it is a variant itself)."""
+    model_path = Path(model_path)
+    stem = model_path.stem
+    for variant in VARIANTS:
+        if stem.endswith(f".{variant}"):
+            stem = stem[:-len(variant) - 1]
+    candidates = [model_path.with_name(f"{stem}{ext}") for ext in (".xml", ".onnx", ".pt", ".pth", ".ckpt")]
+    candidates += [model_path.with_name(f"{stem}.{variant}.xml") for variant in VARIANTS]
+    return [path for path in candidates if path.exists() and path != model_path]
+
+
+def read_openvino_model(model_path: Path, input_size: tuple[int, int] = DEFAULT_INPUT_SIZE):
+    """An `openvino.Model` for any model `get_inferencer` can load.
+
+    OpenVINO IR and ONNX files are read directly; Torch exports are converted from
+    the module inside anomalib's TorchInferencer.
+    """
+    import openvino as ov
+
+    model_path = Path(model_path)
+    if model_path.suffix in {".xml", ".onnx"}:
+        return ov.Core().read_model(model_path)
+    if model_path.suffix == ".bin":
+        return ov.Core().read_model(model_path.with_suffix(".xml"))
+
+    import torch
+    from ai.inference import get_inferencer
+
+    module = get_inferencer(model_path, runtime="torch").model
+    example = torch.zeros(1, 3, *input_size)
+    try:
+        return ov.convert_model(module, example_input=example)
+    except Exception as e:
+        raise RuntimeError(
+            f"Could not convert {model_path.name} to OpenVINO ({e}); "
+            "export the model with `anomalib export --export_type openvino` first") from e
+
+
+def model_input_size(ov_model, default: tuple[int, int] = DEFAULT_INPUT_SIZE) -> tuple[int, int]:
+    dims = list(ov_model.input(0).get_partial_shape())[-2:]
+    if len(dims) == 2 and all(d.is_static for d in dims):
+        return dims[0].get_length(), dims[1].get_length()
+    return default
+
+
+def calibration_input(image_path: Path, input_size: tuple[int, int]) -> np.ndarray:
+    """One image as the (1, 3, H, W) float32 tensor the exported graph takes."""
+    height, width = input_size
+    image = Image.open(image_path).convert("RGB").resize((width, height), Image.BILINEAR)
+    array = np.asarray(image, dtype=np.float32) / 255.0
+    return array.transpose(2, 0, 1)[None]
+
+
+def save_fp16(ov_model, output_path: Path) -> Path:
+    import openvino as ov
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ov.save_model(ov_model, output_path, compress_to_fp16=True)
+    return output_path
+
+
+def quantize_int8(ov_model, image_paths, output_path: Path, subset_size: int = 300) -> Path:
+    """Post-training INT8 quantization with NNCF, calibrated on `image_paths`."""
+    try:
+        import nncf
+    except ImportError as e:
+        raise RuntimeError("INT8 quantization needs NNCF: pip install nncf") from e
+    import openvino as ov
+
+    input_size = model_input_size(ov_model)
+    dataset = nncf.Dataset(list(image_paths), lambda path: calibration_input(path, input_size))
+    quantized = nncf.quantize(ov_model, dataset, subset_size=min(subset_size, len(image_paths)))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ov.save_model(quantized, output_path, compress_to_fp16=False)
+    return output_path
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_variant(model_path, image_paths, results, warmup: int = 2):
+    """Score `image_paths` with one model and put a summary on `results`.
+
+    Runs in a fresh process per variant so load time and peak memory are not
+    polluted by the other variants.
+    """
+    from ai.inference import get_inferencer, prepare_mask, run_inference_core
+
+    try:
+        start = time.perf_counter()
+        # Each variant on its format's default runtime, whatever INFERENCE_GUI_RUNTIME says
+        inferencer = get_inferencer(Path(model_path), runtime="")
+        load_time = time.perf_counter() - start
+
+        images = [np.asarray(Image.open(path).convert("RGB")) for path in image_paths]
+        for image in images[:warmup]:
+            run_inference_core(image, inferencer)
+
+        latencies, scores, masks = [], [], []
+        start = time.perf_counter()
+        for image in images:
+            predictions, inference_time = run_inference_core(image, inferencer)
+            latencies.append(inference_time)
+            score = predictions.pred_score
+            scores.append(float(np.asarray(score).reshape(-1)[0]) if score is not None else float("nan"))
+            if predictions.pred_mask is not None:
+                height, width = image.shape[:2]
+                masks.append(np.packbits(prepare_mask(predictions.pred_mask, width, height) > 0))
+            else:
+                masks.append(None)
+        elapsed = time.perf_counter() - start
+
+        results.put({
+            "model": str(model_path),
+            "load_time_s": load_time,
+            "latencies": latencies,
+            "throughput_per_s": len(images) / elapsed if elapsed > 0 else 0.0,
+            "peak_rss_mb": _peak_rss_mb(),
+            "scores": scores,
+            "masks": masks,
+        })
+    except Exception as e:
+        results.put({"model": str(model_path), "error": f"{type(e).__name__}: {str(e)}"})
+
+
+def agreement(reference: dict, candidate: dict, threshold: float = 0.5) -> dict:
+    """Score and mask agreement of a variant's predictions with the reference model's."""
+    ref_scores = np.asarray(reference["scores"])
+    scores = np.asarray(candidate["scores"])
+    diff = np.abs(scores - ref_scores)
+    summary = {
+        "score_mean_abs_diff": float(np.nanmean(diff)),
+        "score_max_abs_diff": float(np.nanmax(diff)),
+        "label_agreement": float(np.mean((scores >= threshold) == (ref_scores >= threshold))),
+    }
+    if ref_scores.size > 1 and np.std(ref_scores) > 0 and np.std(scores) > 0:
+        summary["score_correlation"] = float(np.corrcoef(ref_scores, scores)[0, 1])
+
+    ious = []
+    for ref_mask, mask in zip(reference["masks"], candidate["masks"]):
+        if ref_mask is None or mask is None:
+            continue
+        ref_bits, bits = np.unpackbits(ref_mask).astype(bool), np.unpackbits(mask).astype(bool)
+        union = np.count_nonzero(ref_bits | bits)
+        # Two empty masks agree perfectly
+        ious.append(np.count_nonzero(ref_bits & bits) / union if union else 1.0)
+    if ious:
+        summary["mask_mean_iou"] = float(np.mean(ious))
+        summary["mask_min_iou"] = float(np.min(ious))
+    return summary
@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+
+from ai.metrics import METRICS
+
+_END = object()
+
+
+class Stage:
+    """One step of a Pipeline: a function run by N threads between two bounded queues."""
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.busy_time = 0.0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed):
+        with self._lock:
+            self.busy_time += elapsed
+            self.items += 1
+
+
+class Pipeline:
+    """Run items through a chain of stages connected by bounded queues.
+
+    Every stage has its own threads, so a slow stage only blocks its upstream
+    neighbour once the queue between them is full. A stage function returns the
+    item to pass downstream, or None to drop it.
+    """
+
+    def __init__(self, queue_size=8):
+        self.queue_size = queue_size
+        self.stages = []
+        self.errors = []
+        self._errors_lock = threading.Lock()
+
+    def add_stage(self, name, func, workers=1):
+        # With no worker nothing ever drains the stage's queue and `run` never returns
+        if workers < 1:
+            raise ValueError(f"Stage {name!r} needs at least one worker, got {workers}")
+        self.stages.append(Stage(name, func, workers))
+        return self
+
+    def run(self, source):
+        """Feed every item from `source` through the stages; blocks until drained."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = []
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+            for worker_id in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._stage_loop,
+                    args=(stage, queues[index], queues[index + 1], remaining, remaining_lock),
+                    name=f"{stage.name}-{worker_id}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        # Drain the final queue in the background so the last stage never blocks
+        sink = threading.Thread(target=self._drain, args=(queues[-1],), daemon=True)
+        sink.start()
+
+        for item in source:
+            queues[0].put(item)
+        queues[0].put(_END)
+
+        for thread in threads:
+            thread.join()
+        sink.join()
+
+    def _stage_loop(self, stage, in_queue, out_queue, remaining, remaining_lock):
+        while True:
+            item = in_queue.get()
+            if item is _END:
+                # Let sibling workers of this stage see the end marker too
+                in_queue.put(_END)
+                break
+
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                with self._errors_lock:
+                    self.errors.append((stage.name, item, e))
+                result = None
+            elapsed = time.perf_counter() - start
+            stage.record(elapsed)
+            METRICS.observe(f"pipeline.{stage.name}", elapsed)
+
+            if result is not None:
+                out_queue.put(result)
+
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                out_queue.put(_END)
+
+    @staticmethod
+    def _drain(last_queue):
+        while last_queue.get() is not _END:
+            pass
+
+
+class LatestSlot:
+    """Single-item mailbox where a new item replaces an unread one (latest-frame-wins).
+
+    Used between stages that must never queue stale work: the producer never
+    blocks, and the consumer always gets the most recent item.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+        self._item = None
+        self._full = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item) -> bool:
+        """Store `item`; returns True if the slot was empty (i.e. the consumer needs a wake-up)."""
+        with self._cond:
+            was_empty = not self._full
+            if self._full:
+                self.dropped += 1
+            self._item = item
+            self._full = True
+            self._cond.notify()
+            return was_empty
+
+    def get(self, timeout=None):
+        """Block until an item is available; returns None on timeout or once closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._full or self._closed, timeout)
+            return self._take_locked()
+
+    def take(self):
+        """Non-blocking get; returns None when the slot is empty."""
+        with self._cond:
+            return self._take_locked()
+
+    def _take_locked(self):
+        if not self._full:
+            return None
+        item, self._item, self._full = self._item, None, False
+        return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
@@ -0,0 +1,43 @@
+import importlib
+import threading
+import time
+
+# Heavy modules the inference path needs, in the order they are first used
+HEAVY_MODULES = (
+    "cv2",
+    "anomalib.deploy",
+    "anomalib.visualization.image.functional",
+)
+
+
+class BackgroundImporter:
+    """Import heavy modules on a daemon thread while the window is coming up.
+
+    Python's import lock makes this safe: if the worker thread needs a module
+    that is still being imported here, it simply waits for it to finish.
+    """
+
+    def __init__(self, modules=HEAVY_MODULES):
+        self.modules = modules
+        self.timings = {}
+        self.errors = {}
+        self.finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="background-imports", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def _run(self):
+        for name in self.modules:
+            start_time = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # Surface the real error later, when the inference path imports it
+                self.errors[name] = e
+            self.timings[name] = time.perf_counter() - start_time
+        self.finished.set()
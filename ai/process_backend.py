@@ -0,0 +1,280 @@
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from ai.inference import Prediction, extract_score
+
+# Offsets inside a shared block are aligned so every array view is aligned too
+_ALIGNMENT = 64
+# Seconds between liveness checks of the inference processes
+_CHECK_INTERVAL = 0.5
+
+
+def _to_shared(arrays: dict) -> tuple[shared_memory.SharedMemory, dict]:
+    """Copy numpy arrays into one new shared-memory block.
+
+    Returns the block and its layout, {name: (offset, shape, dtype)}. The layout
+    is all that needs to cross the process boundary besides the block's name.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items() if a is not None}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = (offset, array.shape, array.dtype.str)
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, (offset, shape, dtype) in layout.items():
+        np.ndarray(shape, dtype, buffer=block.buf, offset=offset)[...] = arrays[name]
+    return block, layout
+
+
+def _read_shared(name: str, layout: dict) -> dict:
+    """Copy the arrays out of a shared block, then release and unlink the block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return {
+            field: np.ndarray(shape, dtype, buffer=block.buf, offset=offset).copy()
+            for field, (offset, shape, dtype) in layout.items()
+        }
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _as_array(value):
+    if value is None:
+        return None
+    if hasattr(value, "cpu"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+def _serve(requests, results, worker_index):
+    """Main loop of an inference process: load models and run predictions on request."""
+    from ai.inference import run_inference_core
+    from ai.registry import ModelRegistry
+    from ai.tiling import known_input_size, run_tiled_inference
+
+    registry = ModelRegistry()
+    loaded = None
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        kind, request_id, *payload = message
+        try:
+            if kind == "load":
+                loaded = registry.get(Path(payload[0]))
+                input_size = known_input_size(loaded.inferencer)
+                results.put(("loaded", request_id, loaded.model_hash, input_size))
+
+            elif kind == "infer":
+                if loaded is None:
+                    raise RuntimeError("Model not loaded.")
+                name, layout, tiled = payload
+                block = shared_memory.SharedMemory(name=name)
+                image = None
+                try:
+                    offset, shape, dtype = layout["image"]
+                    # Read the image in place; the model input is built from this view
+                    image = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+                    infer = run_tiled_inference if tiled else run_inference_core
+                    predictions, inference_time = infer(image, loaded.inferencer)
+                finally:
+                    # The view must be gone before the block can be closed
+                    image = None
+                    block.close()
+
+                # The map goes back in half precision, the format the prediction cache stores
+                anomaly_map = _as_array(predictions.anomaly_map)
+                pred_mask = _as_array(predictions.pred_mask)
+                output, output_layout = _to_shared({
+                    "anomaly_map": None if anomaly_map is None else anomaly_map.astype(np.float16),
+                    "pred_mask": None if pred_mask is None else pred_mask.astype(bool),
+                })
+                output.close()
+                score = extract_score(predictions) if predictions.pred_score is not None else None
+                results.put(("result", request_id, output.name, output_layout, score, inference_time))
+
+        except Exception as e:
+            results.put(("error", request_id, f"{type(e).__name__}: {str(e)}"))
+
+
+class _WorkerProcess:
+    def __init__(self, context, results, index):
+        self.index = index
+        self.requests = context.Queue()
+        self.process = context.Process(
+            target=_serve, args=(self.requests, results, index),
+            name=f"inference-process-{index}", daemon=True)
+        self.process.start()
+        # request_id -> shared input block still owned by the parent
+        self.in_flight = {}
+        # request_id -> time by which the process must have answered
+        self.deadlines = {}
+        self.hung = False
+
+
+class InferenceProcessPool:
+    """Run models in separate processes, moving images and maps through shared memory.
+
+    Each process hosts its own warm ModelRegistry. Images are written into a
+    shared-memory block that the model process reads in place; predictions come
+    back the same way. Only block names, layouts and scalars are pickled. A
+    process that dies fails its in-flight requests and is restarted with the
+    current model, so a crashing model never takes the caller down. A process
+    that leaves a request unanswered for `infer_timeout` seconds (`load_timeout`
+    for loads) counts as hung; it is killed and restarted the same way.
+    """
+
+    def __init__(self, num_workers: int = 1, infer_timeout: float = 60.0, load_timeout: float = 600.0):
+        # spawn: CUDA/OpenVINO runtimes are not fork-safe
+        self._context = mp.get_context("spawn")
+        self._results = self._context.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._futures = {}
+        self._closed = False
+        self.model_path = None
+        self.infer_timeout = infer_timeout
+        self.load_timeout = load_timeout
+        self.restarts = 0
+        self._workers = [_WorkerProcess(self._context, self._results, i) for i in range(max(1, num_workers))]
+        self._listener = threading.Thread(target=self._listen, name="inference-process-results", daemon=True)
+        self._listener.start()
+
+    def load_model(self, model_path) -> tuple[str, tuple[int, int] | None]:
+        """Load a model in every process; returns once all of them are ready.
+
+        The result is the model's hash and its (height, width) input size (None if unknown).
+        """
+        self.model_path = str(model_path)
+        futures = [self._send(worker, "load", self.model_path) for worker in self._workers]
+        return [future.result() for future in futures][0]
+
+    def submit(self, image: np.ndarray, tiled: bool = False) -> Future:
+        """Queue one (H, W, 3) image; the future resolves to (Prediction, inference_time)."""
+        block, layout = _to_shared({"image": image})
+        with self._lock:
+            worker = min(self._workers, key=lambda w: len(w.in_flight))
+        return self._send(worker, "infer", block.name, layout, tiled, block=block)
+
+    def predict(self, image: np.ndarray, tiled: bool = False):
+        """Blocking call with the same return shape as `run_inference_core`."""
+        # The watchdog fails the request first; this only guards against the listener dying
+        return self.submit(image, tiled).result(timeout=self.infer_timeout + 5 * _CHECK_INTERVAL)
+
+    def close(self):
+        self._closed = True
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._listener.join()
+        with self._lock:
+            for worker in self._workers:
+                for request_id in list(worker.in_flight):
+                    self._finish(worker, request_id, error=RuntimeError("Inference pool closed."))
+
+    def _send(self, worker, kind, *payload, block=None) -> Future:
+        future = Future()
+        timeout = self.load_timeout if kind == "load" else self.infer_timeout
+        with self._lock:
+            request_id = next(self._ids)
+            self._futures[request_id] = future
+            worker.in_flight[request_id] = block
+            worker.deadlines[request_id] = time.monotonic() + timeout
+        worker.requests.put((kind, request_id, *payload))
+        return future
+
+    def _finish(self, worker, request_id, result=None, error=None):
+        # Caller holds the lock
+        worker.deadlines.pop(request_id, None)
+        block = worker.in_flight.pop(request_id, None)
+        if block is not None:
+            block.close()
+            block.unlink()
+        future = self._futures.pop(request_id, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _owner(self, request_id):
+        for worker in self._workers:
+            if request_id in worker.in_flight:
+                return worker
+        return None
+
+    def _listen(self):
+        next_check = time.monotonic()
+        while not self._closed:
+            # On a timer, not only when results stop: a busy pool must still notice
+            # a crashed or hung process, or its requests would wait forever
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + _CHECK_INTERVAL
+            try:
+                message = self._results.get(timeout=_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+
+            kind, request_id, *payload = message
+            if kind == "result":
+                name, layout, score, inference_time = payload
+                arrays = _read_shared(name, layout)
+                result = (Prediction(
+                    anomaly_map=arrays.get("anomaly_map"),
+                    pred_mask=arrays.get("pred_mask"),
+                    pred_score=score,
+                ), inference_time)
+                error = None
+            elif kind == "loaded":
+                model_hash, input_size = payload
+                result, error = (model_hash, tuple(input_size) if input_size else None), None
+            else:
+                result, error = None, RuntimeError(payload[0])
+
+            with self._lock:
+                worker = self._owner(request_id)
+                if worker is not None:
+                    self._finish(worker, request_id, result, error)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for i, worker in enumerate(self._workers):
+            if self._closed:
+                return
+            with self._lock:
+                overdue = any(deadline < now for deadline in worker.deadlines.values())
+            if overdue and worker.process.is_alive():
+                # Alive but stuck (e.g. a deadlocked runtime): kill it and restart below
+                worker.hung = True
+                worker.process.kill()
+                worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                continue
+            if worker.hung:
+                reason = "Inference process stopped responding and was restarted."
+            else:
+                reason = f"Inference process exited unexpectedly (code {worker.process.exitcode})."
+            replacement = _WorkerProcess(self._context, self._results, worker.index)
+            with self._lock:
+                self._workers[i] = replacement
+                for request_id in list(worker.in_flight):
+                    self._finish(worker, request_id, error=RuntimeError(reason))
+            self.restarts += 1
+            if self.model_path is not None:
+                # Failures surface on the next request
+                self._send(replacement, "load", self.model_path)
+
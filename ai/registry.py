@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from ai.cache import hash_model
+from ai.inference import model_files, run_inference_core
+from ai.runtimes import load_model
+from ai.tiling import model_input_size
+
+DEFAULT_MEMORY_BUDGET = int(os.environ.get("INFERENCE_GUI_MODEL_BUDGET_MB", 2048)) * 1024 * 1024
+
+
+class LoadedModel:
+    """A warmed-up inferencer held by the ModelRegistry."""
+
+    def __init__(self, path: Path, mtime_ns: int, inferencer, model_hash: str, size_bytes: int,
+                 runtime: str = ""):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.inferencer = inferencer
+        self.model_hash = model_hash
+        self.size_bytes = size_bytes
+        # Name of the runtime that loaded it (see ai/runtimes.py)
+        self.runtime = runtime
+        self.load_time = 0.0
+        self.warmup_time = 0.0
+
+
+class ModelRegistry:
+    """Keep several loaded inferencers around so switching models is instant.
+
+    Models are keyed by resolved path, modification time and requested runtime, so a
+    re-exported file (or a runtime switch) is reloaded automatically. Each model gets a warm-up predict on load, and
+    least-recently-used models are evicted once the estimated memory of all loaded
+    models exceeds `memory_budget` bytes.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, warmup_size: tuple[int, int] = (256, 256),
+                 openvino_profile=None, torch_profile=None, runtime: str | None = None):
+        self.memory_budget = memory_budget
+        # (height, width) of the warm-up image when the model doesn't report its input size
+        self.warmup_size = warmup_size
+        # How OpenVINO models are compiled (None: from the environment, see ai/openvino_async.py)
+        self.openvino_profile = openvino_profile
+        # How Torch models are run (None: the auto-tuned profile for the model, see ai/torch_profile.py)
+        self.torch_profile = torch_profile
+        # Inference runtime, or "auto" for the fastest (None: INFERENCE_GUI_RUNTIME, see ai/runtimes.py)
+        self.runtime = runtime
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _key(self, weight_path: Path):
+        path = Path(weight_path).resolve()
+        return path, path.stat().st_mtime_ns, self.runtime
+
+    def get(self, weight_path: Path) -> LoadedModel:
+        """Return a loaded model, loading and warming it up on a miss."""
+        key = self._key(weight_path)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry
+
+            # The file changed on disk or the runtime was switched; drop the old copy first
+            for stale_key in [k for k in self._models if k[0] == key[0]]:
+                del self._models[stale_key]
+
+            entry = self._load(*key)
+            self._models[key] = entry
+            self._evict(keep=key)
+            return entry
+
+    def loaded(self) -> list[LoadedModel]:
+        """Loaded models, most recently used first."""
+        with self._lock:
+            return list(reversed(self._models.values()))
+
+    def memory_used(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._models.values())
+
+    def evict(self, weight_path: Path):
+        path = Path(weight_path).resolve()
+        with self._lock:
+            for key in [k for k in self._models if k[0] == path]:
+                del self._models[key]
+
+    def _load(self, path: Path, mtime_ns: int, runtime: str | None) -> LoadedModel:
+        start_time = time.perf_counter()
+        # Hashed once here; the runtime choice and tuned-profile lookups reuse it
+        model_hash = hash_model(path)
+        runtime_name, inferencer = load_model(
+            path, runtime, self.openvino_profile, self.torch_profile, model_hash=model_hash)
+        # On-disk weight size is a good proxy for the resident size of the loaded model
+        size_bytes = sum(f.stat().st_size for f in model_files(path))
+        entry = LoadedModel(path, mtime_ns, inferencer, model_hash, size_bytes, runtime_name)
+        entry.load_time = time.perf_counter() - start_time
+
+        # Warm-up predict so the first real image doesn't pay for lazy init / graph compilation
+        # at the exported input size, since static-shape exports reject anything else
+        height, width = model_input_size(inferencer, self.warmup_size)
+        _, entry.warmup_time = run_inference_core(Image.new("RGB", (width, height)), inferencer)
+        return entry
+
+    def _evict(self, keep):
+        while len(self._models) > 1 and self.memory_used() > self.memory_budget:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            del self._models[oldest]
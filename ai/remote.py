@@ -0,0 +1,116 @@
+"""Wire format and pooled HTTP client for the inference server (server.py).
+
+A prediction travels as one binary body: the anomaly map in float16 followed by
+the mask packed to one bit per pixel, with shapes and the score in headers. The
+server gzips the body when the client accepts it.
+"""
+import time
+
+import numpy as np
+
+from ai.inference import Prediction
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+
+def _as_array(value):
+    if value is None:
+        return None
+    if hasattr(value, "cpu"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+def _shape_header(shape) -> str:
+    return ",".join(str(d) for d in shape)
+
+
+def _parse_shape(value: str) -> tuple:
+    return tuple(int(d) for d in value.split(",") if d)
+
+
+def encode_prediction(prediction, inference_time: float) -> tuple[dict, bytes]:
+    """Serialize predictions to (headers, body)."""
+    headers = {"X-Inference-Time": repr(float(inference_time))}
+    parts = []
+
+    anomaly_map = _as_array(prediction.anomaly_map)
+    if anomaly_map is not None:
+        data = np.ascontiguousarray(anomaly_map, dtype="<f2").tobytes()
+        headers["X-Map-Shape"] = _shape_header(anomaly_map.shape)
+        headers["X-Map-Bytes"] = str(len(data))
+        parts.append(data)
+
+    pred_mask = _as_array(prediction.pred_mask)
+    if pred_mask is not None:
+        headers["X-Mask-Shape"] = _shape_header(pred_mask.shape)
+        parts.append(np.packbits(pred_mask.astype(bool), axis=None).tobytes())
+
+    if prediction.pred_score is not None:
+        score = prediction.pred_score
+        headers["X-Score"] = repr(float(score.item() if hasattr(score, "item") else score))
+    return headers, b"".join(parts)
+
+
+def decode_prediction(headers, body: bytes) -> tuple[Prediction, float]:
+    """Inverse of `encode_prediction`; returns (Prediction, server inference time)."""
+    anomaly_map = pred_mask = None
+    offset = 0
+    if "X-Map-Shape" in headers:
+        shape = _parse_shape(headers["X-Map-Shape"])
+        size = int(headers["X-Map-Bytes"])
+        anomaly_map = np.frombuffer(body, dtype="<f2", count=size // 2, offset=offset).reshape(shape)
+        offset += size
+    if "X-Mask-Shape" in headers:
+        shape = _parse_shape(headers["X-Mask-Shape"])
+        bits = np.frombuffer(body, dtype=np.uint8, offset=offset)
+        pred_mask = np.unpackbits(bits, count=int(np.prod(shape))).astype(bool).reshape(shape)
+    score = float(headers["X-Score"]) if "X-Score" in headers else None
+    return Prediction(anomaly_map, pred_mask, score), float(headers.get("X-Inference-Time", 0.0))
+
+
+class InferenceClient:
+    """Client for server.py over a pooled, keep-alive `requests.Session`.
+
+    Safe to share between threads: the session's connection pool holds up to
+    `pool_size` open connections, so concurrent requests don't reconnect.
+    """
+
+    def __init__(self, url: str = DEFAULT_SERVER_URL, pool_size: int = 4, timeout: float = 60.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Maps and masks come back gzipped; requests inflates them transparently
+        self.session.headers["Accept-Encoding"] = "gzip"
+
+    def health(self) -> dict:
+        response = self.session.get(f"{self.url}/health", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def predict_encoded(self, data: bytes, tiled: bool = False):
+        """Score an encoded image file (PNG/JPEG/...); returns (Prediction, inference_time, latency).
+
+        `inference_time` is the server's model time; `latency` is the full round trip.
+        """
+        start = time.perf_counter()
+        response = self.session.post(
+            f"{self.url}/predict",
+            params={"tiled": "1"} if tiled else None,
+            data=data,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Server error {response.status_code}: {response.text.strip()}")
+        prediction, inference_time = decode_prediction(response.headers, response.content)
+        return prediction, inference_time, time.perf_counter() - start
+
+    def close(self):
+        self.session.close()
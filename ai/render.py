@@ -0,0 +1,143 @@
+import numpy as np
+from PIL import Image
+
+from ai.imaging import ALLOCATIONS, BufferPool, FrameBuffer
+from ai.inference import (
+    draw_contours,
+    extract_score,
+    find_mask_contours,
+    prepare_mask,
+    render_heat_map,
+    score_to_label,
+)
+from ai.metrics import span
+from ai.segmentation import PixelSegmenter
+
+
+class RenderCache:
+    """Render state for one prediction, so display-only changes redraw just their layer.
+
+    Everything that depends only on the prediction (heat-map overlay, the mask at
+    image size and its contours) is computed once, on first use. Changing the
+    contour thickness then only restores the region around the contours from the
+    base image and redraws them, instead of re-running `generate_visuals`. A pixel
+    threshold re-segments the anomaly map (see ai/segmentation.py) instead of using
+    the model's mask; switching thresholds swaps the contours the same way.
+
+    `image` is the decoded (H, W, 3) uint8 RGB array; it is never written to.
+    Rendered layers are returned as FrameBuffers over pooled numpy memory.
+    """
+
+    def __init__(self, image: np.ndarray, predictions, pool: BufferPool | None = None):
+        self.image = image
+        self.predictions = predictions
+        self.pool = pool or BufferPool()
+        self.score = extract_score(predictions)
+        self.label = score_to_label(self.score)
+
+        self._canvas = None
+        self._contours = None
+        # Pixel threshold the contours were traced at (None: the model's mask)
+        self._contour_threshold = None
+        self._segmenter = None
+        self.segmentation_result = None
+        self._contour_rect = None
+        self._drawn_thickness = None
+        self._heat_map = None
+
+    @property
+    def base(self) -> np.ndarray:
+        return self.image
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    def input_image(self) -> FrameBuffer:
+        # Read-only view over the decoded pixels; no copy
+        return FrameBuffer(self.image)
+
+    def heat_map(self) -> FrameBuffer:
+        if self._heat_map is None:
+            if self.predictions.anomaly_map is None:
+                self._heat_map = FrameBuffer(self.image)
+            else:
+                with span("render.heat_map"):
+                    start = ALLOCATIONS.total
+                    # anomalib's overlay works on PIL images; this runs once per prediction
+                    heat_map = render_heat_map(Image.fromarray(self.image), self.predictions.anomaly_map)
+                    heat_map = np.asarray(heat_map.convert("RGB"))
+                    ALLOCATIONS.add(2 * heat_map.nbytes)
+                    self._heat_map = FrameBuffer(heat_map, ALLOCATIONS.total - start)
+        return self._heat_map
+
+    @property
+    def segmenter(self) -> PixelSegmenter | None:
+        """Pixel-threshold segmenter over the anomaly map; built on first use."""
+        if self._segmenter is None and self.predictions.anomaly_map is not None:
+            self._segmenter = PixelSegmenter(self.predictions.anomaly_map, self.width, self.height)
+        return self._segmenter
+
+    def segmentation(self, thickness: int, pixel_threshold: float | None = None) -> FrameBuffer:
+        if self.predictions.anomaly_map is None:
+            pixel_threshold = None
+        if pixel_threshold is None and self.predictions.pred_mask is None:
+            self.segmentation_result = None
+            return FrameBuffer(self.image)
+
+        with span("render.segmentation"):
+            return self._render_segmentation(thickness, pixel_threshold)
+
+    def _render_segmentation(self, thickness: int, pixel_threshold: float | None) -> FrameBuffer:
+        start = ALLOCATIONS.total
+        thickness = int(thickness)
+        contours_changed = self._contours is None or pixel_threshold != self._contour_threshold
+
+        if self._canvas is None:
+            self._canvas = self.pool.acquire(self.image.shape)
+            np.copyto(self._canvas, self.image)
+        elif ((contours_changed or thickness != self._drawn_thickness)
+              and self._drawn_thickness is not None and self._contour_rect is not None):
+            # Erase only the previously drawn strokes: restore their padded bounding box
+            self._canvas[self._dirty_region()] = self.image[self._dirty_region()]
+
+        if contours_changed:
+            if pixel_threshold is None:
+                mask = prepare_mask(self.predictions.pred_mask, self.width, self.height)
+                self._contours = find_mask_contours(mask)
+                self.segmentation_result = None
+            else:
+                self.segmentation_result = self.segmenter.segment(pixel_threshold)
+                self._contours = self.segmentation_result.contours
+            self._contour_threshold = pixel_threshold
+            self._contour_rect = self._bounding_rect(self._contours)
+            self._drawn_thickness = None
+
+        if thickness != self._drawn_thickness:
+            draw_contours(self._canvas, self._contours, thickness)
+            self._drawn_thickness = thickness
+
+        # Hand out a pooled copy: the GUI may still be reading the previous frame while
+        # the canvas is redrawn. Released buffers are recycled, so this rarely allocates.
+        frame = self.pool.acquire(self.image.shape)
+        np.copyto(frame, self._canvas)
+        return self.pool.wrap(frame, ALLOCATIONS.total - start)
+
+    def _dirty_region(self):
+        pad = (self._drawn_thickness or 0) + 1
+        x0, y0, x1, y1 = self._contour_rect
+        return (slice(max(0, y0 - pad), min(self.height, y1 + pad)),
+                slice(max(0, x0 - pad), min(self.width, x1 + pad)))
+
+    @staticmethod
+    def _bounding_rect(contours):
+        if not contours:
+            return None
+        points = np.concatenate([c.reshape(-1, 2) for c in contours])
+        x0, y0 = points.min(axis=0)
+        x1, y1 = points.max(axis=0) + 1
+        return int(x0), int(y0), int(x1), int(y1)
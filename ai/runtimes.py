@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+
+AUTO = "auto"
+# Environment variable holding the default runtime: a name, "auto" to benchmark every
+# compatible runtime once per model and keep the fastest, or empty for the first
+# registered runtime that supports the model's format. Read at load time, so
+# inference processes started later inherit it.
+RUNTIME_ENV = "INFERENCE_GUI_RUNTIME"
+DEFAULT_RUNTIME_STORE = Path(
+    os.environ.get("INFERENCE_GUI_CACHE_DIR", Path.home() / ".cache" / "inference_gui")
+) / "runtimes.json"
+
+_store_lock = threading.Lock()
+
+
+class Runtime:
+    """An inference runtime: the model formats it loads and how to load them.
+
+    `loader(weight_path, openvino_profile, torch_profile, model_hash)` returns an
+    inferencer with the anomalib `predict` interface; `model_hash` is the weights'
+    hash if the caller has it (None otherwise). `requires` lists the modules that must
+    be importable, so a runtime whose package isn't installed is simply skipped.
+    """
+
+    def __init__(self, name: str, extensions: tuple[str, ...], loader, requires: tuple[str, ...] = ()):
+        self.name = name
+        self.extensions = extensions
+        self.loader = loader
+        self.requires = requires
+
+    def __repr__(self):
+        return f"Runtime({self.name!r})"
+
+    def supports(self, weight_path: Path) -> bool:
+        return Path(weight_path).suffix in self.extensions
+
+    def available(self) -> bool:
+        return all(find_spec(module) is not None for module in self.requires)
+
+    def load(self, weight_path: Path, openvino_profile=None, torch_profile=None, model_hash: str | None = None):
+        return self.loader(Path(weight_path), openvino_profile, torch_profile, model_hash)
+
+
+# Registration order is preference order when no runtime is asked for
+RUNTIMES: dict[str, Runtime] = {}
+
+
+def register_runtime(runtime: Runtime) -> Runtime:
+    RUNTIMES[runtime.name] = runtime
+    return runtime
+
+
+def _load_torch(weight_path, openvino_profile, torch_profile, model_hash):
+    from anomalib.deploy import TorchInferencer
+
+    from ai.torch_profile import TorchProfile, TunedTorchInferencer
+
+    # Using device='auto' as in inference.py, or standard initialization
+    inferencer = TorchInferencer(path=weight_path)
+    profile = torch_profile or TorchProfile.for_model(weight_path, model_hash=model_hash)
+    return TunedTorchInferencer(inferencer, profile)
+
+
+def _load_openvino(weight_path, openvino_profile, torch_profile, model_hash):
+    from anomalib.deploy import OpenVINOInferencer
+
+    from ai.openvino_async import AsyncOpenVINOInferencer, OpenVINOProfile
+
+    profile = openvino_profile or OpenVINOProfile.from_env()
+    inferencer = OpenVINOInferencer(path=weight_path, device=profile.device, config=profile.compile_config())
+    if profile.async_jobs != 1:
+        inferencer = AsyncOpenVINOInferencer(inferencer, profile.async_jobs)
+    return inferencer
+
+
+def _load_onnxruntime(weight_path, openvino_profile, torch_profile, model_hash):
+    from ai.onnx_runtime import OnnxRuntimeInferencer
+
+    return OnnxRuntimeInferencer(weight_path)
+
+
+register_runtime(Runtime("torch", (".pt", ".pth", ".ckpt"), _load_torch, ("torch", "anomalib")))
+register_runtime(Runtime("openvino", (".onnx", ".bin", ".xml"), _load_openvino, ("openvino", "anomalib")))
+register_runtime(Runtime("onnxruntime", (".onnx",), _load_onnxruntime, ("onnxruntime",)))
+
+
+def runtime_choices() -> list[str]:
+    """Values accepted for `runtime` ("" is the default)."""
+    return [AUTO, *RUNTIMES]
+
+
+def compatible_runtimes(weight_path: Path) -> list[Runtime]:
+    """Installed runtimes that can load this model file, in preference order."""
+    return [runtime for runtime in RUNTIMES.values() if runtime.supports(weight_path) and runtime.available()]
+
+
+def load_model(weight_path: Path, runtime: str | None = None, openvino_profile=None, torch_profile=None,
+               store: Path = DEFAULT_RUNTIME_STORE, model_hash: str | None = None):
+    """Load a model; returns (name of the runtime used, inferencer).
+
+    `runtime` is a registered runtime name, "auto", or "" for the first compatible
+    runtime (None: INFERENCE_GUI_RUNTIME). Pass `model_hash` if the weights are
+    already hashed, so runtime and profile lookups don't hash them again.
+    """
+    weight_path = Path(weight_path)
+    runtime = os.environ.get(RUNTIME_ENV, "") if runtime is None else runtime
+    if runtime == AUTO:
+        return select_runtime(weight_path, openvino_profile, torch_profile, store, model_hash)
+
+    if runtime:
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown runtime {runtime!r}; expected one of {runtime_choices()}")
+        if not RUNTIMES[runtime].supports(weight_path):
+            raise ValueError(f"The {runtime} runtime can't load {weight_path.suffix} models.")
+        return runtime, RUNTIMES[runtime].load(weight_path, openvino_profile, torch_profile, model_hash)
+
+    supporting = [entry for entry in RUNTIMES.values() if entry.supports(weight_path)]
+    if not supporting:
+        raise ValueError(f"Model extension {weight_path.suffix} is not supported.")
+    # If none is installed, the first one's import error tells the user what is missing
+    entry = next((entry for entry in supporting if entry.available()), supporting[0])
+    return entry.name, entry.load(weight_path, openvino_profile, torch_profile, model_hash)
+
+
+def benchmark_inferencer(inferencer, images: int = 3, rounds: int = 3) -> float:
+    """Median latency of `inferencer` on a few synthetic images at its input size."""
+    from ai.inference import run_inference_core
+    from ai.tiling import model_input_size
+
+    height, width = model_input_size(inferencer, (256, 256))
+    rng = np.random.default_rng(0)
+    samples = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(images)]
+    # Untimed pass: lazy initialization and graph compilation happen here
+    for sample in samples:
+        run_inference_core(sample, inferencer)
+    latencies = [run_inference_core(sample, inferencer)[1] for _ in range(rounds) for sample in samples]
+    return float(np.median(latencies))
+
+
+def select_runtime(weight_path: Path, openvino_profile=None, torch_profile=None,
+                   store: Path = DEFAULT_RUNTIME_STORE, model_hash: str | None = None):
+    """Load a model with its fastest runtime; returns (runtime name, inferencer).
+
+    The first load of a model benchmarks every compatible runtime and saves the
+    winner under the model's content hash, so later loads go straight to it.
+    """
+    from ai.cache import hash_model
+
+    weight_path = Path(weight_path)
+    candidates = compatible_runtimes(weight_path)
+    if not candidates:
+        return load_model(weight_path, "", openvino_profile, torch_profile, store, model_hash)
+
+    model_hash = model_hash or hash_model(weight_path)
+    chosen = load_runtime_choices(store).get(model_hash)
+    if chosen is not None and chosen in {entry.name for entry in candidates}:
+        return chosen, RUNTIMES[chosen].load(weight_path, openvino_profile, torch_profile, model_hash)
+    if len(candidates) == 1:
+        return candidates[0].name, candidates[0].load(weight_path, openvino_profile, torch_profile, model_hash)
+
+    best, latencies, errors = None, {}, {}
+    for entry in candidates:
+        try:
+            inferencer = entry.load(weight_path, openvino_profile, torch_profile, model_hash)
+            latency = benchmark_inferencer(inferencer)
+        except Exception as e:
+            errors[entry.name] = f"{type(e).__name__}: {str(e)}"
+            continue
+        latencies[entry.name] = latency
+        if best is None or latency < best[1]:
+            # Only the winner so far stays loaded
+            best = (entry.name, latency, inferencer)
+        inferencer = None
+
+    if best is None:
+        raise RuntimeError(f"No runtime could run {weight_path.name}: {errors}")
+    save_runtime_choice(weight_path, model_hash, best[0], latencies, errors, store)
+    return best[0], best[2]
+
+
+def load_runtime_choices(store: Path = DEFAULT_RUNTIME_STORE) -> dict:
+    try:
+        with open(store) as f:
+            return {key: entry["runtime"] for key, entry in json.load(f).items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_runtime_choice(weight_path: Path, model_hash: str, runtime: str, latencies: dict, errors: dict,
+                        store: Path = DEFAULT_RUNTIME_STORE):
+    """Remember `runtime` as the fastest for this model (keyed by content hash)."""
+    with _store_lock:
+        try:
+            with open(store) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[model_hash] = {
+            "model": str(weight_path),
+            "runtime": runtime,
+            "latency_ms": {name: latency * 1000.0 for name, latency in latencies.items()},
+            "errors": errors,
+        }
+        store.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = store.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, store)
+
+
+def add_runtime_argument(parser):
+    """`--runtime` option for `load_model` (default: INFERENCE_GUI_RUNTIME)."""
+    parser.add_argument("--runtime", choices=runtime_choices(), default=None,
+                        help="Inference runtime. 'auto' benchmarks the compatible runtimes on the first "
+                             "load of a model and remembers the fastest (default: by file extension).")
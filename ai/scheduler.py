@@ -0,0 +1,106 @@
+import threading
+import time
+
+from ai.metrics import METRICS
+
+# Lanes, in priority order: interactive work never waits behind bulk work
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class Job:
+    """One pending request: `func(generation, *args)` run on its lane's thread."""
+
+    __slots__ = ("key", "generation", "lane", "func", "args", "submitted_at")
+
+    def __init__(self, key, generation, lane, func, args):
+        self.key = key
+        self.generation = generation
+        self.lane = lane
+        self.func = func
+        self.args = args
+        self.submitted_at = time.perf_counter()
+
+
+class WorkScheduler:
+    """Coalescing, generation-tracking job scheduler with an interactive and a bulk lane.
+
+    Every `submit` under a key bumps that key's generation and replaces any job
+    with the same key that has not started yet, so a burst of requests (e.g. a
+    slider drag) collapses to the latest one and queueing delay stays bounded.
+    Each lane has its own thread, so renders on the interactive lane keep
+    running while a long inference occupies the bulk lane. Jobs receive their
+    generation and can check `is_current` before publishing a result.
+    """
+
+    def __init__(self, name: str = "ai-scheduler"):
+        self.coalesced = 0
+        self._pending = {}
+        self._generations = {}
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, args=(lane,), name=f"{name}-{lane}", daemon=True)
+            for lane in (INTERACTIVE, BULK)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key: str, func, *args, lane: str = BULK) -> int:
+        """Queue `func(generation, *args)`, replacing a pending job with the same key."""
+        with self._cond:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            if self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            # Re-inserting moves the key to the back, keeping FIFO order within a lane
+            self._pending[key] = Job(key, generation, lane, func, args)
+            self._cond.notify_all()
+        return generation
+
+    def generation(self, key: str) -> int:
+        with self._cond:
+            return self._generations.get(key, 0)
+
+    def is_current(self, key: str, generation: int) -> bool:
+        """False once a newer request has been submitted under `key`."""
+        return self.generation(key) == generation
+
+    def cancel(self, key: str):
+        """Drop a pending job and mark any running one as outdated."""
+        with self._cond:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._pending.pop(key, None)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _next_job(self, lane):
+        # Caller holds the lock
+        for key, job in self._pending.items():
+            if job.lane == lane:
+                del self._pending[key]
+                return job
+        return None
+
+    def _run(self, lane):
+        while True:
+            with self._cond:
+                job = self._next_job(lane)
+                while job is None and not self._stopped:
+                    self._cond.wait()
+                    job = self._next_job(lane)
+                if self._stopped:
+                    return
+
+            METRICS.observe(f"scheduler.{job.key}.queued", time.perf_counter() - job.submitted_at)
+            # Jobs report their own errors; never let one take the lane down
+            try:
+                job.func(job.generation, *job.args)
+            except Exception:
+                pass
@@ -0,0 +1,130 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from ai.metrics import span
+
+# Quantization steps between the map's minimum and maximum. uint16 levels keep the
+# threshold error far below the slider's 0.01 step while comparing as fast as bytes
+LEVELS = 65535
+
+
+class Region(NamedTuple):
+    """One connected defect region, in image pixel coordinates."""
+    area: int
+    bbox: tuple[int, int, int, int]  # x, y, width, height
+    peak: float
+
+
+class Segmentation(NamedTuple):
+    """Mask, outer contours and regions of the anomaly map above a pixel threshold."""
+    threshold: float
+    mask: np.ndarray          # bool, at anomaly-map resolution
+    contours: list            # int32 point arrays in image coordinates, for cv2.drawContours
+    regions: list[Region]     # largest first
+    area_fraction: float      # share of the image above the threshold
+
+
+def _to_2d_float(anomaly_map) -> np.ndarray:
+    if hasattr(anomaly_map, "cpu"):
+        anomaly_map = anomaly_map.detach().cpu().numpy()
+    anomaly_map = np.asarray(anomaly_map, dtype=np.float32)
+    # (1, H, W) batch layout -> (H, W)
+    while anomaly_map.ndim > 2 and anomaly_map.shape[0] == 1:
+        anomaly_map = anomaly_map[0]
+    return anomaly_map
+
+
+class PixelSegmenter:
+    """Re-segment one anomaly map at any pixel threshold without re-running the model.
+
+    The map is quantized once into uint16 levels, and a cumulative histogram of them is
+    kept. A threshold then costs one integer comparison for the mask, a
+    connected-components pass and a contour trace, all at the map's own resolution;
+    upsampling the mask first would add no detail. Contours, areas and boxes are
+    scaled to the `width` x `height` image they are drawn on.
+    """
+
+    def __init__(self, anomaly_map, width: int, height: int):
+        with span("segment.prepare"):
+            self.map = _to_2d_float(anomaly_map)
+            self.width = width
+            self.height = height
+            self.low = float(self.map.min()) if self.map.size else 0.0
+            self.high = float(self.map.max()) if self.map.size else 0.0
+            self._span = self.high - self.low if self.high > self.low else 1.0
+            self.levels = np.floor((self.map - self.low) * (LEVELS / self._span)).astype(np.uint16)
+            # _at_or_above[level] = pixels whose level is >= level
+            histogram = np.bincount(self.levels.ravel(), minlength=LEVELS + 1)
+            self._at_or_above = np.concatenate((np.cumsum(histogram[::-1])[::-1], [0]))
+            map_height, map_width = self.map.shape[:2]
+            self._scale = (width / max(map_width, 1), height / max(map_height, 1))
+            self._last = None
+
+    def level(self, threshold: float) -> int:
+        """First quantization level at or above `threshold` (LEVELS + 1: nothing is)."""
+        if threshold <= self.low:
+            return 0
+        if threshold > self.high:
+            return LEVELS + 1
+        return int(np.ceil((threshold - self.low) * (LEVELS / self._span)))
+
+    def area_fraction(self, threshold: float) -> float:
+        """Share of pixels at or above `threshold`, from the histogram alone."""
+        if not self.levels.size:
+            return 0.0
+        return float(self._at_or_above[self.level(threshold)]) / self.levels.size
+
+    def segment(self, threshold: float) -> Segmentation:
+        level = self.level(threshold)
+        # Slider ticks that land on the same level reuse the last result
+        if self._last is not None and self._last[0] == level:
+            return self._last[1]._replace(threshold=threshold)
+
+        import cv2
+
+        with span("segment.threshold"):
+            mask = self.levels >= level
+            mask_u8 = mask.view(np.uint8)
+            count, labels, stats, _ = cv2.connectedComponentsWithStats(mask_u8, connectivity=8)
+            contours, _ = cv2.findContours(mask_u8, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            regions = self._regions(mask, count, labels, stats)
+            result = Segmentation(
+                threshold=threshold,
+                mask=mask,
+                contours=[self._to_image(contour) for contour in contours],
+                regions=regions,
+                area_fraction=self.area_fraction(threshold),
+            )
+        self._last = (level, result)
+        return result
+
+    def _regions(self, mask, count, labels, stats) -> list[Region]:
+        if count <= 1:
+            return []
+        import cv2
+
+        # Peak per component over the masked pixels only (label 0 is the background)
+        peaks = np.full(count, -np.inf, dtype=np.float32)
+        np.maximum.at(peaks, labels[mask], self.map[mask])
+        sx, sy = self._scale
+        regions = [
+            Region(
+                area=int(round(stats[i, cv2.CC_STAT_AREA] * sx * sy)),
+                bbox=(int(stats[i, cv2.CC_STAT_LEFT] * sx), int(stats[i, cv2.CC_STAT_TOP] * sy),
+                      int(np.ceil(stats[i, cv2.CC_STAT_WIDTH] * sx)),
+                      int(np.ceil(stats[i, cv2.CC_STAT_HEIGHT] * sy))),
+                peak=float(peaks[i]),
+            )
+            for i in range(1, count)
+        ]
+        regions.sort(key=lambda region: region.area, reverse=True)
+        return regions
+
+    def _to_image(self, contour: np.ndarray) -> np.ndarray:
+        sx, sy = self._scale
+        if sx == 1.0 and sy == 1.0:
+            return contour
+        # Pixel centres map to pixel centres
+        points = (contour.astype(np.float32) + 0.5) * np.array([sx, sy], dtype=np.float32) - 0.5
+        return np.round(points).astype(np.int32)
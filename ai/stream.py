@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ai.imaging import ALLOCATIONS, BufferPool
+from ai.inference import run_inference_core
+from ai.pipeline import LatestSlot
+from ai.render import RenderCache
+
+
+def open_capture(source: str):
+    """Open a camera (numeric index) or a video file with cv2.VideoCapture."""
+    import cv2
+
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open stream source: {source}")
+    return capture
+
+
+class StreamFrame:
+    """One rendered stream result, stamped with the time its frame was captured."""
+
+    def __init__(self, captured_at, image, heat_map, segmentation, inference_time, score, label):
+        self.captured_at = captured_at
+        self.image = image
+        self.heat_map = heat_map
+        self.segmentation = segmentation
+        self.inference_time = inference_time
+        self.score = score
+        self.label = label
+
+
+class StreamStats:
+    """Displayed-frame rate and capture-to-display latency over a sliding window."""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self._shown = deque()
+        self.latency = 0.0
+
+    def record(self, captured_at: float):
+        now = time.perf_counter()
+        self._shown.append(now)
+        while self._shown and now - self._shown[0] > self.window:
+            self._shown.popleft()
+        # Exponential moving average smooths jitter in the readout
+        latency = now - captured_at
+        self.latency = latency if self.latency == 0.0 else 0.8 * self.latency + 0.2 * latency
+
+    @property
+    def fps(self) -> float:
+        if len(self._shown) < 2:
+            return 0.0
+        return (len(self._shown) - 1) / (self._shown[-1] - self._shown[0])
+
+
+class StreamWorker(QObject):
+    """Run capture, inference and rendering as overlapping latest-frame-wins stages.
+
+    Each stage has its own thread and hands off through a LatestSlot, so a slow
+    stage makes the one before it drop stale frames instead of queueing them.
+    The GUI is notified with `frame_available` only when the hand-off slot goes
+    from empty to full, and pulls the newest frame with `take_frame`, so Qt paint
+    never falls behind either.
+    """
+
+    frame_available = pyqtSignal()
+    stream_stopped = pyqtSignal(str)
+
+    def __init__(self, source: str, inferencer, thickness: int = 3, realtime: bool = True):
+        super().__init__()
+        self.source = source
+        self.inferencer = inferencer
+        # Read by the render thread on every frame, so slider changes apply immediately
+        self.thickness = thickness
+        # Pace video files to their native frame rate, like a live camera
+        self.realtime = realtime
+        self.captured = 0
+
+        self._frames = LatestSlot()
+        self._results = LatestSlot()
+        self._display = LatestSlot()
+        self._stop = threading.Event()
+        self._threads = []
+        self._pool = BufferPool()
+
+    @property
+    def dropped(self) -> int:
+        return self._frames.dropped + self._results.dropped + self._display.dropped
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=target, name=f"stream-{name}", daemon=True)
+            for name, target in (
+                ("capture", self._capture_loop),
+                ("inference", self._inference_loop),
+                ("render", self._render_loop),
+            )
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for slot in (self._frames, self._results, self._display):
+            slot.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+
+    def take_frame(self) -> StreamFrame | None:
+        return self._display.take()
+
+    def _finish(self, reason=""):
+        if not self._stop.is_set():
+            self._stop.set()
+            self._frames.close()
+            self._results.close()
+            self.stream_stopped.emit(reason)
+
+    def _capture_loop(self):
+        import cv2
+
+        try:
+            capture = open_capture(self.source)
+        except Exception as e:
+            self._finish(f"Stream Error: {str(e)}")
+            return
+
+        is_file = not self.source.isdigit()
+        frame_interval = 0.0
+        if is_file and self.realtime:
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps and fps > 0 else 0.0
+
+        next_frame_at = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    self._finish("End of stream")
+                    break
+                captured_at = time.perf_counter()
+                self.captured += 1
+                ALLOCATIONS.add(frame.nbytes)
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+                self._frames.put((captured_at, frame))
+
+                if frame_interval:
+                    next_frame_at += frame_interval
+                    delay = next_frame_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_frame_at = time.perf_counter()
+        finally:
+            capture.release()
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            item = self._frames.get(timeout=0.1)
+            if item is None:
+                continue
+            captured_at, image = item
+            try:
+                predictions, inference_time = run_inference_core(image, self.inferencer)
+            except Exception as e:
+                self._finish(f"Inference Error: {str(e)}")
+                return
+            self._results.put((captured_at, image, predictions, inference_time))
+
+        self._results.close()
+
+    def _render_loop(self):
+        while True:
+            item = self._results.get(timeout=0.1)
+            if item is None:
+                if self._stop.is_set():
+                    break
+                continue
+            captured_at, image, predictions, inference_time = item
+            try:
+                render = RenderCache(image, predictions, self._pool)
+                frame = StreamFrame(
+                    captured_at, render.input_image(),
+                    render.heat_map(), render.segmentation(self.thickness),
+                    inference_time, render.score, render.label)
+            except Exception as e:
+                self._finish(f"Visualization Error: {str(e)}")
+                return
+            if self._display.put(frame):
+                self.frame_available.emit()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from ai.inference import Prediction, predict_batch
+from ai.metrics import METRICS
+
+# Used when the inferencer does not expose the resolution it was exported for
+DEFAULT_TILE_SIZE = (256, 256)
+DEFAULT_TILE_OVERLAP = 0.25
+
+
+def known_input_size(inferencer) -> tuple[int, int] | None:
+    """(height, width) the model was exported for, or None if the inferencer doesn't say."""
+    # FakeInferencer
+    map_size = getattr(inferencer, "map_size", None)
+    if map_size:
+        return tuple(map_size)
+
+    # OpenVINOInferencer: static (N, C, H, W) input of the compiled model
+    input_blob = getattr(inferencer, "input_blob", None)
+    if input_blob is not None:
+        try:
+            dims = list(input_blob.get_partial_shape())[-2:]
+            if len(dims) == 2 and all(d.is_static for d in dims):
+                return dims[0].get_length(), dims[1].get_length()
+        except (AttributeError, RuntimeError, TypeError):
+            pass
+
+    # OnnxRuntimeInferencer: static (N, C, H, W) session input; dynamic dims aren't ints
+    input_shape = getattr(inferencer, "input_shape", None)
+    if input_shape is not None and len(input_shape) == 4 and all(isinstance(d, int) for d in input_shape[-2:]):
+        return input_shape[-2], input_shape[-1]
+
+    # TorchInferencer: the Resize in the model's pre-processor
+    pre_processor = getattr(getattr(inferencer, "model", None), "pre_processor", None)
+    transform = getattr(pre_processor, "transform", None)
+    for step in getattr(transform, "transforms", [transform]):
+        size = getattr(step, "size", None)
+        if type(step).__name__ == "Resize" and isinstance(size, (list, tuple)) and len(size) == 2:
+            return int(size[0]), int(size[1])
+    return None
+
+
+def model_input_size(inferencer, default: tuple[int, int] = DEFAULT_TILE_SIZE) -> tuple[int, int]:
+    """(height, width) the model was exported for, if the inferencer exposes it."""
+    return known_input_size(inferencer) or default
+
+
+def tiled_variant(tile_size: tuple[int, int] | None, overlap: float = DEFAULT_TILE_OVERLAP) -> str:
+    """Prediction-cache variant of a tiled run; different tilings give different results.
+
+    `tile_size` None stands for `run_tiled_inference`'s default, which follows the model.
+    """
+    size = f"{tile_size[0]}x{tile_size[1]}" if tile_size else "model"
+    return f"tiled:{size}:{overlap:g}"
+
+
+def tile_starts(length: int, tile: int, stride: int) -> list[int]:
+    """Tile offsets covering [0, length); the last tile is aligned to the far edge."""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def blend_window(length: int, overlap: int) -> np.ndarray:
+    """1-D tile weights: linear ramps across the overlap on both sides, flat in between."""
+    window = np.ones(length, dtype=np.float32)
+    overlap = min(overlap, length // 2)
+    if overlap > 0:
+        ramp = (np.arange(overlap, dtype=np.float32) + 0.5) / overlap
+        window[:overlap] = ramp
+        window[-overlap:] = np.minimum(window[-overlap:], ramp[::-1])
+    return window
+
+
+def _tile_array(value, height: int, width: int, interpolation: int) -> np.ndarray | None:
+    """One tile's map or mask as a float32 (height, width) array."""
+    import cv2
+
+    if value is None:
+        return None
+    if hasattr(value, "cpu"):
+        value = value.detach().cpu().numpy()
+    value = np.asarray(value, dtype=np.float32)
+    value = value.reshape(value.shape[-2:])
+    if value.shape != (height, width):
+        value = cv2.resize(value, (width, height), interpolation=interpolation)
+    return value
+
+
+def run_tiled_inference(image, inferencer, tile_size: tuple[int, int] | None = None,
+                        overlap: float = DEFAULT_TILE_OVERLAP, batch_size: int = 4):
+    """Run inference on overlapping model-sized tiles and stitch a full-resolution result.
+
+    Small defects survive because each tile is seen at (close to) the model's native
+    resolution instead of the whole image being downscaled. Tiles are sent through
+    `predict_batch` `batch_size` at a time, and the per-tile maps and masks are
+    accumulated into full-size buffers with linear blending across overlaps. Peak
+    memory is two float32 image-sized accumulators plus one batch of tiles, however
+    many tiles the image has.
+
+    Returns (Prediction, inference_time) like `run_inference_core`, with the same
+    (1, H, W) layout a direct predict call produces, so `generate_visuals` and the
+    prediction cache take it unchanged. The image score is the maximum tile score.
+    """
+    import cv2
+
+    start_time = time.perf_counter()
+    image = np.asarray(image)
+    height, width = image.shape[:2]
+    tile_h, tile_w = tile_size or model_input_size(inferencer)
+    tile_h, tile_w = min(tile_h, height), min(tile_w, width)
+    overlap_h, overlap_w = int(tile_h * overlap), int(tile_w * overlap)
+
+    ys = tile_starts(height, tile_h, max(1, tile_h - overlap_h))
+    xs = tile_starts(width, tile_w, max(1, tile_w - overlap_w))
+    window_y, window_x = blend_window(tile_h, overlap_h), blend_window(tile_w, overlap_w)
+
+    # The tile grid is a full product of row and column offsets, so the summed
+    # weights factor into one vector per axis and need no image-sized buffer
+    weight_y = np.zeros(height, dtype=np.float32)
+    for y in ys:
+        weight_y[y:y + tile_h] += window_y
+    weight_x = np.zeros(width, dtype=np.float32)
+    for x in xs:
+        weight_x[x:x + tile_w] += window_x
+    window = window_y[:, None] * window_x[None, :]
+
+    anomaly_map = None
+    pred_mask = None
+    scores = []
+    origins = [(y, x) for y in ys for x in xs]
+    for batch_start in range(0, len(origins), batch_size):
+        batch = origins[batch_start:batch_start + batch_size]
+        # Crops are views; only the model inputs built from them are copies
+        tiles = [image[y:y + tile_h, x:x + tile_w] for y, x in batch]
+        predictions, _ = predict_batch(tiles, inferencer)
+
+        for (y, x), prediction in zip(batch, predictions):
+            region = (slice(y, y + tile_h), slice(x, x + tile_w))
+            tile_map = _tile_array(prediction.anomaly_map, tile_h, tile_w, cv2.INTER_LINEAR)
+            if tile_map is not None:
+                if anomaly_map is None:
+                    anomaly_map = np.zeros((height, width), dtype=np.float32)
+                anomaly_map[region] += tile_map * window
+            tile_mask = _tile_array(prediction.pred_mask, tile_h, tile_w, cv2.INTER_NEAREST)
+            if tile_mask is not None:
+                if pred_mask is None:
+                    pred_mask = np.zeros((height, width), dtype=np.float32)
+                pred_mask[region] += tile_mask * window
+            if prediction.pred_score is not None:
+                score = prediction.pred_score
+                scores.append(float(score.item() if hasattr(score, "item") else score))
+
+    if anomaly_map is not None:
+        anomaly_map /= weight_y[:, None]
+        anomaly_map /= weight_x[None, :]
+        anomaly_map = anomaly_map[None]
+    if pred_mask is not None:
+        pred_mask /= weight_y[:, None]
+        pred_mask /= weight_x[None, :]
+        # Blended vote across overlapping tiles
+        pred_mask = (pred_mask >= 0.5)[None]
+
+    inference_time = time.perf_counter() - start_time
+    METRICS.observe("run_tiled_inference", inference_time)
+    return Prediction(
+        anomaly_map=anomaly_map,
+        pred_mask=pred_mask,
+        pred_score=np.float32(max(scores)) if scores else None,
+    ), inference_time
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from ai.inference import Prediction
+
+COMPILE_MODES = ("none", "compile")
+DEFAULT_PROFILE_STORE = Path(
+    os.environ.get("INFERENCE_GUI_CACHE_DIR", Path.home() / ".cache" / "inference_gui")
+) / "torch_profiles.json"
+
+_store_lock = threading.Lock()
+
+
+class TorchProfile:
+    """How a TorchInferencer model is executed on the CPU.
+
+    `threads`/`interop_threads` set PyTorch's intra- and inter-op thread pools
+    (process-wide; None keeps PyTorch's default). `channels_last` converts the
+    model and its inputs to NHWC, which oneDNN convolutions prefer. `bf16` runs
+    under CPU autocast to bfloat16; only worth it on CPUs with native bf16
+    (AVX512-BF16 / AMX). `compile` is "compile" for `torch.compile`, or "none".
+    Inference always runs under `torch.inference_mode`.
+    """
+
+    def __init__(self, threads: int | None = None, interop_threads: int | None = None,
+                 channels_last: bool = False, bf16: bool = False, compile: str = "none"):
+        if compile not in COMPILE_MODES:
+            raise ValueError(f"Unknown compile mode {compile!r}; expected one of {COMPILE_MODES}")
+        self.threads = threads
+        self.interop_threads = interop_threads
+        self.channels_last = channels_last
+        self.bf16 = bf16
+        self.compile = compile
+
+    def __repr__(self):
+        return f"TorchProfile({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+    def to_dict(self) -> dict:
+        return {
+            "threads": self.threads,
+            "interop_threads": self.interop_threads,
+            "channels_last": self.channels_last,
+            "bf16": self.bf16,
+            "compile": self.compile,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{key: data[key] for key in cls().to_dict() if key in data})
+
+    @classmethod
+    def from_env(cls):
+        """Profile from INFERENCE_GUI_TORCH_{THREADS,INTEROP_THREADS,CHANNELS_LAST,BF16,COMPILE}."""
+        def _int(name):
+            value = os.environ.get(name)
+            return int(value) if value else None
+
+        def _flag(name):
+            return os.environ.get(name, "").lower() in {"1", "true", "yes", "on"}
+
+        return cls(
+            threads=_int("INFERENCE_GUI_TORCH_THREADS"),
+            interop_threads=_int("INFERENCE_GUI_TORCH_INTEROP_THREADS"),
+            channels_last=_flag("INFERENCE_GUI_TORCH_CHANNELS_LAST"),
+            bf16=_flag("INFERENCE_GUI_TORCH_BF16"),
+            compile=os.environ.get("INFERENCE_GUI_TORCH_COMPILE", "none") or "none",
+        )
+
+    @classmethod
+    def for_model(cls, weight_path: Path, store: Path = DEFAULT_PROFILE_STORE, model_hash: str | None = None):
+        """The auto-tuned profile saved for this model file, else the environment's.
+
+        Pass `model_hash` when the caller has already hashed the weights.
+        """
+        from ai.cache import hash_model
+
+        profile = load_tuned_profiles(store).get(model_hash or hash_model(weight_path))
+        return cls.from_dict(profile) if profile is not None else cls.from_env()
+
+
+def load_tuned_profiles(store: Path = DEFAULT_PROFILE_STORE) -> dict:
+    try:
+        with open(store) as f:
+            return {key: entry["profile"] for key, entry in json.load(f).items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_tuned_profile(weight_path: Path, profile: TorchProfile, latency: float,
+                       store: Path = DEFAULT_PROFILE_STORE):
+    """Remember `profile` as the fastest for this model (keyed by content hash)."""
+    from ai.cache import hash_model
+
+    with _store_lock:
+        try:
+            with open(store) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[hash_model(weight_path)] = {
+            "model": str(weight_path),
+            "profile": profile.to_dict(),
+            "latency_ms": latency * 1000.0,
+        }
+        store.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = store.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, store)
+
+
+def bf16_supported() -> bool:
+    """Whether this CPU has native bfloat16 math (otherwise autocast is emulated and slow)."""
+    import torch
+
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+class TunedTorchInferencer:
+    """Run a TorchInferencer's model with a TorchProfile applied.
+
+    Takes the same (C, H, W) / (N, C, H, W) float tensors as the wrapped inferencer
+    and returns a Prediction with float32 outputs, so bf16 results look like any
+    other model's.
+
+    PyTorch's thread pools are process-wide. `threads` is therefore applied at each
+    predict, and only when it differs from the current count: several loaded models
+    with different profiles each run with their own. The inter-op pool can only be
+    sized once per process, so the first model to set it wins.
+    """
+
+    def __init__(self, inferencer, profile: TorchProfile):
+        import torch
+
+        self.inferencer = inferencer
+        self.profile = profile
+        self.device = inferencer.device
+
+        if profile.interop_threads:
+            try:
+                torch.set_num_interop_threads(profile.interop_threads)
+            except RuntimeError:
+                # Can only be set once, before any inter-op parallel work has run
+                pass
+
+        model = inferencer.model.eval()
+        if profile.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        self.model = model
+        self._forward = torch.compile(model) if profile.compile == "compile" else model
+
+    def predict(self, image) -> Prediction:
+        import torch
+
+        if self.profile.threads and torch.get_num_threads() != self.profile.threads:
+            torch.set_num_threads(self.profile.threads)
+        if image.dim() == 3:
+            image = image.unsqueeze(0)
+        image = image.to(self.device)
+        if self.profile.channels_last:
+            image = image.contiguous(memory_format=torch.channels_last)
+
+        with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.profile.bf16):
+            outputs = self._forward(image)
+
+        def _output(name):
+            value = getattr(outputs, name, None)
+            if isinstance(value, torch.Tensor) and value.is_floating_point():
+                value = value.float()
+            return value
+
+        return Prediction(
+            anomaly_map=_output("anomaly_map"),
+            pred_mask=_output("pred_mask"),
+            pred_score=_output("pred_score"),
+        )
+
@@ -0,0 +1,445 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ai.imaging import IMAGE_EXTENSIONS
+from ai.inference import score_to_label
+
+# What happens when images arrive faster than they are scored and the queue is full:
+# "block" stops picking up new files (they wait in the folder), the others skip one
+POLICIES = ("block", "drop-oldest", "drop-newest")
+# "move"/"copy" file images into OK/NG/ERROR/SKIPPED sub-folders; "tag" leaves them in place
+OUTPUT_MODES = ("move", "copy", "tag")
+SIDECAR_SUFFIX = ".json"
+
+# <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatchOptions:
+    """Settings of a hot-folder watch (see `HotFolder`)."""
+
+    def __init__(self, output_dir: Path | None = None, mode: str = "move", queue_size: int = 32,
+                 policy: str = "block", poll_interval: float = 1.0, settle: float = 0.5,
+                 use_inotify: bool = True):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode {mode!r}; expected one of {OUTPUT_MODES}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}; expected one of {POLICIES}")
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.mode = mode
+        self.queue_size = queue_size
+        self.policy = policy
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.use_inotify = use_inotify
+
+
+class Inotify:
+    """Close-write and moved-in events of one directory, through libc's inotify."""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> tuple[list[str], bool]:
+        """Names of files finished or moved in within `timeout`, and whether events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        names, overflow, offset = [], False, 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+            elif length:
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Report image files in a directory once they have been completely written.
+
+    On Linux, inotify close-write and moved-in events report local writes as
+    they finish. The directory is also scanned every `poll_interval` seconds.
+    The scan is the only mechanism elsewhere. It also catches network shares,
+    which don't report writes made by other machines. A scanned file counts as
+    finished once its size and mtime are unchanged between two scans and it is
+    at least `settle` seconds old. `on_file` runs on the watcher thread and may
+    block; that is how a full queue slows the watcher down.
+    """
+
+    def __init__(self, directory: Path, on_file, poll_interval: float = 1.0, settle: float = 0.5,
+                 use_inotify: bool = True):
+        self.directory = Path(directory)
+        self.on_file = on_file
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.use_inotify = use_inotify
+        self.using_inotify = False
+        # Files already reported, with the (size, mtime) they were reported at
+        self._reported = {}
+        # Scanned files waiting to look finished
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        inotify = None
+        if self.use_inotify and sys.platform.startswith("linux"):
+            try:
+                inotify = Inotify(self.directory)
+            except OSError:
+                inotify = None
+        self.using_inotify = inotify is not None
+
+        next_scan = 0.0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() >= next_scan:
+                    self._scan()
+                    next_scan = time.monotonic() + self.poll_interval
+                timeout = max(0.0, min(0.25, next_scan - time.monotonic()))
+                if inotify is None:
+                    self._stop.wait(timeout)
+                    continue
+                names, overflow = inotify.read(timeout)
+                if overflow:
+                    # The kernel dropped events (we were blocked too long); rescan now
+                    next_scan = 0.0
+                for name in names:
+                    self._offer(self.directory / name)
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _scan(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except OSError:
+            return
+        present = set()
+        now = time.time()
+        for entry in entries:
+            path = Path(entry.path)
+            present.add(path)
+            if self._stop.is_set() or not self._is_candidate(path):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._reported.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature and now - stat.st_mtime >= self.settle:
+                del self._pending[path]
+                self._offer(path)
+            else:
+                self._pending[path] = signature
+
+        # Forget files that have been moved away
+        for table in (self._reported, self._pending):
+            for path in [p for p in table if p not in present]:
+                del table[path]
+
+    def _is_candidate(self, path: Path) -> bool:
+        # Hidden files are usually partial uploads; a sidecar means the image was already scored
+        return (path.suffix.lower() in IMAGE_EXTENSIONS and not path.name.startswith(".")
+                and not path.with_name(path.name + SIDECAR_SUFFIX).exists())
+
+    def _offer(self, path: Path):
+        if not self._is_candidate(path):
+            return
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self._reported.get(path) == signature:
+            return
+        self._reported[path] = signature
+        self._pending.pop(path, None)
+        self.on_file(path)
+
+
+class WatchItem:
+    """An image picked up from the watched folder."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.detected_at = time.perf_counter()
+        self.detected_wall = time.time()
+
+
+class WatchQueue:
+    """Bounded FIFO of WatchItems with a policy for when it is full (see POLICIES)."""
+
+    def __init__(self, maxsize: int = 32, policy: str = "block"):
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._not_full = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item: WatchItem) -> WatchItem | None:
+        """Queue `item`; returns the item dropped to make room (or `item` itself), if any."""
+        with self._not_full:
+            if self.policy == "block":
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._not_full.wait()
+            elif len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == "drop-newest":
+                    return item
+                dropped = self._items.popleft()
+                self._items.append(item)
+                return dropped
+            if self._closed:
+                return None
+            self._items.append(item)
+            return None
+
+    def get(self) -> WatchItem | None:
+        with self._not_full:
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    def oldest(self) -> WatchItem | None:
+        with self._not_full:
+            return self._items[0] if self._items else None
+
+    def close(self):
+        with self._not_full:
+            self._closed = True
+            self._not_full.notify_all()
+
+
+class ResultRouter:
+    """File scored images into OK/NG folders and write a JSON sidecar next to each.
+
+    In copy mode the sidecar is also written next to the source, which stays in
+    the watched folder; `FolderWatcher` skips images that have one, so a restart
+    doesn't score and copy them again. Runs on its own thread, since moving files
+    on a network share can be slow.
+    """
+
+    def __init__(self, output_dir: Path, mode: str = "move", on_routed=None):
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        # Called with (source, destination) after an image has been filed
+        self.on_routed = on_routed
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="result-router", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Finish routing what has been scored before returning
+        self._jobs.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, item: WatchItem, status: str, record: dict):
+        self._jobs.put((item, status, record))
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                self._route(*job)
+            except OSError as e:
+                print(f"Could not route {job[0].path}: {str(e)}", file=sys.stderr)
+
+    def _route(self, item: WatchItem, status: str, record: dict):
+        source = item.path
+        if self.mode == "tag":
+            destination = source
+        else:
+            folder = self.output_dir / status
+            folder.mkdir(parents=True, exist_ok=True)
+            destination = self._unique(folder / source.name)
+            if self.mode == "move":
+                shutil.move(str(source), destination)
+            else:
+                shutil.copy2(source, destination)
+
+        record = {
+            "image": str(destination),
+            "source": str(source),
+            "status": status,
+            **record,
+            "detected_at": datetime.fromtimestamp(item.detected_wall, timezone.utc).isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "lag_s": time.perf_counter() - item.detected_at,
+        }
+        self._write_sidecar(destination, record)
+        if self.mode == "copy":
+            self._write_sidecar(source, record)
+        if self.on_routed is not None and destination != source and self.mode == "move":
+            self.on_routed(source, destination)
+
+    @staticmethod
+    def _write_sidecar(image_path: Path, record: dict):
+        sidecar = image_path.with_name(image_path.name + SIDECAR_SUFFIX)
+        tmp_path = sidecar.with_name(f".{sidecar.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, sidecar)
+
+    @staticmethod
+    def _unique(path: Path) -> Path:
+        # Cameras often restart their counters; never overwrite an earlier result
+        candidate, counter = path, 1
+        while candidate.exists():
+            candidate = path.with_name(f"{path.stem}_{counter}{path.suffix}")
+            counter += 1
+        return candidate
+
+
+class HotFolder(QObject):
+    """Score images as they land in a directory, one at a time, through the AIWorker.
+
+    The watcher thread fills a bounded WatchQueue. The GUI receives `dispatch`
+    with the next path and requests inference. It passes the worker's
+    `image_scored` back to `on_image_scored`, and the result is filed by the
+    ResultRouter. Only one image is in flight at a time, so the AIWorker's
+    coalescing never replaces a queued hot-folder image with the next one.
+    """
+
+    dispatch = pyqtSignal(str)
+    stats_changed = pyqtSignal()
+    _file_queued = pyqtSignal()
+
+    def __init__(self, directory: Path, options: WatchOptions | None = None, model_name: str = "",
+                 on_routed=None):
+        super().__init__()
+        options = options or WatchOptions()
+        self.directory = Path(directory)
+        self.options = options
+        self.model_name = model_name
+        self.threshold = 0.5
+        self.queue = WatchQueue(options.queue_size, options.policy)
+        self.router = ResultRouter(options.output_dir or self.directory, options.mode, on_routed)
+        self.watcher = FolderWatcher(
+            self.directory, self._on_file, options.poll_interval, options.settle, options.use_inotify)
+        self.counts = {"OK": 0, "NG": 0, "ERROR": 0, "SKIPPED": 0}
+        # Detection-to-result time of the last scored image
+        self.last_lag = 0.0
+        self.current = None
+        self._running = False
+        # Emitted from the watcher thread; delivered on this object's (the GUI) thread
+        self._file_queued.connect(self.dispatch_next)
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    @property
+    def lag(self) -> float:
+        """Age of the oldest image not yet scored (0 when idle)."""
+        oldest = self.current or self.queue.oldest()
+        return time.perf_counter() - oldest.detected_at if oldest is not None else 0.0
+
+    def start(self):
+        if not self.directory.is_dir():
+            raise NotADirectoryError(f"Not a directory: {self.directory}")
+        self._running = True
+        self.router.start()
+        self.watcher.start()
+
+    def stop(self):
+        self._running = False
+        self.queue.close()
+        self.watcher.stop()
+        self.router.stop()
+
+    def _on_file(self, path: Path):
+        dropped = self.queue.put(WatchItem(path))
+        if dropped is not None:
+            self.counts["SKIPPED"] += 1
+            self.router.submit(dropped, "SKIPPED", {"error": "Inference fell behind; queue full"})
+        self._file_queued.emit()
+
+    def dispatch_next(self):
+        if not self._running or self.current is not None:
+            self.stats_changed.emit()
+            return
+        self.current = self.queue.get()
+        if self.current is not None:
+            self.dispatch.emit(str(self.current.path))
+        self.stats_changed.emit()
+
+    def on_image_scored(self, image_path, score, inference_time, error):
+        item = self.current
+        if item is None or str(item.path) != image_path:
+            return
+        self.current = None
+        self.last_lag = time.perf_counter() - item.detected_at
+
+        record = {"model": self.model_name, "threshold": self.threshold}
+        if error:
+            status = "ERROR"
+            record["error"] = error
+        else:
+            label = score_to_label(score, self.threshold)
+            status = "OK" if label == "Normal" else "NG"
+            record.update(score=score, label=label, inference_time=inference_time)
+        self.counts[status] += 1
+        self.router.submit(item, status, record)
+        self.dispatch_next()
@@ -1,70 +1,279 @@
+import time
 from pathlib import Path
 
-from PIL import Image
 from PyQt5.QtCore import QObject, pyqtSignal
-from PyQt5.QtGui import QImage
 
-from ai.inference import generate_visuals, get_inferencer, run_inference_core
+from ai.cache import PredictionCache
+from ai.history import ResultHistory
+from ai.imaging import DECODED_IMAGES, BufferPool, fit_to_model
+from ai.inference import extract_score, run_inference_core
+from ai.metrics import span
+from ai.process_backend import InferenceProcessPool
+from ai.registry import ModelRegistry
+from ai.remote import DEFAULT_SERVER_URL, InferenceClient
+from ai.render import RenderCache
+from ai.scheduler import INTERACTIVE, WorkScheduler
+from ai.tiling import known_input_size, run_tiled_inference, tiled_variant
 
 
 class AIWorker(QObject):
     model_loaded = pyqtSignal()
-    inference_finished = pyqtSignal(QImage, QImage, float, float, str)
+    # Heat map and segmentation are ai.imaging.FrameBuffers: QImages over numpy memory
+    # that must stay referenced until the GUI has converted them to pixmaps
+    inference_finished = pyqtSignal(object, object, float, float, str)
     error_occurred = pyqtSignal(str)
+    # (image path, score, inference time, error): every requested image, even if no
+    # longer on screen; the hot folder uses it to file results
+    image_scored = pyqtSignal(str, float, float, str)
+    # A compact copy of a new result was added to `history`
+    result_recorded = pyqtSignal()
+    # ai.segmentation.Segmentation of the image on screen at the pixel threshold;
+    # None while the model's own mask is shown
+    segmentation_updated = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
         self.inferencer = None
+        self.model_hash = None
+        self.model_name = ""
+        # Runtime the current model was loaded with (see ai/runtimes.py)
+        self.runtime_name = ""
+        # (height, width) images are resized to before a non-tiled predict; None if unknown
+        self.model_size = None
+        self.model_registry = ModelRegistry()
+        self.prediction_cache = PredictionCache()
         self.cached_image = None
         self.cached_predictions = None
         self.cached_time = None
+        self.render_cache = None
+        self.buffer_pool = BufferPool()
+        # Full-resolution tiled inference for images much larger than the model input
+        self.tiled = False
+        self.thickness = 3
+        # Re-segment the anomaly map at this value instead of using the model's mask
+        self.pixel_threshold = None
+        # (render cache, inference time, inference generation) of the newest completed prediction
+        self._render_state = None
+        # Inference generation of the result on screen; only ever grows
+        self._shown_generation = 0
+        self.scheduler = WorkScheduler()
+        # Compact, memory-budgeted records of past results for the history gallery
+        self.history = ResultHistory()
+
+    # Slots: queued from the GUI thread. They only schedule work, so a burst of
+    # requests never piles up behind a long-running job.
 
     def load_model(self, model_path):
+        self.scheduler.submit("model", self._load_model, model_path)
+
+    def set_runtime(self, runtime):
+        # Used by the next load; "" picks by file extension, "auto" the fastest
+        self.model_registry.runtime = runtime
+
+    def run_inference(self, image_path, thickness=3):
+        self.thickness = thickness
+        # The last completed result keeps rendering until this one replaces it: under
+        # steady load a newer request is always pending, and dropping results for it
+        # would leave the screen frozen
+        self.scheduler.submit("inference", self._run_inference, image_path)
+
+    def show_record(self, record):
+        """Bring a history record back on screen, rendered from its stored map and mask."""
+        self.scheduler.submit("inference", self._show_record, record)
+
+    def update_contours(self, thickness):
+        # Pending renders collapse to the latest thickness
+        self.thickness = thickness
+        self.scheduler.submit("render", self._render, lane=INTERACTIVE)
+
+    def update_pixel_threshold(self, threshold):
+        # None switches back to the model's mask; like thickness, nothing is re-inferred
+        self.pixel_threshold = threshold
+        self.scheduler.submit("render", self._render, lane=INTERACTIVE)
+
+    def shutdown(self):
+        self.scheduler.stop()
+        self.history.close()
+
+    # Jobs, run on the scheduler's lanes
+
+    def _load_model(self, generation, model_path):
         try:
-            self.inferencer = get_inferencer(Path(model_path))
+            # Already-loaded models come straight out of the registry's warm pool
+            loaded_model = self.model_registry.get(Path(model_path))
+            if not self.scheduler.is_current("model", generation):
+                return
+            self.inferencer = loaded_model.inferencer
+            self.model_hash = loaded_model.model_hash
+            self.model_name = Path(model_path).name
+            self.runtime_name = loaded_model.runtime
+            self.model_size = known_input_size(loaded_model.inferencer)
             self.model_loaded.emit()
         except Exception as e:
             self.error_occurred.emit(f"Load Error: {str(e)}")
 
-    def run_inference(self, image_path, thickness=3):
-        if not self.inferencer:
+    def _run_inference(self, generation, image_path):
+        model_hash = self.model_hash
+        if model_hash is None:
             self.error_occurred.emit("Model not loaded.")
             return
 
         try:
-            # Load and cache image
-            self.cached_image = Image.open(image_path).convert("RGB")
-            
-            # Run inference and cache
-            self.cached_predictions, self.cached_time = run_inference_core(
-                self.cached_image, self.inferencer)
-            
-            self.update_contours(thickness)
+            with span("worker.run_inference"):
+                # Load and cache image (shares the decode the GUI did to display it)
+                with span("worker.decode"):
+                    decoded = DECODED_IMAGES.get(image_path)
+
+                # Reuse predictions for this image/model pair if we've scored it before
+                start_time = time.perf_counter()
+                tiled = self.tiled
+                cache_key = PredictionCache.make_key(decoded.content_hash, model_hash, self._cache_variant(tiled))
+                with span("worker.cache_lookup"):
+                    predictions = self.prediction_cache.get(cache_key)
+                if predictions is not None:
+                    inference_time = time.perf_counter() - start_time
+                else:
+                    # Run inference and cache. The full-resolution decode stays for display; the
+                    # model gets one resize to its input size instead of the whole frame
+                    image = decoded.array
+                    if not tiled and self.model_size is not None:
+                        with span("worker.fit_to_model"):
+                            image = fit_to_model(image, self.model_size)
+                    predictions, inference_time = self._predict(image, tiled, image_path)
+                    with span("worker.cache_store"):
+                        predictions = self.prediction_cache.put(cache_key, predictions)
+            # Recorded before the hot folder hears of it, so a move can relocate the record
+            with span("worker.history"):
+                self.history.add(image_path, decoded.content_hash, self.model_name, predictions, inference_time)
+            self.result_recorded.emit()
+            self.image_scored.emit(str(image_path), extract_score(predictions), inference_time, "")
+            # Shown even if a newer image is already queued; it replaces this one when done
+            self._show(generation, decoded.array, predictions, inference_time)
 
         except Exception as e:
+            self.image_scored.emit(str(image_path), 0.0, 0.0, str(e))
             self.error_occurred.emit(f"Inference Error: {str(e)}")
 
-    def update_contours(self, thickness):
-        if self.cached_image is None or self.cached_predictions is None or self.cached_time is None:
+    def _show_record(self, generation, record):
+        try:
+            decoded = DECODED_IMAGES.get(record.image_path)
+            predictions = record.prediction()
+            self._show(generation, decoded.array, predictions, record.inference_time)
+        except Exception as e:
+            self.error_occurred.emit(f"History Error: {str(e)}")
+
+    def _show(self, generation, image, predictions, inference_time):
+        self.cached_image = image
+        self.cached_predictions = predictions
+        self.cached_time = inference_time
+        self.render_cache = RenderCache(self.cached_image, predictions, self.buffer_pool)
+        self._render_state = (self.render_cache, inference_time, generation)
+        self.scheduler.submit("render", self._render, lane=INTERACTIVE)
+
+    def _cache_variant(self, tiled):
+        """How the model sees the image, so fitted, full-size and tiled predictions don't mix."""
+        if tiled:
+            # Tiles are the model input size; unknown sizes share the "model" default
+            return tiled_variant(self.model_size)
+        return "fit" if self.model_size is not None else "full"
+
+    def _predict(self, image, tiled, image_path):
+        """Run the model on a decoded image; returns (predictions, inference_time)."""
+        infer = run_tiled_inference if tiled else run_inference_core
+        return infer(image, self.inferencer)
+
+    def _render(self, generation):
+        if self._render_state is None:
             return
+        render_cache, inference_time, inference_generation = self._render_state
 
         try:
-            # Generate visuals from cache
-            heat_map, segmentation, inf_time, score, label = generate_visuals(
-                self.cached_image, self.cached_predictions, self.cached_time, thickness
-            )
-            
-            # Convert PIL images to QImage inside the thread for efficiency
-            def pil2qimage(pil_image):
-                if pil_image.mode != "RGBA":
-                    pil_image = pil_image.convert("RGBA")
-                data = pil_image.tobytes("raw", "RGBA")
-                qimage = QImage(data, pil_image.width, pil_image.height, QImage.Format_RGBA8888)
-                return qimage.copy()
-
-            qt_heat_map = pil2qimage(heat_map)
-            qt_segmentation = pil2qimage(segmentation)
-
-            self.inference_finished.emit(qt_heat_map, qt_segmentation, inf_time, score, label)
+            # The heat map is rendered once per prediction; a thickness change only redraws contours
+            with span("worker.update_contours"):
+                heat_map = render_cache.heat_map()
+                segmentation = render_cache.segmentation(self.thickness, self.pixel_threshold)
+
+            # Never replace a newer result on screen with an older one
+            if inference_generation < self._shown_generation:
+                return
+            self._shown_generation = inference_generation
+            self.inference_finished.emit(
+                heat_map, segmentation, inference_time, render_cache.score, render_cache.label)
+            self.segmentation_updated.emit(render_cache.segmentation_result)
         except Exception as e:
             self.error_occurred.emit(f"Visualization Error: {str(e)}")
+
+
+class ProcessAIWorker(AIWorker):
+    """AIWorker whose model runs in separate processes (see ai/process_backend.py).
+
+    Decoding, caching and rendering stay in the GUI process; only the model call
+    moves, so the signals and everything the GUI sees are unchanged.
+    """
+
+    def __init__(self, num_workers: int = 1):
+        super().__init__()
+        self.pool = InferenceProcessPool(num_workers)
+
+    def shutdown(self):
+        super().shutdown()
+        self.pool.close()
+
+    def _load_model(self, generation, model_path):
+        try:
+            model_hash, model_size = self.pool.load_model(model_path)
+            if not self.scheduler.is_current("model", generation):
+                return
+            self.model_hash = model_hash
+            # Like the thread backend: fit images before they go through shared memory
+            self.model_size = model_size
+            self.model_name = Path(model_path).name
+            self.model_loaded.emit()
+        except Exception as e:
+            self.error_occurred.emit(f"Load Error: {str(e)}")
+
+    def _predict(self, image, tiled, image_path):
+        return self.pool.predict(image, tiled)
+
+
+class RemoteAIWorker(AIWorker):
+    """AIWorker that sends images to an inference server (server.py).
+
+    The server owns the model: loading a model here only checks that the server
+    serves a model with the same file name. The encoded image file is uploaded
+    as-is, so the server decodes exactly the bytes the GUI shows.
+    """
+
+    def __init__(self, url: str = DEFAULT_SERVER_URL, pool_size: int = 4):
+        super().__init__()
+        self.client = InferenceClient(url, pool_size)
+        # The server fits images to its model's input size when it knows it
+        self.server_input_size = None
+
+    def shutdown(self):
+        super().shutdown()
+        self.client.close()
+
+    def _load_model(self, generation, model_path):
+        try:
+            info = self.client.health()
+            if info["model"] not in ("fake", Path(model_path).name):
+                raise RuntimeError(f"{self.client.url} serves {info['model']}, not {Path(model_path).name}")
+            if not self.scheduler.is_current("model", generation):
+                return
+            self.model_hash = info["model_hash"]
+            self.server_input_size = tuple(info["input_size"]) if info.get("input_size") else None
+            self.model_name = Path(model_path).name
+            self.model_loaded.emit()
+        except Exception as e:
+            self.error_occurred.emit(f"Load Error: {str(e)}")
+
+    def _cache_variant(self, tiled):
+        if tiled:
+            return tiled_variant(self.server_input_size)
+        # The server decodes in draft mode (decode_reduced), like batch_inference.py
+        return "fit-draft" if self.server_input_size is not None else "full"
+
+    def _predict(self, image, tiled, image_path):
+        prediction, inference_time, _ = self.client.predict_encoded(Path(image_path).read_bytes(), tiled)
+        return prediction, inference_time
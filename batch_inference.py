@@ -0,0 +1,257 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+# Set environment variable as in main.py
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+from ai.batching import MicroBatcher
+from ai.cache import DEFAULT_CACHE_DIR, PredictionCache
+from ai.imaging import IMAGE_EXTENSIONS, EncodedImage
+from ai.inference import extract_score, generate_visuals, run_inference_core, score_to_label
+from ai.metrics import METRICS, MetricsExporter
+from ai.openvino_async import add_profile_arguments, profile_from_args
+from ai.pipeline import Pipeline
+from ai.registry import ModelRegistry
+from ai.runtimes import add_runtime_argument
+from ai.tiling import DEFAULT_TILE_OVERLAP, known_input_size, run_tiled_inference, tiled_variant
+
+CSV_FIELDS = [
+    "index", "path", "score", "label", "cached", "decode_time", "inference_time", "render_time", "error",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder of images without the GUI.")
+    parser.add_argument("--model", required=True, type=Path, help="Model weights file.")
+    parser.add_argument("--input", required=True, type=Path, help="Image folder (or a single image).")
+    parser.add_argument("--output", required=True, type=Path, help="Results file (.jsonl or .csv).")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="Output format. Defaults to the extension of --output.")
+    parser.add_argument("--visuals-dir", type=Path, default=None,
+                        help="If set, write heat map and segmentation images here.")
+    parser.add_argument("--recursive", action="store_true", help="Search sub-folders too.")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Decision threshold for labels.")
+    parser.add_argument("--thickness", type=int, default=3, help="Contour thickness for visuals.")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Max images per predict call (micro-batching).")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Max time a request waits for its batch to fill up.")
+    parser.add_argument("--tile", action="store_true",
+                        help="Score each image at full resolution on overlapping model-sized tiles. "
+                             "--batch-size then sets the number of tiles per predict call.")
+    parser.add_argument("--tile-size", type=str, default=None,
+                        help="Tile size as HEIGHTxWIDTH (or one number). Defaults to the model input size.")
+    parser.add_argument("--tile-overlap", type=float, default=DEFAULT_TILE_OVERLAP,
+                        help="Fraction of a tile shared with its neighbours.")
+    parser.add_argument("--full-res-input", action="store_true",
+                        help="Feed the model full-resolution images instead of decoding at its input size.")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="Prediction cache shared with the GUI.")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the model.")
+    parser.add_argument("--metrics-file", type=Path, default=None,
+                        help="Export stage latency metrics here (.prom for Prometheus text, else JSONL).")
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--render-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="Capacity of each queue between stages.")
+    add_profile_arguments(parser)
+    add_runtime_argument(parser)
+    args = parser.parse_args(argv)
+    for option in ("decode_workers", "render_workers", "batch_size"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    return args
+
+
+def parse_tile_size(value):
+    if value is None:
+        return None
+    parts = [int(v) for v in value.lower().split("x")]
+    return (parts[0], parts[-1])
+
+
+def list_images(root: Path, recursive: bool = False):
+    if root.is_file():
+        return [root]
+    pattern = "**/*" if recursive else "*"
+    return sorted(p for p in root.glob(pattern) if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+class ResultWriter:
+    """Thread-safe JSONL/CSV writer for per-image results."""
+
+    def __init__(self, path: Path, fmt: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self._file = open(path, "w", newline="")
+        self._lock = threading.Lock()
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        with self._lock:
+            if self._csv is not None:
+                self._csv.writerow(record)
+            else:
+                self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fmt = args.format or ("csv" if args.output.suffix.lower() == ".csv" else "jsonl")
+
+    paths = list_images(args.input, args.recursive)
+    if not paths:
+        print(f"No images found in {args.input}", file=sys.stderr)
+        return 1
+
+    print(f"Loading model {args.model} ...")
+    # Loading through the registry gives us a warmed-up model and its hash
+    openvino_profile = profile_from_args(args)
+    loaded_model = ModelRegistry(openvino_profile=openvino_profile, runtime=args.runtime).get(args.model)
+    inferencer = loaded_model.inferencer
+    model_hash = loaded_model.model_hash
+    print(f"Model loaded with {loaded_model.runtime} in {loaded_model.load_time:.2f}s "
+          f"(warm-up {loaded_model.warmup_time:.2f}s)")
+    cache = None if args.no_cache else PredictionCache(args.cache_dir)
+    # AsyncOpenVINOInferencer keeps `jobs` requests in flight, one per predict worker
+    inflight = getattr(inferencer, "jobs", 1)
+    if (loaded_model.runtime == "openvino" and openvino_profile.hint == "THROUGHPUT"
+            and inflight == 1 and args.batch_size == 1):
+        print("Warning: THROUGHPUT with one request in flight runs like LATENCY; "
+              "raise --ov-jobs or --batch-size.", file=sys.stderr)
+
+    if args.visuals_dir is not None:
+        args.visuals_dir.mkdir(parents=True, exist_ok=True)
+
+    # Decode JPEGs at reduced resolution straight to the model input size; the full
+    # image is then only decoded when visuals are drawn over it
+    model_size = None if args.tile or args.full_res_input else known_input_size(inferencer)
+
+    batcher = None
+    predict_fn = lambda image: run_inference_core(image, inferencer)
+    # Predictions from reduced and full-resolution inputs differ, so they are cached apart.
+    # A draft-mode decode gives other pixels than the GUI's full decode and resize ("fit")
+    variant = "fit-draft" if model_size is not None else "full"
+    if args.tile:
+        # Resolved here so the cache variant names the tiling actually used
+        tile_size = parse_tile_size(args.tile_size) or known_input_size(inferencer)
+        variant = tiled_variant(tile_size, args.tile_overlap)
+        predict_fn = lambda image: run_tiled_inference(
+            image, inferencer, tile_size, args.tile_overlap, max(1, args.batch_size))
+    elif args.batch_size > 1:
+        batcher = MicroBatcher(inferencer, args.batch_size, args.max_wait_ms / 1000.0)
+        predict_fn = batcher.predict
+
+    writer = ResultWriter(args.output, fmt)
+    counts = {"ok": 0, "error": 0}
+
+    def decode(job):
+        start = time.perf_counter()
+        try:
+            job["image"] = EncodedImage(Path(job["path"]).read_bytes(), model_size)
+            job["input"] = job["image"].model_input()
+            if cache is not None:
+                job["cache_key"] = PredictionCache.make_key(job["image"].content_hash, model_hash, variant)
+        except Exception as e:
+            job["error"] = f"Decode Error: {str(e)}"
+        job["decode_time"] = time.perf_counter() - start
+        return job
+
+    def predict(job):
+        if "error" not in job:
+            try:
+                cached = cache.get(job["cache_key"]) if cache is not None else None
+                job["cached"] = cached is not None
+                if cached is not None:
+                    job["predictions"], job["inference_time"] = cached, 0.0
+                else:
+                    job["predictions"], job["inference_time"] = predict_fn(job.pop("input"))
+                    if cache is not None:
+                        job["predictions"] = cache.put(job["cache_key"], job["predictions"])
+                job["score"] = extract_score(job["predictions"])
+                job["label"] = score_to_label(job["score"], args.threshold)
+            except Exception as e:
+                job["error"] = f"Inference Error: {str(e)}"
+        return job
+
+    def render(job):
+        if "error" not in job and args.visuals_dir is not None:
+            start = time.perf_counter()
+            try:
+                # The full-resolution decode happens here, and only when visuals are written
+                image = Image.fromarray(job["image"].full)
+                heat_map, segmentation, *_ = generate_visuals(
+                    image, job["predictions"], job["inference_time"], args.thickness)
+                stem = f"{job['index']:06d}_{Path(job['path']).stem}"
+                heat_map.save(args.visuals_dir / f"{stem}_heatmap.png")
+                segmentation.save(args.visuals_dir / f"{stem}_segmentation.png")
+            except Exception as e:
+                job["error"] = f"Visualization Error: {str(e)}"
+            job["render_time"] = time.perf_counter() - start
+        return job
+
+    def write(job):
+        record = {key: job.get(key) for key in CSV_FIELDS}
+        writer.write(record)
+        counts["error" if "error" in job else "ok"] += 1
+        return None
+
+    pipeline = Pipeline(queue_size=args.queue_size)
+    pipeline.add_stage("decode", decode, workers=args.decode_workers)
+    # One predict worker per batch slot so the batcher can fill whole batches. Without
+    # batching, one worker per async request keeps every CPU stream busy; a synchronous
+    # inferencer already uses all cores with a single worker
+    pipeline.add_stage("predict", predict, workers=args.batch_size if batcher else inflight)
+    pipeline.add_stage("render", render, workers=args.render_workers)
+    pipeline.add_stage("write", write, workers=1)
+
+    jobs = ({"index": i, "path": str(p)} for i, p in enumerate(paths))
+
+    exporter = MetricsExporter(args.metrics_file).start() if args.metrics_file else None
+
+    start = time.perf_counter()
+    try:
+        pipeline.run(jobs)
+    finally:
+        writer.close()
+        if batcher is not None:
+            batcher.close()
+        if exporter is not None:
+            exporter.stop()
+    elapsed = time.perf_counter() - start
+
+    for stage_name, job, error in pipeline.errors:
+        print(f"[{stage_name}] {job.get('path')}: {error}", file=sys.stderr)
+
+    total = counts["ok"] + counts["error"]
+    print(f"Processed {total} images ({counts['error']} errors) in {elapsed:.2f}s "
+          f"-> {total / elapsed if elapsed > 0 else 0.0:.2f} images/sec")
+    for stage in pipeline.stages:
+        if stage.items:
+            print(f"  {stage.name:<8} {stage.busy_time / stage.items * 1000:8.2f} ms/image "
+                  f"x{stage.workers} workers")
+    if cache is not None:
+        print(f"  cache hits {cache.hits}, misses {cache.misses}")
+    if batcher is not None and batcher.batches:
+        print(f"  mean batch size {batcher.batched_images / batcher.batches:.2f}")
+    print(METRICS.format_table())
+    print(f"Results written to {args.output}")
+    return 0 if counts["error"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Stage-level benchmark of the inference and display path.
+
+Times image load (full and reduced-resolution), `run_inference_core`, tiled inference, `generate_visuals`,
+pixel-threshold re-segmentation, QImage conversion, pixmap conversion, `FluidImageLabel.update_display` and the
+tile-pyramid viewer over a range of image sizes, using the deterministic
+FakeInferencer so no model weights are needed.
+
+    python -m benchmarks.bench_stages --output bench.json
+    python -m benchmarks.bench_stages --output new.json --compare bench.json
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Render Qt widgets without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from ai.fake_inferencer import FakeInferencer
+from ai.imaging import FrameBuffer, decode_reduced, decode_rgb, fit_to_model, pil_to_frame
+from ai.inference import generate_visuals, run_inference_core
+from ai.render import RenderCache
+from ai.segmentation import PixelSegmenter
+from ai.tiling import run_tiled_inference
+from gui.widgets import FluidImageLabel, TiledImageView
+
+DEFAULT_SIZES = "640x480,1920x1080,4096x3000,5472x3648"
+PERCENTILES = (50, 95, 99)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated WIDTHxHEIGHT list.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--format", choices=["png", "jpeg"], default="jpeg",
+                        help="Encoding of the synthetic input images.")
+    parser.add_argument("--output", default=None, help="Write results JSON here.")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against.")
+    return parser.parse_args(argv)
+
+
+def synthetic_image(width, height, seed=0) -> Image.Image:
+    """Smooth gradient plus noise, so encoders do realistic work."""
+    rng = np.random.default_rng(seed)
+    ys = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    xs = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    base = (ys + xs) / 2
+    noise = rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+    array = np.clip(base[..., None] + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(array)
+
+
+def time_stage(func, iterations, warmup):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples_ms = np.asarray(samples) * 1000.0
+    summary = {f"p{p}_ms": float(np.percentile(samples_ms, p)) for p in PERCENTILES}
+    summary["mean_ms"] = float(samples_ms.mean())
+    summary["n"] = len(samples)
+    return summary
+
+
+def bench_size(width, height, args, inferencer):
+    pil_image = synthetic_image(width, height)
+    encoded = io.BytesIO()
+    pil_image.save(encoded, format=args.format.upper())
+    data = encoded.getvalue()
+
+    image = decode_rgb(data)
+    predictions, inference_time = run_inference_core(image, inferencer)
+    _, segmentation, *_ = generate_visuals(pil_image, predictions, inference_time)
+    fitted = fit_to_model(image, inferencer.map_size)
+    frame = FrameBuffer(image)
+
+    label = FluidImageLabel()
+    label.resize(800, 600)
+    label.set_image(_to_pixmap(frame))
+    view = TiledImageView()
+    view.resize(800, 600)
+
+    def render_cache():
+        render = RenderCache(image, predictions)
+        render.heat_map()
+        render.segmentation(3)
+
+    # One segmenter, as while dragging the pixel-threshold slider: only the re-segmentation is timed
+    segmenter = PixelSegmenter(predictions.anomaly_map, width, height)
+    pixel_thresholds = itertools.cycle(np.linspace(segmenter.low, segmenter.high, 37)[1:-1])
+
+    stages = {
+        "image_load": lambda: decode_rgb(data),
+        # Decode + predict at the model input size vs. the full-resolution path above
+        "image_load_reduced": lambda: decode_reduced(data, inferencer.map_size),
+        "run_inference_core": lambda: run_inference_core(image, inferencer),
+        "run_inference_core_fitted": lambda: run_inference_core(fitted, inferencer),
+        "run_tiled_inference": lambda: run_tiled_inference(image, inferencer),
+        "generate_visuals": lambda: generate_visuals(pil_image, predictions, inference_time),
+        "render_cache": render_cache,
+        "pixel_threshold_segment": lambda: segmenter.segment(next(pixel_thresholds)),
+        "qimage_conversion": lambda: pil_to_frame(segmentation),
+        "pixmap_conversion": lambda: _to_pixmap(frame),
+        "update_display": label.update_display,
+        # Tile-pyramid view: new image (builds the level needed), then a repaint (e.g. on resize)
+        "tiled_view_set_image": lambda: view.set_image(frame),
+        "tiled_view_paint": view.grab,
+    }
+    return {name: time_stage(func, args.iterations, args.warmup) for name, func in stages.items()}
+
+
+def _to_pixmap(frame):
+    return QPixmap.fromImage(frame.qimage)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print the relative change of p50/p95 per stage against a baseline run."""
+    print(f"\nComparison against {baseline['meta'].get('revision')}:")
+    print(f"{'size':>12} {'stage':<20} {'p50 ms':>10} {'Δp50':>8} {'p95 ms':>10} {'Δp95':>8}")
+    for size, stages in results["results"].items():
+        for stage, stats in stages.items():
+            base = baseline["results"].get(size, {}).get(stage)
+            if base is None:
+                continue
+            deltas = [
+                (stats[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+                for key in ("p50_ms", "p95_ms")
+            ]
+            print(f"{size:>12} {stage:<20} {stats['p50_ms']:10.2f} {deltas[0]:+7.1f}% "
+                  f"{stats['p95_ms']:10.2f} {deltas[1]:+7.1f}%")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Keep a reference: widgets and pixmaps need a live QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    inferencer = FakeInferencer()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            # Pixmap conversions cost differently per Qt platform plugin (e.g. offscreen vs xcb)
+            "qt_platform": app.platformName(),
+            "iterations": args.iterations,
+            "format": args.format,
+        },
+        "results": {},
+    }
+    for size in args.sizes.split(","):
+        width, height = (int(v) for v in size.lower().split("x"))
+        print(f"Benchmarking {width}x{height} ...", file=sys.stderr)
+        results["results"][f"{width}x{height}"] = bench_size(width, height, args, inferencer)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
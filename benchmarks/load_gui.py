@@ -0,0 +1,449 @@
+"""GUI load test: event-loop responsiveness of the real InferenceGUI under sustained inference.
+
+Runs the main window on Qt's offscreen platform with a FakeInferencer behind the
+normal AIWorker. Images are opened and inferred at --rate per second, and the
+contour thickness is changed at --contour-rate per second. It measures:
+
+- event-loop lag, with a fine-grained timer on the GUI thread;
+- request-to-display latency: from the request to its result reaching the
+  screen. Results that came late (over --deadline-ms) or never reached the
+  screen are counted;
+- displayed frames per second; the run fails below --min-fps;
+- resident memory over time.
+
+The report is JSON and can be compared against an earlier run:
+
+    python -m benchmarks.load_gui --duration 30 --rate 30 --output gui.json
+    python -m benchmarks.load_gui --output new.json --compare gui.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Render Qt widgets without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+import numpy as np
+from PyQt5.QtCore import QSettings, QStandardPaths, Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from ai.fake_inferencer import FakeInferencer
+from ai.metrics import METRICS
+from ai.tiling import known_input_size
+from ai.worker import AIWorker
+from benchmarks.bench_stages import PERCENTILES, git_revision, synthetic_image
+from gui.main_window import InferenceGUI
+
+# Period of the timer that probes the event loop
+PROBE_INTERVAL_MS = 5
+# Lags above these count as visible stalls
+STALL_THRESHOLDS_MS = (50, 100, 250)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of load excluded from the statistics.")
+    parser.add_argument("--rate", type=float, default=30.0, help="Inference requests per second.")
+    parser.add_argument("--contour-rate", type=float, default=10.0,
+                        help="Contour-thickness changes per second (0 = none).")
+    parser.add_argument("--fake-latency-ms", type=float, default=20.0, help="Emulated model time per predict.")
+    parser.add_argument("--size", default="1920x1080", help="WIDTHxHEIGHT of the synthetic images.")
+    parser.add_argument("--images", type=int, default=16, help="Distinct images to cycle through.")
+    parser.add_argument("--deadline-ms", type=float, default=200.0,
+                        help="Results displayed later than this after their request count as late.")
+    parser.add_argument("--min-fps", type=float, default=1.0,
+                        help="Fail the run if fewer results than this reach the screen per second.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the prediction cache (then repeated images skip the model).")
+    parser.add_argument("--signals-only", action="store_true",
+                        help="Emit request_inference/request_contour_update directly instead of going "
+                             "through open_image and the sliders.")
+    parser.add_argument("--memory-interval", type=float, default=1.0, help="Seconds between RSS samples.")
+    parser.add_argument("--output", default=None, help="Write the report JSON here.")
+    parser.add_argument("--compare", default=None, help="Baseline report JSON to compare against.")
+    return parser.parse_args(argv)
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak where the current one isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, KiB elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles_ms(samples):
+    if not samples:
+        return {}
+    samples_ms = np.asarray(samples) * 1000.0
+    summary = {f"p{p}_ms": float(np.percentile(samples_ms, p)) for p in PERCENTILES}
+    summary["mean_ms"] = float(samples_ms.mean())
+    summary["max_ms"] = float(samples_ms.max())
+    return summary
+
+
+class NoPredictionCache:
+    """Stands in for the worker's PredictionCache so every request runs the model."""
+
+    hits = 0
+    misses = 0
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def put(self, key, predictions):
+        return predictions
+
+
+class FakeAIWorker(AIWorker):
+    """AIWorker whose model is a FakeInferencer; everything past the model is real.
+
+    `result_shown` reports (inference generation, image path) each time a result
+    is sent to the screen, so the driver can tell which request it answers.
+    """
+
+    result_shown = pyqtSignal(int, str)
+
+    def __init__(self, latency: float = 0.0, cache: bool = False):
+        super().__init__()
+        self.fake_latency = latency
+        if not cache:
+            self.prediction_cache = NoPredictionCache()
+        self._paths = {}
+        # Direct, so it runs on the render thread right after `_shown_generation` is set
+        self.inference_finished.connect(self._on_shown, Qt.DirectConnection)
+
+    def _run_inference(self, generation, image_path):
+        self._paths[generation] = image_path
+        super()._run_inference(generation, image_path)
+
+    def _on_shown(self, *_):
+        generation = self._shown_generation
+        path = self._paths.get(generation)
+        # Older results can't be shown any more
+        for older in [g for g in list(self._paths) if g < generation]:
+            del self._paths[older]
+        if path is not None:
+            self.result_shown.emit(generation, path)
+
+    def _load_model(self, generation, model_path):
+        inferencer = FakeInferencer(latency=self.fake_latency)
+        if not self.scheduler.is_current("model", generation):
+            return
+        self.inferencer = inferencer
+        self.model_hash = "fake"
+        self.model_name = "fake"
+        self.runtime_name = "fake"
+        self.model_size = known_input_size(inferencer)
+        self.model_loaded.emit()
+
+
+class EventLoopProbe:
+    """Measure how late a short repeating timer fires on the GUI thread."""
+
+    def __init__(self, interval_ms: int = PROBE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples = []  # (time, lag seconds)
+        self._last = None
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self):
+        self._last = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.samples.append((now, max(0.0, now - self._last - self.interval)))
+        self._last = now
+
+
+class LoadDriver:
+    """Drive a window with inference and contour requests; match results to requests."""
+
+    def __init__(self, window: InferenceGUI, image_paths, args):
+        self.window = window
+        self.args = args
+        self._paths = itertools.cycle(image_paths)
+        self._thickness = itertools.cycle(list(range(1, 21)) + list(range(19, 1, -1)))
+        self.pending = deque()  # (time sent, path), oldest first
+        self.sent = 0
+        self.scored = 0
+        self.latencies = []  # (time sent, request-to-display seconds)
+        self.dropped = []  # times of requests whose result never reached the screen
+        self.errors = []
+        self.frames = []  # times a new result reached the GUI
+        self.modal_dialogs = 0
+        self._last_shown = 0
+
+        self.infer_timer = self._timer(args.rate, self._request_inference)
+        self.contour_timer = self._timer(args.contour_rate, self._change_contour)
+        # Error dialogs would block the run waiting for a click
+        self.dialog_timer = self._timer(10.0, self._dismiss_dialogs)
+
+        # Connected after the window's own slots; result_shown is emitted after
+        # inference_finished, so it runs once the GUI has displayed the result
+        window.ai_worker.image_scored.connect(self._on_image_scored)
+        window.ai_worker.result_shown.connect(self._on_result_shown)
+
+    @staticmethod
+    def _timer(rate, callback):
+        if rate <= 0:
+            return None
+        timer = QTimer()
+        timer.setTimerType(Qt.PreciseTimer)
+        timer.setInterval(max(1, int(round(1000.0 / rate))))
+        timer.timeout.connect(callback)
+        return timer
+
+    def start(self):
+        for timer in (self.infer_timer, self.contour_timer, self.dialog_timer):
+            if timer is not None:
+                timer.start()
+
+    def stop(self):
+        for timer in (self.infer_timer, self.contour_timer):
+            if timer is not None:
+                timer.stop()
+
+    def _request_inference(self):
+        path = next(self._paths)
+        self.pending.append((time.perf_counter(), path))
+        self.sent += 1
+        if self.args.signals_only:
+            self.window.request_inference.emit(path, self.window.contour_slider.value())
+        else:
+            self.window.open_image(path)
+            self.window.run_inference()
+
+    def _change_contour(self):
+        thickness = next(self._thickness)
+        if self.args.signals_only:
+            self.window.request_contour_update.emit(thickness)
+        else:
+            self.window.contour_slider.setValue(thickness)
+
+    def _on_image_scored(self, path, score, inference_time, error):
+        self.scored += 1
+        if error:
+            self.errors.append(error)
+
+    def _on_result_shown(self, generation, path):
+        # Contour re-renders show the same result again
+        if generation <= self._last_shown:
+            return
+        self._last_shown = generation
+        now = time.perf_counter()
+        self.frames.append(now)
+        # Results are shown in request order, so anything sent before the shown one
+        # without a display of its own never reached the screen
+        while self.pending:
+            sent_at, pending_path = self.pending.popleft()
+            if pending_path == path:
+                self.latencies.append((sent_at, now - sent_at))
+                return
+            self.dropped.append(sent_at)
+
+    def _dismiss_dialogs(self):
+        dialog = QApplication.activeModalWidget()
+        if dialog is not None:
+            self.modal_dialogs += 1
+            dialog.close()
+
+
+def make_images(directory: Path, count: int, size: str):
+    width, height = (int(v) for v in size.lower().split("x"))
+    paths = []
+    for i in range(count):
+        path = directory / f"load_{i:03d}.jpg"
+        synthetic_image(width, height, seed=i).save(path, quality=90)
+        paths.append(str(path))
+    return paths
+
+
+def run(args, workdir: Path) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    image_paths = make_images(workdir, args.images, args.size)
+    # The window preloads an existing model path instead of prompting for one
+    model_path = workdir / "fake.model"
+    model_path.touch()
+
+    # The window saves the last model path; keep that out of the user's real settings
+    QStandardPaths.setTestModeEnabled(True)
+    for settings_format in (QSettings.NativeFormat, QSettings.IniFormat):
+        QSettings.setPath(settings_format, QSettings.UserScope, str(workdir / "settings"))
+
+    worker = FakeAIWorker(args.fake_latency_ms / 1000.0, cache=args.cache)
+    window = InferenceGUI(initial_model=str(model_path), ai_worker=worker)
+    window.show()
+
+    deadline = time.perf_counter() + 30.0
+    while window.current_model_path is None and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    if window.current_model_path is None:
+        raise RuntimeError("The fake model did not load.")
+
+    probe = EventLoopProbe()
+    driver = LoadDriver(window, image_paths, args)
+    memory = []  # (time, RSS MB)
+    memory_timer = QTimer()
+    memory_timer.setInterval(int(args.memory_interval * 1000))
+    memory_timer.timeout.connect(lambda: memory.append((time.perf_counter(), rss_mb())))
+
+    METRICS.reset()
+    start = time.perf_counter()
+    memory.append((start, rss_mb()))
+    probe.start()
+    driver.start()
+    memory_timer.start()
+
+    # Load phase, then a short drain so in-flight requests can still complete
+    QTimer.singleShot(int(args.duration * 1000), driver.stop)
+    QTimer.singleShot(int(args.duration * 1000) + 1000, app.quit)
+    app.exec_()
+
+    probe.stop()
+    memory_timer.stop()
+    end = start + args.duration
+    measured_from = start + args.warmup
+
+    lags = [lag for t, lag in probe.samples if measured_from <= t <= end]
+    latencies = [latency for t, latency in driver.latencies if t >= measured_from]
+    dropped = [t for t in driver.dropped if t >= measured_from]
+    # Requests still waiting after the drain never reached the screen either
+    unanswered = len(driver.pending)
+    measured_requests = len(latencies) + len(dropped) + unanswered
+    late = sum(latency * 1000.0 > args.deadline_ms for latency in latencies)
+    frames = [t for t in driver.frames if measured_from <= t <= end]
+
+    window.close()
+
+    return {
+        "event_loop_lag": {
+            **percentiles_ms(lags),
+            "samples": len(lags),
+            **{f"stalls_over_{ms}ms": sum(lag * 1000.0 > ms for lag in lags) for ms in STALL_THRESHOLDS_MS},
+        },
+        "requests": {
+            "sent": driver.sent,
+            "measured": measured_requests,
+            "scored": driver.scored,
+            "displayed": len(latencies),
+            "dropped": len(dropped),
+            "unanswered": unanswered,
+            "late": late,
+            "drop_rate": (len(dropped) + unanswered) / measured_requests if measured_requests else 0.0,
+            "late_rate": late / len(latencies) if latencies else 0.0,
+            "errors": len(driver.errors),
+            "first_error": driver.errors[0] if driver.errors else None,
+            "modal_dialogs": driver.modal_dialogs,
+        },
+        "latency": percentiles_ms(latencies),
+        "frames_per_s": len(frames) / (end - measured_from) if end > measured_from else 0.0,
+        "memory": memory_summary(memory, measured_from),
+        "stages": {stage: stats for stage, stats in METRICS.snapshot().items()
+                   if stage.startswith(("gui.", "worker.", "render."))},
+    }
+
+
+def memory_summary(samples, measured_from) -> dict:
+    values = np.asarray([mb for _, mb in samples])
+    summary = {
+        "start_mb": float(values[0]),
+        "end_mb": float(values[-1]),
+        "max_mb": float(values.max()),
+        "series": [[round(t - samples[0][0], 2), round(mb, 1)] for t, mb in samples],
+    }
+    # Growth after warm-up, from a least-squares line (robust to single GC spikes)
+    steady = [(t, mb) for t, mb in samples if t >= measured_from]
+    if len(steady) >= 2:
+        times, mbs = np.asarray(steady).T
+        summary["growth_mb_per_min"] = float(np.polyfit(times, mbs, 1)[0] * 60.0)
+    return summary
+
+
+def compare(report, baseline):
+    """Print key metrics next to a baseline run."""
+    rows = [
+        ("lag p95 ms", ("event_loop_lag", "p95_ms")),
+        ("lag p99 ms", ("event_loop_lag", "p99_ms")),
+        ("lag max ms", ("event_loop_lag", "max_ms")),
+        ("stalls >100ms", ("event_loop_lag", "stalls_over_100ms")),
+        ("latency p95 ms", ("latency", "p95_ms")),
+        ("drop rate", ("requests", "drop_rate")),
+        ("late rate", ("requests", "late_rate")),
+        ("frames/s", ("frames_per_s",)),
+        ("memory MB/min", ("memory", "growth_mb_per_min")),
+    ]
+
+    def _get(data, keys):
+        for key in keys:
+            data = data.get(key) if isinstance(data, dict) else None
+        return data
+
+    print(f"\nComparison against {baseline['meta'].get('revision')}:")
+    print(f"{'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, keys in rows:
+        base, current = _get(baseline["results"], keys), _get(report["results"], keys)
+        if base is None or current is None:
+            continue
+        change = f"{(current - base) / base * 100:+7.1f}%" if base else ""
+        print(f"{name:<16} {base:10.3f} {current:10.3f} {change:>8}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="inference_gui_load_") as workdir:
+        results = run(args, Path(workdir))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    if results["frames_per_s"] < args.min_fps:
+        print(f"FAIL: {results['frames_per_s']:.2f} results/s reached the screen "
+              f"(--min-fps {args.min_fps:g})", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
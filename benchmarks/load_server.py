@@ -0,0 +1,150 @@
+"""Load generator for the inference server: throughput and client-observed latency.
+
+Runs entirely on one machine with --serve-fake, which starts a server with the
+deterministic FakeInferencer in-process:
+
+    python -m benchmarks.load_server --serve-fake --clients 8 --requests 400
+    python -m benchmarks.load_server --url http://gpu-box:8765 --image sample.png
+"""
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ai.remote import DEFAULT_SERVER_URL, InferenceClient
+from benchmarks.bench_stages import PERCENTILES, synthetic_image
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_SERVER_URL)
+    parser.add_argument("--serve-fake", action="store_true",
+                        help="Start a FakeInferencer server on a free local port and load that.")
+    parser.add_argument("--fake-latency-ms", type=float, default=10.0,
+                        help="With --serve-fake: emulated model time per predict call.")
+    parser.add_argument("--batch-size", type=int, default=8, help="With --serve-fake: server batch size.")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent client connections.")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send.")
+    parser.add_argument("--image", type=Path, default=None,
+                        help="Image file to send (default: a synthetic image of --size).")
+    parser.add_argument("--size", default="1920x1080", help="WIDTHxHEIGHT of the synthetic image.")
+    parser.add_argument("--tiled", action="store_true", help="Request tiled inference.")
+    parser.add_argument("--output", default=None, help="Write the report JSON here.")
+    return parser.parse_args(argv)
+
+
+def start_fake_server(args):
+    from ai.batching import MicroBatcher
+    from ai.fake_inferencer import FakeInferencer
+    from server import InferenceServer
+
+    inferencer = FakeInferencer(latency=args.fake_latency_ms / 1000.0)
+    batcher = MicroBatcher(inferencer, args.batch_size)
+    server = InferenceServer(("127.0.0.1", 0), batcher, {"model": "fake", "model_hash": "fake"})
+    threading.Thread(target=server.serve_forever, name="fake-server", daemon=True).start()
+    return server, batcher
+
+
+def encoded_image(args) -> bytes:
+    if args.image is not None:
+        return args.image.read_bytes()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    encoded = io.BytesIO()
+    synthetic_image(width, height).save(encoded, format="JPEG")
+    return encoded.getvalue()
+
+
+def percentiles_ms(samples):
+    if not samples:
+        return {}
+    samples_ms = np.asarray(samples) * 1000.0
+    summary = {f"p{p}_ms": float(np.percentile(samples_ms, p)) for p in PERCENTILES}
+    summary["mean_ms"] = float(samples_ms.mean())
+    return summary
+
+
+def run_load(url, data, clients, total_requests, tiled=False):
+    remaining = iter(range(total_requests))
+    lock = threading.Lock()
+    latencies, server_times, errors = [], [], []
+
+    def client_loop():
+        # One keep-alive connection per simulated GUI
+        client = InferenceClient(url, pool_size=1)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                try:
+                    _, inference_time, latency = client.predict_encoded(data, tiled)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    latencies.append(latency)
+                    server_times.append(inference_time)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=client_loop, name=f"load-client-{i}") for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "clients": clients,
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency": percentiles_ms(latencies),
+        "server_inference": percentiles_ms(server_times),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = batcher = None
+    url = args.url
+    if args.serve_fake:
+        server, batcher = start_fake_server(args)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        client = InferenceClient(url)
+        info = client.health()
+        client.close()
+        data = encoded_image(args)
+        print(f"Sending {args.requests} x {len(data) / 1024:.0f} KiB to {info['model']} at {url} "
+              f"from {args.clients} clients ...", file=sys.stderr)
+        report = run_load(url, data, args.clients, args.requests, args.tiled)
+        report["model"] = info["model"]
+        if batcher is not None and batcher.batches:
+            report["mean_batch_size"] = batcher.batched_images / batcher.batches
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            batcher.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
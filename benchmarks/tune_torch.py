@@ -0,0 +1,146 @@
+"""Auto-tune the Torch execution profile of a .pt/.ckpt model and save the fastest.
+
+Tries thread counts, channels-last layout, bf16 autocast (where the CPU has
+native bf16) and optionally torch.compile on sample images. Profiles whose
+scores drift from the default profile's by more than --tolerance are rejected.
+The winner is stored per model hash and picked up by every later load of the
+same model file (GUI, batch_inference.py, server.py):
+
+    python -m benchmarks.tune_torch --model model.pt --images samples/ --compile
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+from ai.inference import extract_score, get_inferencer, run_inference_core
+from ai.torch_profile import DEFAULT_PROFILE_STORE, TorchProfile, bf16_supported, save_tuned_profile
+from batch_inference import list_images
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, required=True, help="Torch model (.pt, .pth, .ckpt).")
+    parser.add_argument("--images", type=Path, default=None,
+                        help="Sample images (default: random images of --size).")
+    parser.add_argument("--size", default="1024x1024", help="WIDTHxHEIGHT of the random sample images.")
+    parser.add_argument("--max-images", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=3, help="Timed passes over the sample images.")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed passes (compilation happens here).")
+    parser.add_argument("--threads", default=None,
+                        help="Comma-separated intra-op thread counts to try (default: all cores and half).")
+    parser.add_argument("--compile", action="store_true", help="Also try torch.compile (slow to tune).")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Max image-score difference from the default profile.")
+    parser.add_argument("--store", type=Path, default=DEFAULT_PROFILE_STORE)
+    parser.add_argument("--dry-run", action="store_true", help="Report only; don't save the winner.")
+    parser.add_argument("--output", default=None, help="Write the report JSON here.")
+    return parser.parse_args(argv)
+
+
+def sample_images(args):
+    if args.images is not None:
+        return [Image.open(path).convert("RGB") for path in list_images(args.images)[:args.max_images]]
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    return [Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+            for _ in range(args.max_images)]
+
+
+def candidate_profiles(args):
+    cores = os.cpu_count() or 1
+    if args.threads:
+        thread_options = [int(v) for v in args.threads.split(",")]
+    else:
+        thread_options = sorted({cores, max(1, cores // 2)}, reverse=True)
+    bf16_options = [False, True] if bf16_supported() else [False]
+    compile_options = ["none", "compile"] if args.compile else ["none"]
+    # Inter-op threads can only be set once per process, so they are left to the environment
+    for threads, channels_last, bf16, compile in itertools.product(
+            thread_options, [False, True], bf16_options, compile_options):
+        yield TorchProfile(threads=threads, channels_last=channels_last, bf16=bf16, compile=compile)
+
+
+def measure(model_path, profile, images, iterations, warmup):
+    """Median per-image latency and the image scores under `profile`."""
+    inferencer = get_inferencer(model_path, torch_profile=profile, runtime="torch")
+    for _ in range(warmup):
+        for image in images:
+            run_inference_core(image, inferencer)
+
+    latencies, scores = [], []
+    for _ in range(iterations):
+        for image in images:
+            predictions, inference_time = run_inference_core(image, inferencer)
+            latencies.append(inference_time)
+            scores.append(extract_score(predictions))
+    return float(np.median(latencies)), np.asarray(scores[:len(images)])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.model.suffix not in {".pt", ".pth", ".ckpt"}:
+        print("Only Torch models have a Torch profile; see --ov-hint for OpenVINO models.", file=sys.stderr)
+        return 2
+    images = sample_images(args)
+    if not images:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    baseline_latency, baseline_scores = measure(args.model, TorchProfile(), images, args.iterations, args.warmup)
+    print(f"default: {baseline_latency * 1000:.1f} ms", file=sys.stderr)
+
+    results, best = [], (baseline_latency, TorchProfile())
+    for profile in candidate_profiles(args):
+        start = time.perf_counter()
+        try:
+            latency, scores = measure(args.model, profile, images, args.iterations, args.warmup)
+        except Exception as e:
+            results.append({"profile": profile.to_dict(), "error": f"{type(e).__name__}: {str(e)}"})
+            print(f"{profile}: failed ({str(e)})", file=sys.stderr)
+            continue
+        drift = float(np.max(np.abs(scores - baseline_scores)))
+        accepted = drift <= args.tolerance
+        results.append({
+            "profile": profile.to_dict(),
+            "latency_ms": latency * 1000.0,
+            "score_drift": drift,
+            "accepted": accepted,
+            "tune_time_s": time.perf_counter() - start,
+        })
+        print(f"{profile}: {latency * 1000:.1f} ms, score drift {drift:.4f}"
+              f"{'' if accepted else ' (rejected)'}", file=sys.stderr)
+        if accepted and latency < best[0]:
+            best = (latency, profile)
+
+    latency, profile = best
+    report = {
+        "model": str(args.model),
+        "images": len(images),
+        "default_latency_ms": baseline_latency * 1000.0,
+        "best": {"profile": profile.to_dict(), "latency_ms": latency * 1000.0},
+        "speedup": baseline_latency / latency if latency > 0 else None,
+        "candidates": results,
+    }
+    if not args.dry_run:
+        save_tuned_profile(args.model, profile, latency, args.store)
+        report["saved_to"] = str(args.store)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from PyQt5.QtCore import QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QGridLayout,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QSlider,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ai.calibration import ThresholdSweep, load_batch_results
+
+SLIDER_STEPS = 1000
+
+
+class RocPlot(QWidget):
+    """Minimal ROC curve plot with the current operating point highlighted."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(260, 260)
+        self.fpr = None
+        self.tpr = None
+        self.point = None
+
+    def set_curve(self, fpr, tpr):
+        self.fpr, self.tpr = fpr, tpr
+        self.update()
+
+    def set_point(self, fpr, tpr):
+        self.point = (fpr, tpr)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        margin = 20
+        side = min(self.width(), self.height()) - 2 * margin
+        left, bottom = margin, margin + side
+
+        def to_screen(x, y):
+            return QPointF(left + x * side, bottom - y * side)
+
+        painter.fillRect(self.rect(), QColor("#ffffff"))
+        painter.setPen(QPen(QColor("#999999"), 1))
+        painter.drawRect(left, margin, side, side)
+        painter.setPen(QPen(QColor("#cccccc"), 1, Qt.DashLine))
+        painter.drawLine(to_screen(0, 0), to_screen(1, 1))
+
+        if self.fpr is not None and len(self.fpr) > 1:
+            # Decimate very long curves; a few thousand points is plenty on screen
+            step = max(1, len(self.fpr) // 2000)
+            polygon = QPolygonF([to_screen(x, y) for x, y in zip(self.fpr[::step], self.tpr[::step])])
+            polygon.append(to_screen(self.fpr[-1], self.tpr[-1]))
+            painter.setPen(QPen(QColor("#007AFF"), 2))
+            painter.drawPolyline(polygon)
+
+        if self.point is not None:
+            painter.setPen(QPen(QColor("red"), 2))
+            painter.setBrush(QColor("red"))
+            painter.drawEllipse(to_screen(*self.point), 4, 4)
+
+        painter.setPen(QColor("#666666"))
+        painter.drawText(left, bottom + 15, "FPR")
+        painter.drawText(2, margin + 10, "TPR")
+
+
+class CalibrationDialog(QDialog):
+    """Threshold calibration over all scores of a batch run.
+
+    Moving the slider re-classifies the whole dataset with vectorized numpy
+    operations (see ThresholdSweep); no image is re-inferred.
+    """
+
+    threshold_applied = pyqtSignal(float)
+
+    def __init__(self, parent=None, threshold=0.5):
+        super().__init__(parent)
+        self.setWindowTitle("Threshold Calibration")
+        self.resize(640, 420)
+        self.sweep = None
+        self.score_range = (0.0, 1.0)
+        self.initial_threshold = threshold
+
+        layout = QHBoxLayout(self)
+        self.roc_plot = RocPlot()
+        layout.addWidget(self.roc_plot, stretch=1)
+
+        controls = QVBoxLayout()
+        layout.addLayout(controls)
+
+        load_btn = QPushButton("Load Batch Results...")
+        load_btn.clicked.connect(self.prompt_load_results)
+        controls.addWidget(load_btn)
+
+        self.dataset_label = QLabel("No results loaded")
+        self.dataset_label.setWordWrap(True)
+        controls.addWidget(self.dataset_label)
+
+        self.threshold_label = QLabel("Threshold: -")
+        self.threshold_label.setFont(QFont("Arial", 10, QFont.Bold))
+        controls.addWidget(self.threshold_label)
+
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(0, SLIDER_STEPS)
+        self.slider.setEnabled(False)
+        self.slider.valueChanged.connect(self.update_metrics)
+        controls.addWidget(self.slider)
+
+        grid = QGridLayout()
+        self.metric_labels = {}
+        for row, (key, title) in enumerate([
+            ("tp", "True positives"), ("fp", "False positives"),
+            ("tn", "True negatives"), ("fn", "False negatives"),
+            ("precision", "Precision"), ("recall", "Recall"),
+            ("f1", "F1"), ("accuracy", "Accuracy"), ("auc", "ROC AUC"),
+        ]):
+            grid.addWidget(QLabel(title), row, 0)
+            value = QLabel("-")
+            value.setAlignment(Qt.AlignRight)
+            grid.addWidget(value, row, 1)
+            self.metric_labels[key] = value
+        controls.addLayout(grid)
+
+        self.suggestion_label = QLabel("")
+        self.suggestion_label.setWordWrap(True)
+        controls.addWidget(self.suggestion_label)
+
+        self.suggest_btn = QPushButton("Use Suggested Threshold")
+        self.suggest_btn.setEnabled(False)
+        self.suggest_btn.clicked.connect(self.use_suggestion)
+        controls.addWidget(self.suggest_btn)
+
+        self.apply_btn = QPushButton("Apply to Decision Threshold")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.apply_threshold)
+        controls.addWidget(self.apply_btn)
+        controls.addStretch()
+
+        self.suggested_threshold = None
+
+    def prompt_load_results(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Batch Results",
+            os.getcwd(),
+            "Batch Results (*.jsonl *.csv);;All Files (*)"
+        )
+        if file_name:
+            self.load_results(file_name)
+
+    def load_results(self, file_name):
+        try:
+            _, scores, labels = load_batch_results(Path(file_name))
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Could not load results:\n{str(e)}")
+            return
+        if scores.size == 0:
+            QMessageBox.warning(self, "No Data", "No scored images with ground truth found.")
+            return
+        self.set_dataset(scores, labels, Path(file_name).name)
+
+    def set_dataset(self, scores, labels, name=""):
+        self.sweep = ThresholdSweep(scores, labels)
+        low, high = float(scores.min()), float(scores.max())
+        self.score_range = (low, high if high > low else low + 1.0)
+
+        fpr, tpr, _, auc = self.sweep.roc()
+        self.roc_plot.set_curve(fpr, tpr)
+        self.metric_labels["auc"].setText(f"{auc:.4f}")
+
+        self.suggested_threshold, best_f1 = self.sweep.best_f1_threshold()
+        self.suggestion_label.setText(
+            f"Suggested threshold (max F1): {self.suggested_threshold:.4f} (F1 {best_f1:.4f})")
+        self.dataset_label.setText(
+            f"{name}: {len(self.sweep)} images "
+            f"({self.sweep.positives} anomalous, {self.sweep.negatives} normal)")
+
+        # A threshold fitted to one class only says nothing about the other
+        both_classes = self.sweep.positives > 0 and self.sweep.negatives > 0
+        self.slider.setEnabled(True)
+        self.suggest_btn.setEnabled(both_classes)
+        self.apply_btn.setEnabled(both_classes)
+        if not both_classes:
+            missing = "anomalous" if self.sweep.positives == 0 else "normal"
+            self.suggestion_label.setText(f"No {missing} images; a threshold can't be calibrated.")
+            QMessageBox.warning(
+                self, "One Class Only",
+                f"The results contain no {missing} images, so the threshold can't be calibrated.\n"
+                "Check the gt column or the image folder names.")
+        self.slider.setValue(self.threshold_to_slider(self.initial_threshold))
+        self.update_metrics()
+
+    def threshold_to_slider(self, threshold):
+        low, high = self.score_range
+        return int(round(np.clip((threshold - low) / (high - low), 0, 1) * SLIDER_STEPS))
+
+    def current_threshold(self):
+        low, high = self.score_range
+        return low + (high - low) * self.slider.value() / SLIDER_STEPS
+
+    def update_metrics(self):
+        if self.sweep is None:
+            return
+        metrics = self.sweep.metrics(self.current_threshold())
+        self.threshold_label.setText(f"Threshold: {metrics['threshold']:.4f}")
+        for key in ("tp", "fp", "tn", "fn"):
+            self.metric_labels[key].setText(str(metrics[key]))
+        for key in ("precision", "recall", "f1", "accuracy"):
+            self.metric_labels[key].setText(f"{metrics[key]:.4f}")
+        self.roc_plot.set_point(metrics["fpr"], metrics["recall"])
+
+    def use_suggestion(self):
+        if self.suggested_threshold is not None:
+            self.slider.setValue(self.threshold_to_slider(self.suggested_threshold))
+
+    def apply_threshold(self):
+        self.threshold_applied.emit(self.current_threshold())
@@ -0,0 +1,171 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QListView
+
+from ai.history import ResultHistory, ResultRecord, make_thumbnail
+from ai.inference import score_to_label
+
+THUMBNAIL_SIZE = 96
+# Thumbnails kept in memory; only the visible ones are ever generated
+THUMBNAIL_CACHE_SIZE = 256
+
+
+def _to_qimage(array: np.ndarray) -> QImage:
+    array = np.ascontiguousarray(array)
+    height, width = array.shape[:2]
+    if array.ndim == 2:
+        image = QImage(array.data, width, height, array.strides[0], QImage.Format_Grayscale8)
+    else:
+        image = QImage(array.data, width, height, array.strides[0], QImage.Format_RGB888)
+    # Own the pixels; the array goes away with this function
+    return image.copy()
+
+
+def record_thumbnail(record: ResultRecord, size: int = THUMBNAIL_SIZE) -> QImage:
+    """Thumbnail of the record's image, or of its anomaly map if the image is gone."""
+    try:
+        return _to_qimage(np.asarray(make_thumbnail(record.image_path, size)))
+    except (OSError, ValueError):
+        anomaly_map = record.prediction().anomaly_map
+        if anomaly_map is None:
+            return QImage()
+        low, high = float(anomaly_map.min()), float(anomaly_map.max())
+        scaled = (anomaly_map - low) * (255.0 / (high - low if high > low else 1.0))
+        return _to_qimage(scaled.astype(np.uint8)).scaled(size, size, Qt.KeepAspectRatio)
+
+
+class HistoryModel(QAbstractListModel):
+    """List model over a ResultHistory, newest result first.
+
+    Thumbnails are made on a background thread the first time a view asks for
+    one (i.e. when it scrolls into sight) and kept in a small LRU, so browsing
+    thousands of results holds a few hundred thumbnails at most.
+    """
+
+    RecordRole = Qt.UserRole + 1
+    _thumbnail_ready = pyqtSignal(int, object)
+
+    def __init__(self, history: ResultHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.threshold = 0.5
+        self._count = 0
+        self._newest_id = -1
+        self._thumbnails = OrderedDict()
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self._thumbnail_ready.connect(self._on_thumbnail)
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def record(self, row: int) -> ResultRecord | None:
+        # Rows are addressed by id, so they stay put until `refresh` tells the view what moved
+        return self.history.get(self._newest_id - row) if 0 <= row < self._count else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        record = self.record(index.row())
+        if record is None:
+            return None
+        if role == Qt.DisplayRole:
+            return f"{record.score:.3f}"
+        if role == Qt.DecorationRole:
+            return self._thumbnail(record)
+        if role == Qt.ForegroundRole:
+            return QColor("red") if score_to_label(record.score, self.threshold) == "Anomaly" else None
+        if role == Qt.ToolTipRole:
+            created = datetime.fromtimestamp(record.created_at).strftime("%H:%M:%S")
+            return (f"{Path(record.image_path).name}\nScore: {record.score:.4f}\n"
+                    f"Model: {record.model}\n{created}, {record.inference_time * 1000:.0f} ms")
+        if role == self.RecordRole:
+            return record
+        return None
+
+    def set_threshold(self, threshold: float):
+        self.threshold = threshold
+        if self._count:
+            self.dataChanged.emit(self.index(0), self.index(self._count - 1), [Qt.ForegroundRole])
+
+    def refresh(self):
+        """Sync with the history after the worker appended results (newest go on top)."""
+        total = len(self.history)
+        newest = self.history.at(-1)
+        added = min(newest.id - self._newest_id, total) if newest is not None else 0
+        # Oldest records fall off the end once the history is at capacity
+        dropped = min(self._count, self._count + added - total)
+        if dropped > 0:
+            self.beginRemoveRows(QModelIndex(), self._count - dropped, self._count - 1)
+            self._count -= dropped
+            self.endRemoveRows()
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), 0, added - 1)
+            self._count += added
+            self._newest_id = newest.id
+            self.endInsertRows()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _thumbnail(self, record: ResultRecord):
+        image = self._thumbnails.get(record.id)
+        if image is not None:
+            self._thumbnails.move_to_end(record.id)
+            return image
+        if record.id not in self._pending:
+            self._pending.add(record.id)
+            self._executor.submit(self._make_thumbnail, record)
+        return None
+
+    def _make_thumbnail(self, record: ResultRecord):
+        try:
+            image = record_thumbnail(record)
+        except Exception:
+            image = QImage()
+        self._thumbnail_ready.emit(record.id, image)
+
+    def _on_thumbnail(self, record_id, image):
+        self._pending.discard(record_id)
+        self._thumbnails[record_id] = image
+        while len(self._thumbnails) > THUMBNAIL_CACHE_SIZE:
+            self._thumbnails.popitem(last=False)
+        row = self._newest_id - record_id
+        if 0 <= row < self._count:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class HistoryGallery(QListView):
+    """Horizontal strip of past results; clicking one brings it back on screen."""
+
+    record_activated = pyqtSignal(object)
+
+    def __init__(self, history: ResultHistory, parent=None):
+        super().__init__(parent)
+        self.history_model = HistoryModel(history, self)
+        self.setModel(self.history_model)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        # Uniform items let the view lay out thousands of rows without asking for each one
+        self.setUniformItemSizes(True)
+        self.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.setGridSize(QSize(THUMBNAIL_SIZE + 16, THUMBNAIL_SIZE + 28))
+        self.setFixedHeight(THUMBNAIL_SIZE + 48)
+        self.setHorizontalScrollMode(QListView.ScrollPerPixel)
+        self.clicked.connect(self._on_clicked)
+
+    def refresh(self):
+        self.history_model.refresh()
+
+    def _on_clicked(self, index):
+        record = self.history_model.record(index.row())
+        if record is not None:
+            self.record_activated.emit(record)
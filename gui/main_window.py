@@ -2,13 +2,15 @@ import os
 from pathlib import Path
 
 from PIL import Image
-from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
-from PyQt5.QtGui import QFont, QImage, QPixmap
+from PyQt5.QtCore import QSettings, Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QImage
 from PyQt5.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QFileDialog,
     QFrame,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
     QMainWindow,
     QMessageBox,
@@ -21,50 +23,91 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-from ai.worker import AIWorker
-from gui.widgets import FluidImageLabel
+from ai.imaging import DECODED_IMAGES, FrameBuffer, pil_to_frame
+from ai.metrics import METRICS, span
+from ai.optimization import optimized_variants
+from ai.stream import StreamStats, StreamWorker
+from ai.watch import HotFolder, WatchOptions
+from ai.runtimes import AUTO, RUNTIME_ENV, RUNTIMES
+from ai.worker import AIWorker, ProcessAIWorker, RemoteAIWorker
+from gui.calibration import CalibrationDialog
+from gui.history import HistoryGallery
+from gui.widgets import TiledImageView, link_views
 
 
 class InferenceGUI(QMainWindow):
     request_model_load = pyqtSignal(str)
+    request_set_runtime = pyqtSignal(str)
     request_inference = pyqtSignal(str, int)
     request_contour_update = pyqtSignal(int)
+    request_show_record = pyqtSignal(object)
+    request_pixel_threshold = pyqtSignal(object)
 
-    def __init__(self):
+    def __init__(self, initial_model=None, ai_worker=None, watch_dir=None, watch_options=None):
+        """`ai_worker` replaces the default in-process AIWorker (e.g. a ProcessAIWorker).
+
+        With `watch_dir`, hot-folder mode starts as soon as the model is loaded.
+        """
         super().__init__()
         self.setWindowTitle("Anomalib Inference GUI")
         self.setGeometry(100, 100, 1200, 800)
         
         self.current_image_path = None
         self.last_pred_score = None 
+        self.current_model_path = None
+        self.pending_model_path = None
+        self.announce_model_load = True
+        self.heat_map_buffer = None
+        self.stream_worker = None
+        self.stream_stats = None
+        self.hot_folder = None
+        self.pending_watch_dir = watch_dir
+        self.watch_options = watch_options or WatchOptions()
+        self.settings = QSettings("inference_gui", "InferenceGUI")
         
-        self.init_ai_thread()
+        self.init_ai_thread(ai_worker)
         self.init_ui()
         
-        # Trigger model loading
-        QT_TIMER_DELAY = 100
-        QTimer.singleShot(QT_TIMER_DELAY, self.prompt_load_model)
+        # Preload the requested (or last used) model before the user picks anything
+        preload_path = initial_model or self.settings.value("last_model_path", "", type=str)
+        if preload_path and os.path.exists(preload_path):
+            self.announce_model_load = False
+            self.start_model_load(preload_path)
+        else:
+            # Trigger model loading
+            QT_TIMER_DELAY = 100
+            QTimer.singleShot(QT_TIMER_DELAY, self.prompt_load_model)
 
-    def init_ai_thread(self):
+    def init_ai_thread(self, ai_worker=None):
         # Create Thread and Worker
         self.ai_thread = QThread()
-        self.ai_worker = AIWorker()
+        self.ai_worker = ai_worker or AIWorker()
         self.ai_worker.moveToThread(self.ai_thread)
         
         # Connect Signals
         self.request_model_load.connect(self.ai_worker.load_model)
+        self.request_set_runtime.connect(self.ai_worker.set_runtime)
         self.request_inference.connect(self.ai_worker.run_inference)
         self.request_contour_update.connect(self.ai_worker.update_contours)
+        self.request_show_record.connect(self.ai_worker.show_record)
+        self.request_pixel_threshold.connect(self.ai_worker.update_pixel_threshold)
         
         self.ai_worker.model_loaded.connect(self.on_model_loaded)
         self.ai_worker.inference_finished.connect(self.on_inference_finished)
         self.ai_worker.error_occurred.connect(self.on_ai_error)
+        self.ai_worker.image_scored.connect(self.on_image_scored)
+        self.ai_worker.result_recorded.connect(self.on_result_recorded)
+        self.ai_worker.segmentation_updated.connect(self.on_segmentation_updated)
         
         # Start Thread
         self.ai_thread.start()
 
     def closeEvent(self, event):
         # Clean up thread on close
+        self.stop_stream()
+        self.stop_watch()
+        self.history_gallery.history_model.close()
+        self.ai_worker.shutdown()
         self.ai_thread.quit()
         self.ai_thread.wait()
         super().closeEvent(event)
@@ -96,6 +139,28 @@ class InferenceGUI(QMainWindow):
         load_model_btn = QPushButton("Change Model")
         load_model_btn.clicked.connect(self.prompt_load_model)
         sidebar_layout.addWidget(load_model_btn)
+
+        # Quick switch between models loaded this session (kept warm by the worker)
+        self.model_combo = QComboBox()
+        self.model_combo.setToolTip("Switch between models loaded in this session")
+        self.model_combo.setEnabled(False)
+        self.model_combo.activated.connect(self.switch_model)
+        sidebar_layout.addWidget(self.model_combo)
+
+        # Inference runtime; "auto" benchmarks the compatible ones once per model
+        self.runtime_combo = QComboBox()
+        self.runtime_combo.setToolTip("Runtime used to load models. Auto benchmarks every compatible "
+                                      "runtime on the first load of a model and remembers the fastest.")
+        self.runtime_combo.addItem("Runtime: by file type", "")
+        self.runtime_combo.addItem("Runtime: auto (fastest)", AUTO)
+        for name in RUNTIMES:
+            self.runtime_combo.addItem(f"Runtime: {name}", name)
+        # Worker processes and the inference server load models with their own settings
+        self.runtime_selectable = not isinstance(self.ai_worker, (ProcessAIWorker, RemoteAIWorker))
+        self.runtime_combo.setEnabled(self.runtime_selectable)
+        self.runtime_combo.setCurrentIndex(max(0, self.runtime_combo.findData(os.environ.get(RUNTIME_ENV, ""))))
+        self.runtime_combo.activated.connect(self.switch_runtime)
+        sidebar_layout.addWidget(self.runtime_combo)
         
         # Separator line in sidebar
         line = QFrame()
@@ -117,6 +182,35 @@ class InferenceGUI(QMainWindow):
         self.infer_btn.clicked.connect(self.run_inference)
         self.infer_btn.setEnabled(False) # Disabled until image loaded
         sidebar_layout.addWidget(self.infer_btn)
+
+        # Live camera / video file stream
+        self.stream_btn = QPushButton("Start Stream")
+        self.stream_btn.setMinimumHeight(40)
+        self.stream_btn.clicked.connect(self.toggle_stream)
+        self.stream_btn.setEnabled(False)  # Disabled until model loads
+        sidebar_layout.addWidget(self.stream_btn)
+
+        self.stream_label = QLabel("")
+        self.stream_label.setFont(QFont("Arial", 10))
+        self.stream_label.setVisible(False)
+        sidebar_layout.addWidget(self.stream_label)
+
+        # Hot folder: score images as cameras drop them into a directory
+        self.watch_btn = QPushButton("Watch Folder")
+        self.watch_btn.setMinimumHeight(40)
+        self.watch_btn.clicked.connect(self.toggle_watch)
+        self.watch_btn.setEnabled(False)  # Disabled until model loads
+        sidebar_layout.addWidget(self.watch_btn)
+
+        self.watch_label = QLabel("")
+        self.watch_label.setFont(QFont("Arial", 10))
+        self.watch_label.setVisible(False)
+        sidebar_layout.addWidget(self.watch_label)
+
+        # Lag keeps growing while an image waits, so refresh the readout between events too
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(500)
+        self.watch_timer.timeout.connect(self.refresh_watch_stats)
         
         # Heatmap toggle
         self.heatmap_toggle = QCheckBox("Show Heat Map")
@@ -125,6 +219,22 @@ class InferenceGUI(QMainWindow):
         self.heatmap_toggle.setStyleSheet("margin-top: 10px; font-size: 12px;")
         sidebar_layout.addWidget(self.heatmap_toggle)
 
+        # Tiled inference: score large images at full resolution instead of downscaling
+        self.tiled_toggle = QCheckBox("Tiled Inference")
+        self.tiled_toggle.setToolTip("Run the model on overlapping full-resolution tiles "
+                                     "so small defects on large images are not lost")
+        self.tiled_toggle.setChecked(False)
+        self.tiled_toggle.toggled.connect(self.toggle_tiled)
+        self.tiled_toggle.setStyleSheet("margin-top: 5px; font-size: 12px;")
+        sidebar_layout.addWidget(self.tiled_toggle)
+
+        # History gallery: thumbnails of past results, click to bring one back
+        self.history_toggle = QCheckBox("Show History")
+        self.history_toggle.setChecked(False)
+        self.history_toggle.toggled.connect(self.toggle_history)
+        self.history_toggle.setStyleSheet("margin-top: 5px; font-size: 12px;")
+        sidebar_layout.addWidget(self.history_toggle)
+
         # Diagnostics Toggle
         self.diagnostics_toggle = QCheckBox("Show Diagnostics")
         self.diagnostics_toggle.setChecked(False)
@@ -145,6 +255,10 @@ class InferenceGUI(QMainWindow):
         self.threshold_slider.valueChanged.connect(self.update_decision_state)
         sidebar_layout.addWidget(self.threshold_slider)
 
+        calibrate_btn = QPushButton("Calibrate Threshold")
+        calibrate_btn.clicked.connect(self.open_calibration)
+        sidebar_layout.addWidget(calibrate_btn)
+
         # Contour Thickness Slider
         sidebar_layout.addSpacing(20)
         self.contour_label = QLabel("Contour Thickness: 3")
@@ -158,6 +272,28 @@ class InferenceGUI(QMainWindow):
         self.contour_slider.valueChanged.connect(self.update_contour_label)
         sidebar_layout.addWidget(self.contour_slider)
 
+        # Pixel Threshold: re-segment the cached anomaly map instead of using the model's mask
+        sidebar_layout.addSpacing(20)
+        self.pixel_toggle = QCheckBox("Pixel Threshold: 0.50")
+        self.pixel_toggle.setFont(QFont("Arial", 10, QFont.Bold))
+        self.pixel_toggle.setToolTip("Outline anomaly-map pixels above this value instead of the model's mask")
+        self.pixel_toggle.setChecked(False)
+        self.pixel_toggle.toggled.connect(self.update_pixel_threshold)
+        sidebar_layout.addWidget(self.pixel_toggle)
+
+        self.pixel_slider = QSlider(Qt.Horizontal)
+        self.pixel_slider.setMinimum(0)
+        self.pixel_slider.setMaximum(100)
+        self.pixel_slider.setValue(50)
+        self.pixel_slider.setEnabled(False)
+        self.pixel_slider.valueChanged.connect(self.update_pixel_threshold)
+        sidebar_layout.addWidget(self.pixel_slider)
+
+        self.regions_label = QLabel("")
+        self.regions_label.setStyleSheet("font-size: 11px; color: #555;")
+        self.regions_label.setWordWrap(True)
+        sidebar_layout.addWidget(self.regions_label)
+
         # Push buttons to the top
         sidebar_layout.addStretch()
 
@@ -185,9 +321,10 @@ class InferenceGUI(QMainWindow):
         self.lbl_score = QLabel("Score: -")
         self.lbl_time = QLabel("Time: -")
         self.lbl_label = QLabel("Prediction: -")
+        self.lbl_alloc = QLabel("Alloc: -")
         
         meta_font = QFont("Arial", 14, QFont.Bold)
-        for lbl in [self.lbl_score, self.lbl_time, self.lbl_label]:
+        for lbl in [self.lbl_score, self.lbl_time, self.lbl_label, self.lbl_alloc]:
             lbl.setFont(meta_font)
             lbl.setAlignment(Qt.AlignCenter)
             lbl.setVisible(False) # Hidden by default
@@ -198,6 +335,8 @@ class InferenceGUI(QMainWindow):
         header_layout.addWidget(self.lbl_label)
         header_layout.addSpacing(20)
         header_layout.addWidget(self.lbl_time)
+        header_layout.addSpacing(20)
+        header_layout.addWidget(self.lbl_alloc)
         header_layout.addSpacing(30)
         
         # Indicator Box (Top Right Square)
@@ -212,6 +351,17 @@ class InferenceGUI(QMainWindow):
         
         right_layout.addWidget(header_container)
 
+        # Per-stage latency histograms (shown with diagnostics)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setFont(QFont("Courier", 9))
+        self.metrics_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.metrics_label.setVisible(False)
+        right_layout.addWidget(self.metrics_label)
+
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+
         # 2. Results Section (Images)
         results_scroll = QScrollArea()
         results_scroll.setWidgetResizable(True)
@@ -224,6 +374,9 @@ class InferenceGUI(QMainWindow):
         self.img_label_heatmap = self.create_image_label("Heat Map")
         self.img_label_heatmap.setVisible(False) # Hidden by default
         self.img_label_segment = self.create_image_label("Segmentation")
+        # Zoom/pan on one panel follows on the others so a defect can be compared side by side
+        link_views(self.img_label_input.image_label, self.img_label_heatmap.image_label,
+                   self.img_label_segment.image_label)
 
         results_layout.addWidget(self.img_label_input)
         results_layout.addWidget(self.img_label_heatmap)
@@ -232,6 +385,12 @@ class InferenceGUI(QMainWindow):
         results_scroll.setWidget(results_widget)
         right_layout.addWidget(results_scroll)
 
+        # 3. History strip (hidden by default)
+        self.history_gallery = HistoryGallery(self.ai_worker.history)
+        self.history_gallery.record_activated.connect(self.show_history_record)
+        self.history_gallery.setVisible(False)
+        right_layout.addWidget(self.history_gallery)
+
     def create_image_label(self, title):
         container = QWidget()
         layout = QVBoxLayout(container)
@@ -244,11 +403,9 @@ class InferenceGUI(QMainWindow):
         title_lbl.setSizePolicy(
             QSizePolicy.Preferred, QSizePolicy.Fixed)
         
-        # Use FluidImageLabel for responsive resizing
-        img_lbl = FluidImageLabel()
-        img_lbl.setAlignment(
-            Qt.AlignTop | Qt.AlignHCenter)
-        # Style handles border/bg
+        # Tile-pyramid view: cheap resizes, wheel zoom and drag pan
+        img_lbl = TiledImageView()
+        img_lbl.setToolTip("Scroll to zoom, drag to pan, double-click to fit")
         img_lbl.setMinimumSize(200, 200) # Set reasonable minimum
         img_lbl.setText("No Image")
         
@@ -262,9 +419,38 @@ class InferenceGUI(QMainWindow):
     def toggle_heatmap(self, checked):
         self.img_label_heatmap.setVisible(checked)
 
+    def toggle_history(self, checked):
+        self.history_gallery.setVisible(checked)
+
+    def on_result_recorded(self):
+        self.history_gallery.refresh()
+
+    def show_history_record(self, record):
+        # Stream and hot folder own the worker's inference slot while they run
+        if self.stream_worker is not None or self.hot_folder is not None:
+            return
+        self.open_image(record.image_path)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.request_show_record.emit(record)
+
+    def toggle_tiled(self, checked):
+        self.ai_worker.tiled = checked
+        # Re-score the current image in the new mode (cached separately per mode)
+        if self.current_image_path and self.infer_btn.isEnabled():
+            self.run_inference()
+
     def toggle_diagnostics(self, checked):
-        for lbl in [self.lbl_score, self.lbl_time, self.lbl_label]:
+        for lbl in [self.lbl_score, self.lbl_time, self.lbl_label, self.lbl_alloc, self.metrics_label]:
             lbl.setVisible(checked)
+        if checked:
+            self.refresh_metrics()
+            self.metrics_timer.start()
+        else:
+            self.metrics_timer.stop()
+
+    def refresh_metrics(self):
+        self.metrics_label.setText(METRICS.format_table())
 
     def prompt_load_model(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -275,28 +461,79 @@ class InferenceGUI(QMainWindow):
         )
         
         if file_name:
-            self.model_label.setText(f"Loading: {Path(file_name).name}...")
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setRange(0, 0) # Indeterminate mode
-            self.load_image_btn.setEnabled(False)
-            
-            # Request Worker to Load
-            self.request_model_load.emit(file_name)
+            self.announce_model_load = True
+            self.start_model_load(file_name)
+
+    def switch_model(self, index):
+        model_path = self.model_combo.itemData(index)
+        if not model_path or model_path == self.current_model_path:
+            return
+        # Switching to a warm model takes milliseconds; skip the confirmation dialog
+        self.announce_model_load = False
+        self.start_model_load(model_path)
+
+    def switch_runtime(self, index):
+        self.request_set_runtime.emit(self.runtime_combo.itemData(index))
+        if self.current_model_path:
+            self.announce_model_load = False
+            self.start_model_load(self.current_model_path)
+
+    def start_model_load(self, file_name):
+        self.pending_model_path = file_name
+        self.model_label.setText(f"Loading: {Path(file_name).name}...")
+        self.model_label.setStyleSheet("color: #666;")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0) # Indeterminate mode
+        self.load_image_btn.setEnabled(False)
+        self.model_combo.setEnabled(False)
+        self.runtime_combo.setEnabled(False)
+
+        # Request Worker to Load
+        self.request_model_load.emit(file_name)
 
     def on_model_loaded(self):
         # We don't get 'inferencer' back here, it lives in the thread.
+        self.current_model_path = self.pending_model_path
+        self.settings.setValue("last_model_path", self.current_model_path)
         self.progress_bar.setVisible(False)
-        self.model_label.setText("Model Loaded Ready")
+        runtime = f" ({self.ai_worker.runtime_name})" if self.ai_worker.runtime_name else ""
+        self.model_label.setText(f"Model Loaded Ready: {Path(self.current_model_path).name}{runtime}")
         self.model_label.setStyleSheet("color: green; font-weight: bold;")
         self.load_image_btn.setEnabled(True)
-        QMessageBox.information(self, "Success", "Model loaded successfully!")
+        # Streaming drives the model directly, which needs it in this process
+        self.stream_btn.setEnabled(self.ai_worker.inferencer is not None)
+        self.watch_btn.setEnabled(True)
+
+        index = self.model_combo.findData(self.current_model_path)
+        if index < 0:
+            self.model_combo.addItem(Path(self.current_model_path).name, self.current_model_path)
+            index = self.model_combo.count() - 1
+        # FP16/INT8 builds from optimize_model.py are one switch away
+        for variant in optimized_variants(Path(self.current_model_path)):
+            if self.model_combo.findData(str(variant)) < 0:
+                self.model_combo.addItem(variant.name, str(variant))
+        self.model_combo.setCurrentIndex(index)
+        self.model_combo.setEnabled(True)
+        self.runtime_combo.setEnabled(self.runtime_selectable)
+
+        if self.pending_watch_dir:
+            watch_dir, self.pending_watch_dir = self.pending_watch_dir, None
+            self.start_watch(watch_dir)
+        elif self.announce_model_load:
+            QMessageBox.information(self, "Success", "Model loaded successfully!")
 
     def on_ai_error(self, error_msg):
         self.progress_bar.setVisible(False)
+        if self.hot_folder is not None:
+            # Unattended: failed images are filed under ERROR; don't stop the line with a dialog
+            self.watch_label.setToolTip(error_msg)
+            return
         self.load_image_btn.setEnabled(True) # Re-enable just in case
         self.infer_btn.setEnabled(True)
         self.model_label.setText("Error/Idle")
         self.model_label.setStyleSheet("color: red;")
+        self.model_combo.setEnabled(self.model_combo.count() > 0)
+        self.runtime_combo.setEnabled(self.runtime_selectable)
         QMessageBox.critical(self, "Error", f"An error occurred:\n{error_msg}")
 
     def load_image(self):
@@ -308,37 +545,41 @@ class InferenceGUI(QMainWindow):
         )
         
         if file_name:
-            self.current_image_path = file_name
-            self.display_image(file_name, self.img_label_input.image_label)
-            self.infer_btn.setEnabled(True)
-            
-            # Clear previous results
-            self.img_label_heatmap.image_label.clear()
-            self.img_label_heatmap.image_label.setText("Waiting for inference...")
-            self.img_label_segment.image_label.clear()
-            self.img_label_segment.image_label.setText("Waiting for inference...")
-            self.reset_metrics()
+            self.open_image(file_name)
+
+    def open_image(self, file_name):
+        self.current_image_path = file_name
+        self.display_image(file_name, self.img_label_input.image_label)
+        self.infer_btn.setEnabled(True)
+        
+        # Clear previous results
+        self.heat_map_buffer = None
+        self.img_label_heatmap.image_label.clear()
+        self.img_label_heatmap.image_label.setText("Waiting for inference...")
+        self.img_label_segment.image_label.clear()
+        self.img_label_segment.image_label.setText("Waiting for inference...")
+        self.reset_metrics()
 
     def display_image(self, source, label_widget):
-        if not isinstance(label_widget, FluidImageLabel):
-            return
+        """Show an image in a view; returns the bytes allocated to display it."""
+        if not isinstance(label_widget, TiledImageView):
+            return 0
 
-        # source can be Path (str), PIL.Image, or QImage
+        # source can be Path (str), PIL.Image, FrameBuffer (from thread) or QImage
         if isinstance(source, str): # Path
-            pixmap = QPixmap(source)
-            label_widget.set_image(pixmap)
+            # Decode once; the worker reuses this decode when inference is run
+            try:
+                source = FrameBuffer(DECODED_IMAGES.get(source).array)
+            except (OSError, ValueError):
+                label_widget.set_image(None)
+                return 0
         elif isinstance(source, Image.Image): # PIL Image
-            if source.mode != "RGBA":
-                source = source.convert("RGBA")
-            data = source.tobytes("raw", "RGBA")
-            qim = QImage(data, source.size[0], source.size[1], QImage.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(qim)
-            label_widget.set_image(pixmap)
-        elif isinstance(source, QImage): # QImage (from thread)
-            pixmap = QPixmap.fromImage(source)
-            label_widget.set_image(pixmap)
-        else:
-            return
+            source = pil_to_frame(source)
+
+        if not isinstance(source, (FrameBuffer, QImage)):
+            return 0
+        # The view reads visible tiles straight out of the buffer; no full-size pixmap is made
+        return label_widget.set_image(source)
 
     def run_inference(self):
         if not self.current_image_path:
@@ -357,12 +598,18 @@ class InferenceGUI(QMainWindow):
 
     def on_inference_finished(self, heat_map, segmentation, inf_time, score, label):
         self.progress_bar.setVisible(False)
-        self.infer_btn.setEnabled(True)
-
-        # Display Images (Direct QImage support in updated display_image)
-        self.display_image(heat_map, self.img_label_heatmap.image_label)
-        self.display_image(segmentation, self.img_label_segment.image_label)
-
+        self.infer_btn.setEnabled(self.stream_worker is None and self.hot_folder is None)
+
+        # Display Images (FrameBuffers from the worker thread)
+        # The worker re-sends the same cached heat map on contour updates; only repaint it when it changed
+        with span("gui.display"):
+            allocated = segmentation.allocated_bytes
+            if heat_map is not self.heat_map_buffer:
+                self.heat_map_buffer = heat_map
+                allocated += heat_map.allocated_bytes
+                allocated += self.display_image(heat_map, self.img_label_heatmap.image_label)
+            allocated += self.display_image(segmentation, self.img_label_segment.image_label)
+        self.lbl_alloc.setText(f"Alloc: {allocated / (1024 * 1024):.1f} MB/frame")
 
         # Display Metrics
         self.lbl_time.setText(f"Time: {inf_time:.4f}s")
@@ -375,12 +622,190 @@ class InferenceGUI(QMainWindow):
     def update_contour_label(self):
         val = self.contour_slider.value()
         self.contour_label.setText(f"Contour Thickness: {val}")
+        if self.stream_worker is not None:
+            self.stream_worker.thickness = val
         self.request_contour_update.emit(val)
 
+    def update_pixel_threshold(self):
+        enabled = self.pixel_toggle.isChecked()
+        val = self.pixel_slider.value() / 100.0
+        self.pixel_toggle.setText(f"Pixel Threshold: {val:.2f}")
+        self.pixel_slider.setEnabled(enabled)
+        self.request_pixel_threshold.emit(val if enabled else None)
+
+    def on_segmentation_updated(self, result):
+        if result is None:
+            self.regions_label.setText("")
+            return
+        text = f"Regions: {len(result.regions)}, area {result.area_fraction * 100:.2f}%"
+        if result.regions:
+            largest = result.regions[0]
+            text += f"\nLargest: {largest.area} px, peak {largest.peak:.3f}"
+        self.regions_label.setText(text)
+
+    def toggle_stream(self):
+        if self.stream_worker is not None:
+            self.stop_stream()
+            return
+
+        source, ok = QInputDialog.getText(
+            self,
+            "Start Stream",
+            "Camera index (e.g. 0) or video file path:",
+            text="0",
+        )
+        if ok and source.strip():
+            self.start_stream(source.strip())
+
+    def start_stream(self, source):
+        inferencer = self.ai_worker.inferencer
+        if inferencer is None:
+            return
+
+        self.stream_worker = StreamWorker(source, inferencer, self.contour_slider.value())
+        self.stream_worker.frame_available.connect(self.on_stream_frame)
+        self.stream_worker.stream_stopped.connect(self.on_stream_stopped)
+        self.stream_stats = StreamStats()
+
+        # The stream owns the inferencer while it runs
+        self.stream_btn.setText("Stop Stream")
+        self.load_image_btn.setEnabled(False)
+        self.infer_btn.setEnabled(False)
+        self.watch_btn.setEnabled(False)
+        self.model_combo.setEnabled(False)
+        self.runtime_combo.setEnabled(False)
+        self.stream_label.setText("Starting stream...")
+        self.stream_label.setVisible(True)
+        self.stream_worker.start()
+
+    def stop_stream(self):
+        if self.stream_worker is None:
+            return
+        stream_worker, self.stream_worker = self.stream_worker, None
+        stream_worker.stop()
+
+        self.stream_btn.setText("Start Stream")
+        self.load_image_btn.setEnabled(True)
+        self.infer_btn.setEnabled(self.current_image_path is not None)
+        self.watch_btn.setEnabled(True)
+        self.model_combo.setEnabled(self.model_combo.count() > 0)
+        self.runtime_combo.setEnabled(self.runtime_selectable)
+
+    def on_stream_frame(self):
+        if self.stream_worker is None:
+            return
+        frame = self.stream_worker.take_frame()
+        if frame is None:
+            return
+
+        self.display_image(frame.image, self.img_label_input.image_label)
+        self.on_inference_finished(
+            frame.heat_map, frame.segmentation, frame.inference_time, frame.score, frame.label)
+
+        self.stream_stats.record(frame.captured_at)
+        self.stream_label.setText(
+            f"FPS: {self.stream_stats.fps:.1f}\n"
+            f"Latency: {self.stream_stats.latency * 1000:.0f} ms\n"
+            f"Dropped: {self.stream_worker.dropped}/{self.stream_worker.captured}")
+
+    def on_stream_stopped(self, reason):
+        self.stop_stream()
+        if reason:
+            self.stream_label.setText(reason)
+
+    def toggle_watch(self):
+        if self.hot_folder is not None:
+            self.stop_watch()
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Select Folder to Watch", os.getcwd())
+        if directory:
+            self.start_watch(directory)
+
+    def start_watch(self, directory):
+        # Both would drive the worker and the result panes at once
+        if self.stream_worker is not None:
+            return
+        hot_folder = HotFolder(directory, self.watch_options, Path(self.current_model_path or "").name,
+                               on_routed=self.ai_worker.history.relocate)
+        hot_folder.threshold = self.threshold_slider.value() / 100.0
+        try:
+            hot_folder.start()
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not watch folder:\n{str(e)}")
+            return
+        self.hot_folder = hot_folder
+        hot_folder.dispatch.connect(self.on_watch_dispatch)
+        hot_folder.stats_changed.connect(self.refresh_watch_stats)
+
+        # Hot-folder images go through the worker one at a time; manual requests would replace them
+        self.watch_btn.setText("Stop Watching")
+        self.load_image_btn.setEnabled(False)
+        self.infer_btn.setEnabled(False)
+        self.stream_btn.setEnabled(False)
+        self.model_combo.setEnabled(False)
+        self.runtime_combo.setEnabled(False)
+        self.watch_label.setVisible(True)
+        self.refresh_watch_stats()
+        self.watch_timer.start()
+
+    def stop_watch(self):
+        if self.hot_folder is None:
+            return
+        hot_folder, self.hot_folder = self.hot_folder, None
+        self.watch_timer.stop()
+        hot_folder.stop()
+
+        self.watch_btn.setText("Watch Folder")
+        self.load_image_btn.setEnabled(True)
+        self.infer_btn.setEnabled(False)
+        self.stream_btn.setEnabled(self.ai_worker.inferencer is not None)
+        self.model_combo.setEnabled(self.model_combo.count() > 0)
+        self.runtime_combo.setEnabled(self.runtime_selectable)
+        counts = hot_folder.counts
+        self.watch_label.setText(
+            f"Stopped. OK {counts['OK']}, NG {counts['NG']}, "
+            f"errors {counts['ERROR']}, skipped {counts['SKIPPED']}")
+
+    def on_watch_dispatch(self, image_path):
+        self.open_image(image_path)
+        self.infer_btn.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.request_inference.emit(image_path, self.contour_slider.value())
+
+    def on_image_scored(self, image_path, score, inference_time, error):
+        if self.hot_folder is not None:
+            self.hot_folder.on_image_scored(image_path, score, inference_time, error)
+
+    def refresh_watch_stats(self):
+        hot_folder = self.hot_folder
+        if hot_folder is None:
+            return
+        counts = hot_folder.counts
+        watcher = "inotify + scan" if hot_folder.watcher.using_inotify else "polling"
+        self.watch_label.setText(
+            f"Watching ({watcher})\n"
+            f"Queue: {hot_folder.depth}/{hot_folder.queue.maxsize} ({hot_folder.options.policy})\n"
+            f"Lag: {hot_folder.lag:.1f} s (last {hot_folder.last_lag:.1f} s)\n"
+            f"OK {counts['OK']}  NG {counts['NG']}  Err {counts['ERROR']}  Skipped {counts['SKIPPED']}")
+
+    def open_calibration(self):
+        dialog = CalibrationDialog(self, threshold=self.threshold_slider.value() / 100.0)
+        dialog.threshold_applied.connect(self.apply_calibrated_threshold)
+        dialog.exec_()
+
+    def apply_calibrated_threshold(self, threshold):
+        # Only re-labels the current score; nothing is re-inferred
+        self.threshold_slider.setValue(int(round(min(max(threshold, 0.0), 1.0) * 100)))
+
     def update_decision_state(self):
         # Update Slider Label
         threshold_val = self.threshold_slider.value() / 100.0
         self.threshold_label.setText(f"Decision Threshold: {threshold_val:.2f}")
+        if self.hot_folder is not None:
+            # Applies to images scored from now on; already filed results keep theirs
+            self.hot_folder.threshold = threshold_val
+        self.history_gallery.history_model.set_threshold(threshold_val)
 
         if self.last_pred_score is None:
             return
@@ -404,4 +829,5 @@ class InferenceGUI(QMainWindow):
         self.lbl_score.setText("Score: -")
         self.lbl_label.setText("Prediction: -")
         self.lbl_time.setText("Time: -")
+        self.lbl_alloc.setText("Alloc: -")
         self.lbl_label.setStyleSheet("color: black")
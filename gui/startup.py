@@ -0,0 +1,63 @@
+import json
+import time
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+
+class StartupProfiler(QObject):
+    """Report time-to-window and time-to-first-inference (`main.py --startup-profile`).
+
+    All times are seconds since `start_time`, which main.py takes before its first
+    import. When `image_path` is given the image is opened and inferred as soon as
+    the model is ready and the app quits after printing the report.
+    """
+
+    def __init__(self, app, window, start_time, importer=None, image_path=None):
+        super().__init__()
+        self.app = app
+        self.window = window
+        self.start_time = start_time
+        self.importer = importer
+        self.image_path = image_path
+        self.marks = {}
+
+        # The first paint event anywhere in the app means the window is on screen
+        app.installEventFilter(self)
+        window.ai_worker.model_loaded.connect(self.on_model_loaded)
+        window.ai_worker.inference_finished.connect(self.on_inference_finished)
+        window.ai_worker.error_occurred.connect(self.on_error)
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start_time
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            self.mark("time_to_window")
+            self.app.removeEventFilter(self)
+        return False
+
+    def on_model_loaded(self):
+        self.mark("time_to_model_loaded")
+        if self.image_path and "inference_requested" not in self.marks:
+            self.mark("inference_requested")
+            self.window.open_image(self.image_path)
+            self.window.run_inference()
+
+    def on_inference_finished(self, *args):
+        if "time_to_first_inference" in self.marks:
+            return
+        self.mark("time_to_first_inference")
+        self.report()
+        if self.image_path:
+            QTimer.singleShot(0, self.app.quit)
+
+    def on_error(self, error_msg):
+        self.marks["error"] = error_msg
+        self.report()
+
+    def report(self):
+        report = dict(self.marks)
+        if self.importer is not None:
+            report["background_imports"] = dict(self.importer.timings)
+        print(json.dumps(report, indent=2), flush=True)
@@ -1,5 +1,11 @@
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QLabel, QSizePolicy
+from collections import OrderedDict
+
+from PyQt5.QtCore import QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPixmap
+from PyQt5.QtWidgets import QLabel, QSizePolicy, QWidget
+
+from ai.imaging import ALLOCATIONS
+from ai.metrics import span
 
 
 class FluidImageLabel(QLabel):
@@ -21,13 +27,295 @@ class FluidImageLabel(QLabel):
 
     def update_display(self):
         if self._pixmap and not self._pixmap.isNull():
-            scaled = self._pixmap.scaled(
-                self.size(),
-                Qt.KeepAspectRatio,
-                Qt.FastTransformation
-            )
-            super().setPixmap(scaled)
+            with span("gui.update_display"):
+                scaled = self._pixmap.scaled(
+                    self.size(),
+                    Qt.KeepAspectRatio,
+                    Qt.FastTransformation
+                )
+                super().setPixmap(scaled)
 
     def resizeEvent(self, event):
         self.update_display()
         super().resizeEvent(event)
+
+
+class TiledImageView(QWidget):
+    """Zoomable, pannable image view that paints from a lazily built mipmap pyramid.
+
+    Level k of the pyramid is the image downscaled by 2**k, built on first use
+    from level k-1. Each paint picks the finest level no larger than needed for
+    the current scale and draws only the TILE_SIZE tiles that intersect the
+    viewport, so resizing or zooming never rescales the full-resolution image.
+    Tile pixmaps are kept in a small LRU cache. A new frame of the same size (e.g.
+    a re-rendered overlay) keeps the pyramid's buffers: the levels are repainted in
+    place on first use and only the tiles are dropped.
+
+    Mouse wheel zooms around the cursor, dragging pans and a double click resets
+    to fit. `view_changed` reports (zoom, center_x, center_y) with the center in
+    normalized image coordinates; `link_views` keeps several views in step.
+    """
+
+    TILE_SIZE = 256
+    MAX_ZOOM = 64.0
+
+    view_changed = pyqtSignal(float, float, float)
+
+    def __init__(self, parent=None, max_tiles: int = 256):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.max_tiles = max_tiles
+        self.zoom = 1.0
+        self.center = (0.5, 0.5)
+        self._text = "No Image"
+        self._source = None
+        self._levels = []
+        # Levels below this index show the current image; the rest hold an older frame
+        self._fresh = 0
+        self._tiles = OrderedDict()
+        self._drag_origin = None
+
+    # --- Content ---
+
+    def set_image(self, source) -> int:
+        """Show a FrameBuffer, QImage or QPixmap; returns bytes allocated up front.
+
+        FrameBuffers are displayed without copying the full-resolution pixels: the
+        view keeps the buffer referenced and reads tiles straight out of its QImage.
+        """
+        if isinstance(source, QPixmap):
+            source = source.toImage()
+        image = getattr(source, "qimage", source)
+        if image is None or image.isNull():
+            self.clear()
+            self.setText("No Image")
+            return 0
+
+        if self._levels and self._levels[0].size() == image.size():
+            # Same geometry: the coarser levels are repainted into their buffers when used
+            self._levels[0] = image
+        else:
+            # A different image geometry: start again from the fitted view
+            self.zoom, self.center = 1.0, (0.5, 0.5)
+            self._levels = [image]
+        self._fresh = 1
+        self._source = source
+        self._tiles.clear()
+
+        # Build the level the current view needs now rather than in the first paint
+        start = ALLOCATIONS.total
+        self._level(self._level_for_scale(self._scale()))
+        self.update()
+        return ALLOCATIONS.total - start
+
+    def clear(self):
+        self._source = None
+        self._levels = []
+        self._fresh = 0
+        self._tiles.clear()
+        self.update()
+
+    def setText(self, text: str):
+        self._text = text
+        self.update()
+
+    def text(self) -> str:
+        return self._text
+
+    def update_display(self):
+        self.update()
+
+    # --- View state ---
+
+    def set_view(self, zoom: float, center_x: float, center_y: float):
+        """Apply a zoom/center without emitting `view_changed` (used for syncing)."""
+        self.zoom = min(max(zoom, 1.0), self.MAX_ZOOM)
+        self.center = self._clamp_center(center_x, center_y)
+        self.update()
+
+    def reset_view(self):
+        self._change_view(1.0, 0.5, 0.5)
+
+    def _change_view(self, zoom, center_x, center_y):
+        self.set_view(zoom, center_x, center_y)
+        self.view_changed.emit(self.zoom, *self.center)
+
+    def _image_size(self):
+        return (self._levels[0].width(), self._levels[0].height()) if self._levels else (0, 0)
+
+    def _scale(self) -> float:
+        width, height = self._image_size()
+        if not width or not height:
+            return 1.0
+        fit = min(self.width() / width, self.height() / height)
+        return max(fit, 1e-6) * self.zoom
+
+    def _clamp_center(self, center_x, center_y):
+        width, height = self._image_size()
+        if not width:
+            return 0.5, 0.5
+        scale = self._scale()
+        half_x = self.width() / (2 * width * scale)
+        half_y = self.height() / (2 * height * scale)
+        center_x = 0.5 if half_x >= 0.5 else min(max(center_x, half_x), 1 - half_x)
+        center_y = 0.5 if half_y >= 0.5 else min(max(center_y, half_y), 1 - half_y)
+        return center_x, center_y
+
+    def _origin(self, scale):
+        """Screen position of the image's top-left corner."""
+        width, height = self._image_size()
+        center_x, center_y = self._clamp_center(*self.center)
+        origin_x = self.width() / 2 - center_x * width * scale
+        # Like the old labels: centered horizontally, top-aligned while it fits vertically
+        if height * scale <= self.height():
+            origin_y = 0.0
+        else:
+            origin_y = self.height() / 2 - center_y * height * scale
+        return origin_x, origin_y
+
+    # --- Pyramid ---
+
+    def _level_for_scale(self, scale: float) -> int:
+        level = 0
+        width, height = self._image_size()
+        while scale <= 0.5 and max(width, height) > self.TILE_SIZE:
+            scale *= 2
+            width, height = width // 2, height // 2
+            level += 1
+        return level
+
+    def _level(self, index: int) -> QImage:
+        while self._fresh <= index:
+            previous = self._levels[self._fresh - 1]
+            if self._fresh < len(self._levels):
+                # Bilinear halving into the existing buffer; close to, but not exactly, what `scaled` gives
+                painter = QPainter(self._levels[self._fresh])
+                painter.setRenderHint(QPainter.SmoothPixmapTransform)
+                # Replace the old frame's pixels rather than blending over them
+                painter.setCompositionMode(QPainter.CompositionMode_Source)
+                painter.drawImage(self._levels[self._fresh].rect(), previous)
+                painter.end()
+            else:
+                level = previous.scaled(
+                    max(1, previous.width() // 2), max(1, previous.height() // 2),
+                    Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+                ALLOCATIONS.add(level.sizeInBytes())
+                self._levels.append(level)
+            self._fresh += 1
+        return self._levels[index]
+
+    def _tile(self, level_index: int, tile_x: int, tile_y: int) -> QPixmap:
+        key = (level_index, tile_x, tile_y)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+
+        size = self.TILE_SIZE
+        level = self._level(level_index)
+        # Edge tiles are clipped to the level; QImage.copy would pad them with black
+        rect = QRect(tile_x * size, tile_y * size, size, size).intersected(level.rect())
+        pixmap = QPixmap.fromImage(level.copy(rect))
+        ALLOCATIONS.add(pixmap.width() * pixmap.height() * pixmap.depth() // 8)
+        self._tiles[key] = pixmap
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    # --- Qt events ---
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#eee"))
+        painter.setPen(QPen(QColor("#ccc"), 2, Qt.DashLine))
+        painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+
+        if not self._levels:
+            painter.setPen(QColor("#666"))
+            painter.drawText(self.rect(), Qt.AlignCenter, self._text)
+            return
+
+        with span("gui.paint_tiles"):
+            self._paint_tiles(painter)
+
+    def _paint_tiles(self, painter):
+        width, height = self._image_size()
+        scale = self._scale()
+        origin_x, origin_y = self._origin(scale)
+        level_index = self._level_for_scale(scale)
+        level = self._level(level_index)
+        # Level pixels -> screen pixels
+        step_x = width * scale / level.width()
+        step_y = height * scale / level.height()
+
+        size = self.TILE_SIZE
+        first_x = max(0, int(-origin_x / step_x) // size)
+        first_y = max(0, int(-origin_y / step_y) // size)
+        last_x = min((level.width() - 1) // size, int((self.width() - origin_x) / step_x) // size)
+        last_y = min((level.height() - 1) // size, int((self.height() - origin_y) / step_y) // size)
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, step_x < 4)
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                tile = self._tile(level_index, tile_x, tile_y)
+                # Round tile corners to whole screen pixels so neighbouring tiles share edges
+                left = round(origin_x + tile_x * size * step_x)
+                top = round(origin_y + tile_y * size * step_y)
+                right = round(origin_x + (tile_x * size + tile.width()) * step_x)
+                bottom = round(origin_y + (tile_y * size + tile.height()) * step_y)
+                painter.drawPixmap(QRect(left, top, right - left, bottom - top), tile)
+
+    def resizeEvent(self, event):
+        # Only schedule a repaint: Qt merges pending updates, so a burst of resize
+        # events costs one paint of the visible tiles
+        self.update()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        if not self._levels:
+            return
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        zoom = min(max(self.zoom * factor, 1.0), self.MAX_ZOOM)
+
+        # Keep the image point under the cursor fixed
+        width, height = self._image_size()
+        scale = self._scale()
+        origin_x, origin_y = self._origin(scale)
+        point_x = (event.x() - origin_x) / (width * scale)
+        point_y = (event.y() - origin_y) / (height * scale)
+        new_scale = scale * zoom / self.zoom
+        center_x = point_x + (self.width() / 2 - event.x()) / (width * new_scale)
+        center_y = point_y + (self.height() / 2 - event.y()) / (height * new_scale)
+        self._change_view(zoom, center_x, center_y)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self._levels:
+            self._drag_origin = (event.pos(), self._clamp_center(*self.center))
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        start_pos, (center_x, center_y) = self._drag_origin
+        width, height = self._image_size()
+        scale = self._scale()
+        delta = event.pos() - start_pos
+        self._change_view(
+            self.zoom,
+            center_x - delta.x() / (width * scale),
+            center_y - delta.y() / (height * scale))
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+
+
+def link_views(*views: TiledImageView):
+    """Keep zoom and pan in step across views (e.g. input, heat map and segmentation)."""
+    for view in views:
+        for other in views:
+            if other is not view:
+                view.view_changed.connect(other.set_view)
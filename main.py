@@ -1,22 +1,118 @@
+import time
+
+# Taken before any other import so --startup-profile covers the whole startup
+START_TIME = time.perf_counter()
+
+import argparse
 import os
 import sys
 
-from PyQt5.QtWidgets import QApplication
-
 # Anomalib Imports
 # Set environment variable as in the original script
 os.environ['TRUST_REMOTE_CODE'] = '1'
 
-try:
-    from anomalib.deploy import OpenVINOInferencer, TorchInferencer
-except ImportError:
-    print("Error: Anomalib not found. Please ensure it is installed in your environment.")
-    sys.exit(1)
+# Everything else happens under __main__: --backend process children are spawned,
+# and spawn re-runs this module's top level in each of them
 
-from gui.main_window import InferenceGUI
 
-if __name__ == "__main__":
+def parse_args():
+    from ai.runtimes import add_runtime_argument
+    from ai.watch import OUTPUT_MODES, POLICIES
+
+    parser = argparse.ArgumentParser(description="Anomalib Inference GUI")
+    parser.add_argument("--model", default=None,
+                        help="Model to preload (defaults to the last used model).")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Print time-to-window and time-to-first-inference.")
+    parser.add_argument("--image", default=None,
+                        help="With --startup-profile: infer this image once the model is ready, then exit.")
+    parser.add_argument("--metrics-file", default=os.environ.get("INFERENCE_GUI_METRICS_FILE"),
+                        help="Export stage latency metrics here (.prom for Prometheus text, else JSONL).")
+    parser.add_argument("--backend", choices=["thread", "process", "remote"], default="thread",
+                        help="Run the model in a GUI-process thread, in separate processes "
+                             "(isolates model crashes and keeps the GIL free for the GUI), "
+                             "or on an inference server (server.py).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="With --backend process: number of inference processes.")
+    parser.add_argument("--server", default=os.environ.get("INFERENCE_GUI_SERVER", "http://127.0.0.1:8765"),
+                        help="With --backend remote: URL of the inference server.")
+    parser.add_argument("--metrics-interval", type=float, default=10.0,
+                        help="Seconds between metrics exports.")
+    add_runtime_argument(parser)
+    watch = parser.add_argument_group("Hot folder")
+    watch.add_argument("--watch", default=None, metavar="DIR",
+                       help="Score images as they land in DIR, starting once the model is loaded.")
+    watch.add_argument("--watch-output", default=None, metavar="DIR",
+                       help="Where the OK/NG/ERROR/SKIPPED folders go (default: the watched folder).")
+    watch.add_argument("--watch-mode", choices=OUTPUT_MODES, default="move",
+                       help="Move or copy scored images into the result folders, "
+                            "or only tag them with a sidecar JSON.")
+    watch.add_argument("--watch-queue", type=int, default=32, help="Max images waiting to be scored.")
+    watch.add_argument("--watch-policy", choices=POLICIES, default="block",
+                       help="When the queue is full: stop picking up files until it drains (block), "
+                            "or skip the oldest/newest image.")
+    watch.add_argument("--watch-poll", type=float, default=1.0,
+                       help="Seconds between directory scans (what catches writes on network shares).")
+    watch.add_argument("--watch-settle", type=float, default=0.5,
+                       help="Seconds a scanned file must stay unchanged before it counts as written.")
+    watch.add_argument("--watch-no-inotify", action="store_true", help="Only poll, even on Linux.")
+    # Leave Qt's own arguments (e.g. -platform) to QApplication
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def main():
+    import importlib.util
+
+    # Only check that anomalib is installed; importing it is slow and happens in the background
+    if importlib.util.find_spec("anomalib") is None:
+        print("Error: Anomalib not found. Please ensure it is installed in your environment.")
+        sys.exit(1)
+
+    from ai.preload import BackgroundImporter
+
+    # Start loading anomalib/torch/openvino/cv2 while Qt builds the window
+    importer = BackgroundImporter().start()
+
+    from PyQt5.QtWidgets import QApplication
+
+    from ai.metrics import MetricsExporter
+    from ai.runtimes import RUNTIME_ENV
+    from ai.watch import WatchOptions
+    from gui.main_window import InferenceGUI
+    from gui.startup import StartupProfiler
+
+    args = parse_args()
     app = QApplication(sys.argv)
-    window = InferenceGUI()
+    if args.runtime is not None:
+        # Through the environment so --backend process workers load with it too
+        os.environ[RUNTIME_ENV] = args.runtime
+    ai_worker = None
+    if args.backend == "process":
+        from ai.worker import ProcessAIWorker
+        ai_worker = ProcessAIWorker(args.workers)
+    elif args.backend == "remote":
+        from ai.worker import RemoteAIWorker
+        ai_worker = RemoteAIWorker(args.server)
+    watch_options = WatchOptions(
+        output_dir=args.watch_output, mode=args.watch_mode, queue_size=args.watch_queue,
+        policy=args.watch_policy, poll_interval=args.watch_poll, settle=args.watch_settle,
+        use_inotify=not args.watch_no_inotify,
+    )
+    window = InferenceGUI(initial_model=args.model, ai_worker=ai_worker,
+                          watch_dir=args.watch, watch_options=watch_options)
+    if args.startup_profile:
+        # Owned by the window so it lives as long as the event loop
+        window.startup_profiler = StartupProfiler(app, window, START_TIME, importer, args.image)
+    exporter = None
+    if args.metrics_file:
+        exporter = MetricsExporter(args.metrics_file, args.metrics_interval).start()
     window.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    if exporter is not None:
+        exporter.stop()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
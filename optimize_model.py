@@ -0,0 +1,168 @@
+"""Build FP16 and INT8 OpenVINO variants of a model and compare them with the original.
+
+    python3 optimize_model.py --model model.xml --calibration-dir good_images/ --report report.json
+
+The variants are written next to the model as `<stem>.fp16.xml` / `<stem>.int8.xml`
+(override with --output-dir); the GUI lists them in its model switcher once the
+original is loaded. Each model is then benchmarked in its own process on the same
+images (--eval-dir, default: the calibration images), and the report lists
+latency, throughput, load time, peak memory and how closely scores and masks
+agree with the original. INT8 needs NNCF (pip install nncf).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Set environment variable as in main.py
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+from ai.inference import model_files
+from ai.optimization import (
+    VARIANTS, agreement, benchmark_variant, quantize_int8, read_openvino_model, save_fp16, variant_path,
+)
+from batch_inference import list_images
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize a model and report accuracy against latency.")
+    parser.add_argument("--model", type=Path, required=True, help="Model weights file (.xml, .onnx, .pt, ...).")
+    parser.add_argument("--calibration-dir", type=Path, required=True,
+                        help="Images used to calibrate INT8 quantization (normal samples are fine).")
+    parser.add_argument("--eval-dir", type=Path, default=None,
+                        help="Images to benchmark on (default: the calibration images).")
+    parser.add_argument("--output-dir", type=Path, default=None, help="Where to write the variants.")
+    parser.add_argument("--variants", default=",".join(VARIANTS),
+                        help="Comma-separated variants to build (fp16, int8).")
+    parser.add_argument("--subset-size", type=int, default=300, help="Max calibration images for INT8.")
+    parser.add_argument("--input-size", default="256x256",
+                        help="HxW input for converting Torch models (ignored for OpenVINO/ONNX).")
+    parser.add_argument("--max-images", type=int, default=100, help="Max images to benchmark on.")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Score threshold for label agreement.")
+    parser.add_argument("--skip-build", action="store_true", help="Only benchmark variants that already exist.")
+    parser.add_argument("--recursive", action="store_true", help="Search image folders recursively.")
+    parser.add_argument("--report", type=Path, default=None, help="Write the report JSON here.")
+    return parser.parse_args(argv)
+
+
+def build_variants(args, variants, calibration_images):
+    height, width = (int(v) for v in args.input_size.lower().split("x"))
+    print(f"Reading {args.model.name} ...", file=sys.stderr)
+    ov_model = read_openvino_model(args.model, (height, width))
+
+    built = {}
+    for variant in variants:
+        output_path = variant_path(args.model, variant, args.output_dir)
+        print(f"Building {variant} -> {output_path}", file=sys.stderr)
+        try:
+            if variant == "fp16":
+                save_fp16(ov_model, output_path)
+            else:
+                quantize_int8(ov_model, calibration_images, output_path, args.subset_size)
+        except Exception as e:
+            print(f"  {variant} failed: {str(e)}", file=sys.stderr)
+            continue
+        built[variant] = output_path
+    return built
+
+
+def run_benchmark(model_path, image_paths):
+    """Benchmark one model in a fresh process (clean load time and peak memory)."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=benchmark_variant, args=(str(model_path), [str(p) for p in image_paths], results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                result = {"model": str(model_path), "error": f"benchmark process exited with code {process.exitcode}"}
+                break
+    process.join()
+    return result
+
+
+def summarize(name, result, reference, threshold):
+    if "error" in result:
+        return {"variant": name, "model": result["model"], "error": result["error"]}
+    latencies_ms = np.asarray(result["latencies"]) * 1000.0
+    summary = {
+        "variant": name,
+        "model": result["model"],
+        "size_mb": sum(p.stat().st_size for p in model_files(Path(result["model"]))) / (1024 * 1024),
+        "load_time_s": result["load_time_s"],
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "throughput_per_s": result["throughput_per_s"],
+        "peak_rss_mb": result["peak_rss_mb"],
+    }
+    if reference is not None and reference is not result:
+        summary.update(agreement(reference, result, threshold))
+    return summary
+
+
+def format_report(rows) -> str:
+    columns = [
+        ("variant", "{}"), ("size_mb", "{:.1f}"), ("latency_p50_ms", "{:.1f}"), ("latency_p95_ms", "{:.1f}"),
+        ("throughput_per_s", "{:.1f}"), ("peak_rss_mb", "{:.0f}"), ("score_mean_abs_diff", "{:.4f}"),
+        ("label_agreement", "{:.1%}"), ("mask_mean_iou", "{:.3f}"),
+    ]
+    lines = ["  ".join(f"{name:>16}" for name, _ in columns)]
+    for row in rows:
+        if "error" in row:
+            lines.append(f"{row['variant']:>16}  error: {row['error']}")
+            continue
+        cells = [fmt.format(row[name]) if row.get(name) is not None else "-" for name, fmt in columns]
+        lines.append("  ".join(f"{cell:>16}" for cell in cells))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        print(f"Unknown variants: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    calibration_images = list_images(args.calibration_dir, args.recursive)
+    eval_images = list_images(args.eval_dir, args.recursive) if args.eval_dir else calibration_images
+    eval_images = eval_images[:args.max_images]
+    if not calibration_images or not eval_images:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    if args.skip_build:
+        built = {v: variant_path(args.model, v, args.output_dir) for v in variants}
+        built = {v: path for v, path in built.items() if path.exists()}
+    else:
+        built = build_variants(args, variants, calibration_images)
+
+    rows, reference = [], None
+    for name, model_path in [("original", args.model), *built.items()]:
+        print(f"Benchmarking {name} on {len(eval_images)} images ...", file=sys.stderr)
+        result = run_benchmark(model_path, eval_images)
+        if name == "original":
+            if "error" in result:
+                print(f"Original model failed: {result['error']}", file=sys.stderr)
+                return 1
+            reference = result
+        rows.append(summarize(name, result, reference, args.threshold))
+
+    print(format_report(rows))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"model": str(args.model), "images": len(eval_images), "variants": rows}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Serve one model over HTTP so several inspection GUIs can share a GPU box.
+
+    python3 server.py --model model.xml --host 0.0.0.0 --port 8765 --batch-size 8
+
+Endpoints:
+    GET  /health              model name and hash, as JSON
+    POST /predict[?tiled=1]   body: an encoded image file; response: see ai/remote.py
+    GET  /metrics             stage latency histograms in Prometheus text format
+
+Concurrent requests are micro-batched into single predict calls. Pass --fake
+to serve the deterministic FakeInferencer instead of a model (for testing).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Set environment variable as in main.py
+os.environ['TRUST_REMOTE_CODE'] = '1'
+
+from ai.batching import MicroBatcher
+from ai.imaging import decode_reduced, decode_rgb
+from ai.metrics import METRICS, MetricsExporter, span
+from ai.openvino_async import add_profile_arguments, profile_from_args
+from ai.runtimes import add_runtime_argument
+from ai.remote import encode_prediction
+from ai.tiling import known_input_size, run_tiled_inference
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+_MIN_GZIP_SIZE = 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve anomaly predictions over HTTP.")
+    model = parser.add_mutually_exclusive_group(required=True)
+    model.add_argument("--model", type=Path, help="Model weights file.")
+    model.add_argument("--fake", action="store_true",
+                       help="Serve the deterministic FakeInferencer (no weights needed).")
+    parser.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 to serve the LAN.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="Max concurrent requests merged into one predict call.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Max time a request waits for its batch to fill up.")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0,
+                        help="With --fake: emulated model time per predict call.")
+    parser.add_argument("--metrics-file", type=Path, default=None,
+                        help="Export stage latency metrics here (.prom for Prometheus text, else JSONL).")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    add_profile_arguments(parser)
+    add_runtime_argument(parser)
+    return parser.parse_args(argv)
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps client connections open between requests
+    protocol_version = "HTTP/1.1"
+    server_version = "InferenceGUI"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send(200, json.dumps(self.server.info).encode(), {"Content-Type": "application/json"})
+        elif path == "/metrics":
+            self._send(200, METRICS.to_prometheus().encode(), {"Content-Type": "text/plain; version=0.0.4"})
+        else:
+            self._send(404, b"Not found\n")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if url.path != "/predict":
+            self._send(404, b"Not found\n")
+            return
+
+        tiled = parse_qs(url.query).get("tiled", ["0"])[0] == "1"
+        try:
+            with span("server.decode"):
+                model_size = self.server.model_size
+                # Non-tiled requests only need the image at the model's input size
+                image = decode_reduced(data, model_size) if model_size and not tiled else decode_rgb(data)
+        except (ValueError, OSError) as e:
+            self._send(400, f"Decode Error: {str(e)}\n".encode())
+            return
+
+        try:
+            with span("server.predict"):
+                batcher = self.server.batcher
+                if tiled:
+                    # Tiles are batched inside run_tiled_inference; keep it off other batches' toes
+                    prediction, inference_time = batcher.call(run_tiled_inference, image).result()
+                else:
+                    prediction, inference_time = batcher.predict(image)
+            headers, body = encode_prediction(prediction, inference_time)
+        except Exception as e:
+            self._send(500, f"Inference Error: {str(e)}\n".encode())
+            return
+
+        headers["Content-Type"] = "application/octet-stream"
+        if len(body) >= _MIN_GZIP_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+            with span("server.compress"):
+                body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, batcher, info, verbose=False, model_size=None):
+        super().__init__(address, InferenceHandler)
+        self.batcher = batcher
+        self.info = info
+        self.verbose = verbose
+        # (height, width) to decode non-tiled uploads at; None decodes at full resolution
+        self.model_size = model_size
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.fake:
+        from ai.fake_inferencer import FakeInferencer
+        inferencer = FakeInferencer(latency=args.fake_latency_ms / 1000.0)
+        info = {"model": "fake", "model_hash": "fake"}
+    else:
+        from ai.registry import ModelRegistry
+        print(f"Loading model {args.model} ...")
+        loaded_model = ModelRegistry(openvino_profile=profile_from_args(args), runtime=args.runtime).get(args.model)
+        inferencer = loaded_model.inferencer
+        info = {"model": args.model.name, "model_hash": loaded_model.model_hash}
+        print(f"Model loaded with {loaded_model.runtime} in {loaded_model.load_time:.2f}s "
+              f"(warm-up {loaded_model.warmup_time:.2f}s)")
+
+    model_size = known_input_size(inferencer)
+    # Clients key their prediction caches on how the server feeds the model
+    info["input_size"] = list(model_size) if model_size else None
+    batcher = MicroBatcher(inferencer, args.batch_size, args.max_wait_ms / 1000.0)
+    server = InferenceServer((args.host, args.port), batcher, info, args.verbose, model_size)
+    exporter = MetricsExporter(args.metrics_file).start() if args.metrics_file else None
+    print(f"Serving {info['model']} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if exporter is not None:
+            exporter.stop()
+        if batcher.batches:
+            print(f"Served {batcher.batched_images} images in {batcher.batches} batches "
+                  f"(mean batch size {batcher.batched_images / batcher.batches:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())